@@ -0,0 +1,102 @@
+"""
+Compare LIMIT/OFFSET pages of session history with keyset pages at increasing depths on a synthetic history.
+
+Run from the project root against the database in config.json, migrations are applied first:
+    python -m benchmarks.bench_history_pagination [row_count]
+
+The rows, 1,000,000 by default, are written to a scratch session that is deleted afterwards.
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from models.session_history_model import SessionHistoryModel
+from models.session_model import SessionModel
+from systems.database import Database
+from systems.migrations import Migrations
+
+PER_PAGE = 10
+BATCH_SIZE = 5000
+ROLES = ("user", "agent-host", "agent-search", "agent-summary")
+
+
+def fill_history(db, session_id, row_count):
+    start = datetime(2024, 1, 1)
+    query = "INSERT INTO session_history (session_id, role, content, timestamp) VALUES (%s, %s, %s, %s);"
+
+    for first in range(0, row_count, BATCH_SIZE):
+        # a few entries a second, like a busy show
+        rows = [(session_id, ROLES[i % len(ROLES)], f"synthetic history entry {i} " + "x" * 200,
+                 start + timedelta(seconds=i // 3))
+                for i in range(first, min(row_count, first + BATCH_SIZE))]
+        db.execute_many(query, rows, batch_size=BATCH_SIZE)
+        print(f"\rinserted {first + len(rows)} of {row_count} rows", end="")
+    print()
+
+
+def cursor_at(db, session_id, offset):
+    """The cursor a reader would have after paging down to offset, found without timing it."""
+    if not offset:
+        return None
+    rows = db.fetch_results("SELECT timestamp, id FROM session_history WHERE session_id = %s "
+                            "ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET %s;", (session_id, offset - 1))
+    return SessionHistoryModel.keyset.encode_cursor(rows[0][0], rows[0][1]) if rows else None
+
+
+def timed(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def explain_key(db, query, params):
+    rows = db.fetch_results("EXPLAIN " + query, params)
+    # EXPLAIN columns: id, select_type, table, partitions, type, possible_keys, key, key_len, ref, rows, ...
+    return rows[0][6] if rows else None
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    db = Database()
+    db.connect()
+    Migrations(db).apply()
+
+    session = SessionModel(db, None, "keyset pagination benchmark", "benchmark", "benchmark", "benchmark")
+    session.save()
+    try:
+        fill_history(db, session.id, row_count)
+        db.fetch_results("ANALYZE TABLE session_history;")
+
+        offset_query = ("SELECT id, session_id, role, content, timestamp FROM session_history "
+                        "WHERE session_id = %s ORDER BY timestamp DESC LIMIT %s OFFSET %s;")
+        print(f"offset query uses index {explain_key(db, offset_query, (session.id, PER_PAGE, 0))}")
+
+        print(f"{'page':>8} {'offset ms':>10} {'keyset ms':>10} {'speedup':>8}")
+        total_pages = row_count // PER_PAGE
+        for page in (1, 10, 100, 1000, 10000, total_pages // 2, total_pages):
+            if page > total_pages:
+                continue
+            offset = (page - 1) * PER_PAGE
+            cursor = cursor_at(db, session.id, offset)
+
+            offset_time, by_offset = timed(lambda: SessionHistoryModel.get_paginated_by_session_id(
+                db, session.id, page, PER_PAGE))
+            keyset_time, by_keyset = timed(lambda: SessionHistoryModel.get_page_by_session_id(
+                db, session.id, PER_PAGE, after=cursor))
+
+            # both ways read the same entries, ties on the timestamp aside
+            same = {entry.id for entry in by_offset} == {entry.id for entry in by_keyset}
+            print(f"{page:8d} {offset_time * 1000:10.1f} {keyset_time * 1000:10.1f} "
+                  f"{offset_time / max(keyset_time, 1e-9):7.1f}x{'' if same else '  (pages differ on ties)'}")
+    finally:
+        session.delete()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
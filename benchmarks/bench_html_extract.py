@@ -0,0 +1,83 @@
+"""
+Compare extracting the title, text and links of saved html pages with the separate calls
+get_page_details used to make against the single pass HtmlTools.extract.
+
+Run from the project root with a directory of saved pages (*.html, *.htm):
+    python -m benchmarks.bench_html_extract <corpus_dir> [repeat]
+
+Without a directory a small generated corpus is used. Reports pages per second and the peak
+memory traced by tracemalloc while extracting one page, for every parser that is installed.
+"""
+import importlib.util
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from utils.html_tools import HtmlTools
+
+
+def separate_calls(html, parser):
+    # what BrowserSystem.get_page_details did before: three parses and two cleanings
+    HtmlTools.parser = parser
+    return (HtmlTools.get_title(html),
+            HtmlTools.get_page_content(HtmlTools.strip_string(html)),
+            HtmlTools.get_page_links(html))
+
+
+def single_pass(html, parser):
+    return HtmlTools.extract(html, parser=parser)
+
+
+def load_corpus(path):
+    if path:
+        return [file.read_text(encoding="utf-8", errors="replace")
+                for file in sorted(Path(path).iterdir()) if file.suffix.lower() in (".html", ".htm")]
+
+    paragraph = "<p style='margin:0'>Some <b>text</b> about robots with a <a href='/link{0}'>link {0}</a>.</p>"
+    body = "\n".join(f"<div class='section'>{paragraph.format(i)}<span></span></div>" for i in range(400))
+    page = (f"<html><head><title>Generated</title><script>var x = 1;</script></head><body>"
+            f"<nav><a href='/'>Home</a></nav>{body}<footer>Copyright</footer></body></html>")
+    return [page] * 20
+
+
+def measure(extract, corpus, parser, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in corpus:
+            extract(html, parser)
+    elapsed = time.perf_counter() - start
+
+    peak = 0
+    for html in corpus:
+        tracemalloc.start()
+        extract(html, parser)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return len(corpus) * repeat / elapsed, peak
+
+
+def main():
+    corpus = load_corpus(sys.argv[1] if len(sys.argv) > 1 else None)
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    if not corpus:
+        print("no html pages found")
+        return
+
+    total_kb = sum(len(html) for html in corpus) / 1024
+    print(f"{len(corpus)} pages, {total_kb:.0f} KB, repeated {repeat} times")
+
+    parsers = ["html.parser"] + [name for name in ("lxml",) if importlib.util.find_spec(name)]
+    default_parser = HtmlTools.parser
+    try:
+        for parser in parsers:
+            for name, extract in (("separate calls", separate_calls), ("extract", single_pass)):
+                pages_per_second, peak = measure(extract, corpus, parser, repeat)
+                print(f"{parser:12} {name:15} {pages_per_second:8.1f} pages/s  peak {peak / 1024 / 1024:6.1f} MB")
+    finally:
+        HtmlTools.parser = default_parser
+
+
+if __name__ == "__main__":
+    main()
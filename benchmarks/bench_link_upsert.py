@@ -0,0 +1,68 @@
+"""
+Compare the per-link page saves with PageModel.bulk_upsert_links for one page load.
+
+Run from the project root against the database in config.json:
+    python -m benchmarks.bench_link_upsert [link_count]
+
+Rows are written to a scratch session id and deleted afterwards.
+"""
+import sys
+import time
+
+from models.page_model import PageModel
+from systems.database import Database
+
+SCRATCH_SESSION_ID = 2147483000
+PARENT_URL = "https://news.example.com/"
+
+
+def make_links(count):
+    # news front pages link to the same story several times
+    return [
+        {"href": f"https://news.example.com/story/{i % (count * 2 // 3 or 1)}", "text": f"Story number {i}"}
+        for i in range(count)
+    ]
+
+
+def per_link_save(db, links):
+    for link in links:
+        link_page = PageModel.get_by_url(db, link["href"], SCRATCH_SESSION_ID)
+        if not link_page.title:
+            link_page.title = link["text"]
+            link_page.set_parent_url(PARENT_URL)
+            link_page.save()
+
+
+def bulk_save(db, links):
+    PageModel.bulk_upsert_links(db, SCRATCH_SESSION_ID, PARENT_URL, links)
+
+
+def measure(name, func, db, links):
+    PageModel.delete_by_session_id(db, SCRATCH_SESSION_ID)
+
+    queries = db.get_query_count()
+    start = time.perf_counter()
+    func(db, links)
+    elapsed = time.perf_counter() - start
+    queries = db.get_query_count() - queries
+
+    print(f"{name:>14}: {queries:5d} queries {elapsed * 1000:9.1f} ms")
+
+
+def main():
+    link_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    links = make_links(link_count)
+
+    db = Database()
+    db.connect()
+    try:
+        print(f"one page load with {link_count} links")
+        measure("per link save", per_link_save, db, links)
+        measure("bulk upsert", bulk_save, db, links)
+    finally:
+        PageModel.delete_by_session_id(db, SCRATCH_SESSION_ID)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Micro-benchmarks for the regex hot paths, comparing the raw pattern strings passed to re on every call
+with the precompiled patterns and substring matchers in utils.patterns.
+
+Run from the project root:
+    python -m benchmarks.bench_patterns [number]
+
+Page bodies are generated to look like cleaned article text, the proxy stream is a mix of page,
+script, image and tracking urls like the ones Firefox requests while loading a page.
+"""
+import re
+import sys
+import timeit
+from urllib.parse import urlparse
+
+from utils import patterns
+from utils.html_tools import HtmlTools
+from utils.patterns import SubstringMatcher
+from utils.text_tools import TextTools
+
+WORDS = ("the robots of NASA explore mars and step over rocks while the rover sends data back to "
+         "JPL see https://example.com/rovers/curiosity for more ... ").split()
+
+EXCLUDED_EXTENSIONS = ['png', 'jpg', 'jpeg', 'gif', 'ts', 'js', 'mp4', 'avi', 'mov', 'webp', 'css', 'ico',
+                       'json', 'svg', 'm3u8', 'webm', 'txt', 'pdf', 'chain']
+EXCLUDED_DOMAINS = ['firefox.settings.services.mozilla.com', 'cdn.mozilla.net', 'gstatic.com']
+
+PROXY_URLS = [
+    "https://en.wikipedia.org/wiki/Mars",
+    "https://upload.wikimedia.org/wikipedia/commons/thumb/0/02/OSIRIS_Mars_true_color.jpg",
+    "https://en.wikipedia.org/w/load.php?lang=en&modules=startup&only=scripts",
+    "https://www.gstatic.com/recaptcha/api2/logo_48.png",
+    "https://cdn.mozilla.net/pub/firefox/releases/",
+    "https://example.com/static/app.js?v=3",
+    "https://news.example.com/2024/05/robots-on-mars",
+    "https://firefox.settings.services.mozilla.com/v1/buckets/main/collections",
+]
+
+
+def page_body(words=1500):
+    return " ".join(WORDS[i % len(WORDS)] for i in range(words))
+
+
+# the implementations before utils.patterns
+
+def old_has_error(text):
+    return any(substring.lower() in text.lower() for substring in HtmlTools.error_strings)
+
+
+def old_strip_string(text):
+    for pattern in [patterns.URL_PATTERN, r'\.{3,}', r'\bstep']:
+        text = re.sub(pattern, '', text, flags=re.I)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def old_is_url(text):
+    url = ""
+    for match in re.finditer(patterns.URL_PATTERN, text, flags=re.IGNORECASE):
+        url = match.group(0)
+    return url
+
+
+def old_separate_acronyms(text):
+    return re.sub(r'\b[A-Z]{2,4}\b', lambda match: '-'.join(match.group()), text)
+
+
+def old_should_exclude(url):
+    domains_pattern = r'(' + '|'.join(re.escape(domain) for domain in EXCLUDED_DOMAINS) + r')'
+    if re.search(domains_pattern, url, re.IGNORECASE):
+        return True
+    extensions_pattern = r'\.(' + '|'.join(EXCLUDED_EXTENSIONS) + r')($|\?)'
+    if re.search(extensions_pattern, url, re.IGNORECASE):
+        return True
+    return bool(urlparse(url).query)
+
+
+# the same checks BrowserProxy builds once
+excluded_domains = SubstringMatcher(EXCLUDED_DOMAINS)
+excluded_extensions = re.compile(r'\.(' + '|'.join(EXCLUDED_EXTENSIONS) + r')($|\?)', re.IGNORECASE)
+
+
+def new_should_exclude(url):
+    if excluded_domains.matches(url):
+        return True
+    if excluded_extensions.search(url):
+        return True
+    return bool(urlparse(url).query)
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    body = page_body()
+    short = page_body(40)
+    stream = PROXY_URLS * 25
+
+    cases = [
+        ("has_error (page body)", lambda: old_has_error(body), lambda: HtmlTools.has_error(body)),
+        ("strip_string (page body)", lambda: old_strip_string(body), lambda: HtmlTools.strip_string(body)),
+        ("is_url (short text)", lambda: old_is_url(short), lambda: HtmlTools.is_url(short)),
+        ("separate_acronyms (short)", lambda: old_separate_acronyms(short), lambda: TextTools.separate_acronyms(short)),
+        (f"should_exclude ({len(stream)} urls)",
+         lambda: [old_should_exclude(url) for url in stream],
+         lambda: [new_should_exclude(url) for url in stream]),
+    ]
+
+    matcher = "aho-corasick" if patterns.ahocorasick else "substring scan"
+    print(f"substring matcher: {matcher}, {number} calls each")
+    for name, old, new in cases:
+        assert old() == new(), name
+        old_time = min(timeit.repeat(old, number=number, repeat=3)) / number
+        new_time = min(timeit.repeat(new, number=number, repeat=3)) / number
+        print(f"{name:30} before {old_time * 1e6:9.1f} us  after {new_time * 1e6:9.1f} us  "
+              f"{old_time / new_time:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare prompt prefill time and output with prefix caching off and on, runs on a CPU with a small model.
+
+Run from the project root:
+    python -m benchmarks.bench_prefix_cache HuggingFaceTB/SmolLM2-135M-Instruct
+"""
+import sys
+import time
+
+from systems.text_generator import TextGenerator
+
+RULES = ("this is a variety show for adults where humor, shock and spontaneity are key! We will search the internet, "
+         "open pages and then entertain the audience with the things we find.\n\n") * 20
+
+
+def run(model_path, prefix_cache_size, turns=4):
+    generator = TextGenerator(model_path=model_path, max_tokens=24, prefix_cache_size=prefix_cache_size,
+                              min_prefix_tokens=16)
+    generator.load_model()
+    generator.generation_kwargs = {"do_sample": False}
+
+    outputs = []
+    timings = []
+    try:
+        for turn in range(turns):
+            start = time.perf_counter()
+            outputs.append(generator.generate_response(
+                prompt=RULES + f"you are the host, this is segment {turn}",
+                input="what is next on the show?",
+                cache_key="explore/host"
+            ))
+            timings.append(time.perf_counter() - start)
+    finally:
+        generator.stop()
+
+    return outputs, timings, generator.get_stats().get("prefix_cache")
+
+
+def main():
+    model_path = sys.argv[1]
+
+    plain_outputs, plain_timings, _ = run(model_path, 0)
+    cached_outputs, cached_timings, cache_stats = run(model_path, 4)
+
+    for turn, (plain, cached) in enumerate(zip(plain_timings, cached_timings)):
+        print(f"turn {turn}: no cache {plain * 1000:8.1f} ms  prefix cache {cached * 1000:8.1f} ms")
+
+    print(f"outputs equal: {plain_outputs == cached_outputs}")
+    print(f"prefix cache: {cache_stats}")
+
+
+if __name__ == '__main__':
+    main()
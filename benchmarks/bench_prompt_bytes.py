@@ -0,0 +1,58 @@
+"""
+Measure the bytes read from MySQL to fill the page placeholders of one turn's prompts.
+
+Run from the project root against the database in config.json:
+    python -m benchmarks.bench_prompt_bytes <session_id>
+
+"before" loads every page column like the finders used to, "after" uses the projections
+that GameMoves.prepare_prompt requests now.
+"""
+import sys
+
+from models.page_model import PageModel
+from systems.database import Database
+from systems.system_base import SystemBase
+
+# placeholder -> (finder, projection used by prepare_prompt)
+PLACEHOLDERS = {
+    "%PAGES%": (lambda db, session_id, columns: PageModel.get_summarized(
+        db, session_id, 1, 5, columns=columns), PageModel.summary_columns),
+    "%CURRENT_PAGE%": (lambda db, session_id, columns: PageModel.get_by_not_parent_url(
+        db, SystemBase.user_browser_string, session_id, 1, columns=columns), PageModel.summary_columns),
+    "%CURRENT_USER_PAGE%": (lambda db, session_id, columns: PageModel.get_by_parent_url(
+        db, SystemBase.user_browser_string, session_id, 1, columns=columns), PageModel.summary_columns),
+    "%SEARCHES%": (lambda db, session_id, columns: PageModel.get_search_results(
+        db, session_id, 15, columns=columns), PageModel.search_columns),
+    "%LINKS%": (lambda db, session_id, columns: PageModel.get_unloaded_pages(
+        db, session_id, 20, columns=columns), PageModel.link_columns),
+}
+
+
+def measure(db, finder, session_id, columns):
+    start = db.get_bytes_fetched()
+    finder(db, session_id, columns)
+    return db.get_bytes_fetched() - start
+
+
+def main():
+    session_id = int(sys.argv[1])
+
+    db = Database()
+    db.connect()
+    try:
+        total_before = 0
+        total_after = 0
+        print(f"{'placeholder':<20} {'before':>10} {'after':>10}")
+        for placeholder, (finder, projection) in PLACEHOLDERS.items():
+            before = measure(db, finder, session_id, PageModel.columns)
+            after = measure(db, finder, session_id, projection)
+            total_before += before
+            total_after += after
+            print(f"{placeholder:<20} {before:>10} {after:>10}")
+        print(f"{'total per turn':<20} {total_before:>10} {total_after:>10}")
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""
+Report how much page content is shared between pages, sessions and urls since bodies are stored once
+in page_contents.
+
+Run from the project root against the database in config.json, migrations are applied first:
+    python -m benchmarks.report_page_dedup
+"""
+from models.page_content_model import PageContentModel
+from systems.database import Database
+from systems.migrations import Migrations
+
+
+def main():
+    db = Database()
+    db.connect()
+    Migrations(db).apply()
+
+    report = PageContentModel.get_dedup_report(db)
+
+    print(f"{report['pages']} loaded pages in {report['sessions']} sessions "
+          f"share {report['unique_contents']} bodies, dedup ratio {report['dedup_ratio']}")
+    print(f"body bytes: {report['body_bytes_per_page']} stored per page before, "
+          f"{report['body_bytes_stored']} stored once now, {report['bytes_saved']} saved")
+    print(f"{report['shared_summaries']} of {report['stored_contents']} bodies have a summary shared by their pages")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -93,6 +93,31 @@ INSERT INTO `games` VALUES ('explore','this is a variety show for adults where h
 /*!40000 ALTER TABLE `games` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `page_contents`
+--
+
+DROP TABLE IF EXISTS `page_contents`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `page_contents` (
+  `content_hash` char(64) NOT NULL,
+  `body` text NOT NULL,
+  `summary` text,
+  `stored_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`content_hash`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `page_contents`
+--
+
+LOCK TABLES `page_contents` WRITE;
+/*!40000 ALTER TABLE `page_contents` DISABLE KEYS */;
+/*!40000 ALTER TABLE `page_contents` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `pages`
 --
@@ -107,20 +132,23 @@ CREATE TABLE `pages` (
   `title` varchar(500) DEFAULT NULL,
   `body` text,
   `summary` text,
+  `content_hash` char(64) DEFAULT NULL,
   `parent_url_hash` char(64) DEFAULT NULL,
   `search_term` varchar(500) DEFAULT NULL,
   `search_rank` int DEFAULT NULL,
   `last_loaded` timestamp NULL DEFAULT NULL,
   `last_opened` timestamp NULL DEFAULT NULL,
   `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
-  `is_body_null` tinyint(1) GENERATED ALWAYS AS ((`body` is null)) VIRTUAL,
+  `is_body_null` tinyint(1) GENERATED ALWAYS AS (((`body` is null) and (`content_hash` is null))) VIRTUAL,
   `is_summary_null` tinyint(1) GENERATED ALWAYS AS ((`summary` is null)) VIRTUAL,
   PRIMARY KEY (`url_hash`,`session_id`),
   KEY `idx_pages_session_id` (`session_id`),
   KEY `idx_pages_search` (`search_term`(255)),
   KEY `idx_pages_parent_url_hash` (`parent_url_hash`),
   KEY `idx_pages_body_null` (`is_body_null`),
-  KEY `idx_pages_summary_null` (`is_summary_null`)
+  KEY `idx_pages_summary_null` (`is_summary_null`),
+  KEY `idx_pages_content_hash` (`content_hash`),
+  KEY `idx_pages_session_created` (`session_id`,`created_at`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -133,6 +161,31 @@ LOCK TABLES `pages` WRITE;
 /*!40000 ALTER TABLE `pages` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `schema_migrations`
+--
+
+DROP TABLE IF EXISTS `schema_migrations`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `schema_migrations` (
+  `version` int NOT NULL,
+  `name` varchar(255) NOT NULL,
+  `applied_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `schema_migrations`
+--
+
+LOCK TABLES `schema_migrations` WRITE;
+/*!40000 ALTER TABLE `schema_migrations` DISABLE KEYS */;
+INSERT INTO `schema_migrations` (`version`, `name`) VALUES (1,'001_page_contents.sql'),(2,'002_session_target_buffer.sql'),(3,'003_keyset_indexes.sql');
+/*!40000 ALTER TABLE `schema_migrations` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `session_history`
 --
@@ -148,6 +201,8 @@ CREATE TABLE `session_history` (
   `timestamp` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
   KEY `session_id` (`session_id`),
+  KEY `idx_history_session_timestamp` (`session_id`,`timestamp`),
+  KEY `idx_history_session_role_timestamp` (`session_id`,`role`,`timestamp`),
   CONSTRAINT `session_history_ibfk_1` FOREIGN KEY (`session_id`) REFERENCES `sessions` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=3524 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -227,6 +282,7 @@ CREATE TABLE `sessions` (
   `judge` varchar(255) NOT NULL,
   `name` varchar(255) DEFAULT NULL,
   `summary` varchar(255) DEFAULT NULL,
+  `target_buffer` int DEFAULT NULL,
   PRIMARY KEY (`id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=17 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -237,7 +293,7 @@ CREATE TABLE `sessions` (
 
 LOCK TABLES `sessions` WRITE;
 /*!40000 ALTER TABLE `sessions` DISABLE KEYS */;
-INSERT INTO `sessions` VALUES (3,'explore','moderator','News Explorer','page summary');
+INSERT INTO `sessions` VALUES (3,'explore','moderator','News Explorer','page summary',NULL);
 /*!40000 ALTER TABLE `sessions` ENABLE KEYS */;
 UNLOCK TABLES;
 
@@ -257,6 +313,8 @@ CREATE TABLE `transcripts` (
   `timestamp` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
   KEY `session_id` (`session_id`),
+  KEY `idx_transcripts_session_timestamp` (`session_id`,`timestamp`),
+  KEY `idx_transcripts_timestamp` (`timestamp`),
   CONSTRAINT `transcripts_ibfk_1` FOREIGN KEY (`session_id`) REFERENCES `sessions` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=393 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
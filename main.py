@@ -38,6 +38,9 @@ csrf = CSRFProtect(flask_app)
 
 if __name__ == "__main__":
     try:
+        # models named in warm_up start loading in the background once the server is listening
+        if app.config().warm_up:
+            app.warm_up(app.config().warm_up, port=5000)
         flask_app.run(debug=True, use_reloader=False)
     finally:
         app.stop()
@@ -1,4 +1,9 @@
+from models.model_cache import model_cache
+
+
 class AgentModel:
+    cache_namespace = "agents"
+
     def __init__(self, db, name, prompt, voice, role):
         self.db = db
         self.name = name
@@ -9,13 +14,13 @@ class AgentModel:
     @classmethod
     def get_all(cls, db):
         query = "SELECT name, prompt, voice, role FROM agents;"
-        results = db.fetch_results(query)
+        results = model_cache.get(cls.cache_namespace, None, lambda: db.fetch_results(query))
         return [cls(db, row[0], row[1], row[2], row[3]) for row in results]
 
     @classmethod
     def get(cls, db, name):
         query = "SELECT name, prompt, voice, role FROM agents WHERE name = %s;"
-        result = db.fetch_results(query, (name,))
+        result = model_cache.get(cls.cache_namespace, name, lambda: db.fetch_results(query, (name,)))
         if result:
             row = result[0]
             return cls(db, row[0], row[1], row[2], row[3])
@@ -31,7 +36,9 @@ class AgentModel:
         role = VALUES(role);
         """
         self.db.execute_query(query, (self.name, self.prompt, self.voice, self.role))
+        model_cache.invalidate(self.cache_namespace)
 
     def delete(self):
         query = "DELETE FROM agents WHERE name = %s;"
         self.db.execute_query(query, (self.name,))
+        model_cache.invalidate(self.cache_namespace)
@@ -1,6 +1,15 @@
 
 
+from models.model_cache import model_cache
+
+
 class GameModel:
+    cache_namespace = "games"
+
+    # games with their variables in one query, a game without variables has one row of NULLs
+    select_with_variables = ("SELECT games.name, games.rules, game_variables.name, game_variables.value FROM games "
+                             "LEFT JOIN game_variables ON game_variables.game_name = games.name ")
+
     def __init__(self, db, name, rules, variables):
         self.db = db
         self.name = name
@@ -8,24 +17,27 @@ class GameModel:
         self.variables = variables  # Assuming variables is a dictionary
 
     @classmethod
-    def get_all(cls, db):
-        query = "SELECT name, rules FROM games;"
-        results = db.fetch_results(query)
-        games = []
+    def from_rows(cls, db, results):
+        games = {}
         for row in results:
-            variables = cls.get_variables(db, row[0])
-            games.append(cls(db, row[0], row[1], variables))
-        return games
+            if row[0] not in games:
+                games[row[0]] = cls(db, row[0], row[1], {})
+            if row[2] is not None:
+                games[row[0]].variables[row[2]] = row[3]
+        return list(games.values())
+
+    @classmethod
+    def get_all(cls, db):
+        query = cls.select_with_variables + "ORDER BY games.name;"
+        results = model_cache.get(cls.cache_namespace, None, lambda: db.fetch_results(query))
+        return cls.from_rows(db, results)
 
     @classmethod
     def get(cls, db, name):
-        query = "SELECT name, rules FROM games WHERE name = %s;"
-        result = db.fetch_results(query, (name,))
-        if result:
-            row = result[0]
-            variables = cls.get_variables(db, row[0])
-            return cls(db, row[0], row[1], variables)
-        return None
+        query = cls.select_with_variables + "WHERE games.name = %s;"
+        result = model_cache.get(cls.cache_namespace, name, lambda: db.fetch_results(query, (name,)))
+        games = cls.from_rows(db, result)
+        return games[0] if games else None
 
     @classmethod
     def get_variables(cls, db, game_name):
@@ -42,6 +54,7 @@ class GameModel:
         """
         self.db.execute_query(query, (self.name, self.rules))
         self.save_variables()
+        model_cache.invalidate(self.cache_namespace)
 
     def save_variables(self):
         delete_query = "DELETE FROM game_variables WHERE game_name = %s;"
@@ -53,12 +66,15 @@ class GameModel:
         """
         for name, value in self.variables.items():
             self.db.execute_query(insert_query, (self.name, name, value))
+        model_cache.invalidate(self.cache_namespace)
 
     def delete(self):
         self.delete_variables()
         query = "DELETE FROM games WHERE name = %s;"
         self.db.execute_query(query, (self.name,))
+        model_cache.invalidate(self.cache_namespace)
 
     def delete_variables(self):
         query = "DELETE FROM game_variables WHERE game_name = %s;"
         self.db.execute_query(query, (self.name,))
+        model_cache.invalidate(self.cache_namespace)
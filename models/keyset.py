@@ -0,0 +1,86 @@
+from datetime import datetime
+
+
+class KeysetPage:
+    """One page of rows, newest first, with the cursors of the pages either side of it."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor  # older rows, pass as after
+        self.prev_cursor = prev_cursor  # newer rows, pass as before
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class Keyset:
+    """
+    Cursor pagination over rows ordered newest first by a time column, ties broken by a unique key column.
+    A page starts right after the row its cursor points at, so reading page 1000 costs the same as page 1 when
+    an index covers the filter columns followed by the time column, instead of scanning every row before an OFFSET.
+    Cursors are "<time in iso format>~<key>" strings so they can be passed in urls.
+    """
+
+    separator = "~"
+
+    def __init__(self, time_column, key_column, key_type=str):
+        self.time_column = time_column
+        self.key_column = key_column
+        self.key_type = key_type
+
+    def encode_cursor(self, time_value, key):
+        return f"{time_value.isoformat()}{self.separator}{key}"
+
+    def decode_cursor(self, cursor):
+        """Return (time, key) for a cursor, raises ValueError for one that wasn't made by encode_cursor."""
+        time_value, separator, key = cursor.partition(self.separator)
+        if not separator:
+            raise ValueError(f"invalid cursor {cursor}")
+        return datetime.fromisoformat(time_value), self.key_type(key)
+
+    def condition(self, cursor, newer=False):
+        """SQL to add to a WHERE clause for the rows after (older than) the cursor, or before it when newer."""
+        if not cursor:
+            return "", ()
+
+        time_value, key = self.decode_cursor(cursor)
+        operator = ">" if newer else "<"
+        # spelled out instead of a row comparison so MySQL uses a range on the index
+        return (f" AND ({self.time_column} {operator} %s OR ({self.time_column} = %s AND {self.key_column} {operator} %s))",
+                (time_value, time_value, key))
+
+    def order_by(self, newer=False):
+        direction = "ASC" if newer else "DESC"
+        return f" ORDER BY {self.time_column} {direction}, {self.key_column} {direction}"
+
+    def fetch(self, db, select, where, params, per_page, get_cursor, after=None, before=None):
+        """
+        Fetch a page of rows for select ... WHERE where, the page after the cursor after or before the cursor
+        before, the newest page when neither is given. get_cursor(row) returns the (time, key) of a row.
+        """
+        newer = bool(before)
+        condition, condition_params = self.condition(before if newer else after, newer)
+
+        query = select + "WHERE " + where + condition + self.order_by(newer) + " LIMIT %s;"
+        rows = db.fetch_results(query, tuple(params) + condition_params + (per_page + 1,))
+
+        # one extra row tells whether there is another page in the direction we are reading
+        more = len(rows) > per_page
+        rows = list(rows[:per_page])
+        if newer:
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage([])
+
+        has_older = True if newer else more
+        has_newer = more if newer else bool(after)
+
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(*get_cursor(rows[-1])) if has_older else None,
+            prev_cursor=self.encode_cursor(*get_cursor(rows[0])) if has_newer else None
+        )
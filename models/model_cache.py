@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import Counter
+
+
+class ModelCache:
+    """
+    Read-through cache for rows that rarely change while a show runs: agents, games and their variables, voice
+    metadata and session players. Entries are grouped by table in namespaces; a model's save() and delete()
+    invalidate its namespace, and every entry expires after ttl seconds in case another process changed the
+    database. Rows are cached rather than models so callers can change the models they get back without
+    changing the cache. Empty results are not cached, Database.fetch_results returns [] when a query fails and
+    a failed query must not hide the rows until the entry expires. A ttl of 0 turns caching off.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}  # (namespace, key) -> (expires, rows)
+        self.generations = Counter()  # namespace -> invalidation count, stops loads that raced one being stored
+
+        # monitoring
+        self.hits = Counter()
+        self.misses = Counter()
+        self.invalidations = Counter()
+
+    def get(self, namespace, key, load):
+        """Return the cached rows for key, calling load() for them on a miss or once they have expired."""
+        if not self.ttl:
+            return load()
+
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get((namespace, key))
+            if entry and entry[0] > now:
+                self.hits[namespace] += 1
+                return entry[1]
+            self.misses[namespace] += 1
+            generation = self.generations[namespace]
+
+        rows = load()
+        if not rows:
+            return rows
+
+        with self.lock:
+            if self.generations[namespace] == generation:
+                self.entries[(namespace, key)] = (now + self.ttl, rows)
+
+        return rows
+
+    def invalidate(self, namespace, key=None):
+        """Drop one entry, or every entry in the namespace when key is None."""
+        with self.lock:
+            self.generations[namespace] += 1
+            self.invalidations[namespace] += 1
+            if key is None:
+                for cached in [cached for cached in self.entries if cached[0] == namespace]:
+                    del self.entries[cached]
+            else:
+                self.entries.pop((namespace, key), None)
+
+    def clear(self):
+        with self.lock:
+            # every load in flight counted a miss in its namespace
+            for namespace in self.misses:
+                self.generations[namespace] += 1
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            namespaces = sorted(set(self.hits) | set(self.misses) | set(self.invalidations))
+            return {
+                "ttl": self.ttl,
+                "entries": len(self.entries),
+                "namespaces": {
+                    namespace: {
+                        "hits": self.hits[namespace],
+                        "misses": self.misses[namespace],
+                        "invalidations": self.invalidations[namespace]
+                    }
+                    for namespace in namespaces
+                }
+            }
+
+
+# shared by every model in the process, like the database connection pool
+model_cache = ModelCache()
@@ -0,0 +1,79 @@
+import hashlib
+
+
+class PageContentModel:
+    """
+    A page body stored once for every page with the same content, in any session and under any url.
+    The summary written for the content is shared by all of those pages.
+    """
+
+    def __init__(self, db, content_hash, body=None, summary=None):
+        self.db = db
+        self.content_hash = content_hash
+        self.body = body
+        self.summary = summary
+
+    @classmethod
+    def get_content_hash(cls, body):
+        return hashlib.sha256(body.encode()).hexdigest()
+
+    @classmethod
+    def get(cls, db, content_hash):
+        query = "SELECT content_hash, body, summary FROM page_contents WHERE content_hash = %s;"
+        results = db.fetch_results(query, (content_hash,))
+        return cls(db, *results[0]) if results else None
+
+    @classmethod
+    def get_summary(cls, db, content_hash):
+        query = "SELECT summary FROM page_contents WHERE content_hash = %s;"
+        results = db.fetch_results(query, (content_hash,))
+        return results[0][0] if results else None
+
+    @classmethod
+    def set_summary(cls, db, content_hash, summary):
+        """Share a summary with the other pages that have this content, the first summary written is kept."""
+        query = "UPDATE page_contents SET summary = %s WHERE content_hash = %s AND summary IS NULL;"
+        db.execute_query(query, (summary, content_hash))
+
+    def save(self):
+        # the body never changes for a hash, an existing row only takes the summary if it has none
+        query = """
+            INSERT INTO page_contents (content_hash, body, summary)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+            summary = IFNULL(summary, VALUES(summary));
+        """
+        self.db.execute_query(query, (self.content_hash, self.body, self.summary))
+
+    @classmethod
+    def delete_unreferenced(cls, db):
+        query = """
+            DELETE FROM page_contents
+            WHERE NOT EXISTS (SELECT 1 FROM pages WHERE pages.content_hash = page_contents.content_hash);
+        """
+        db.execute_query(query)
+
+    @classmethod
+    def get_dedup_report(cls, db):
+        """How many loaded pages share content and the body bytes saved by storing each body once."""
+        query = """
+            SELECT COUNT(*), COUNT(DISTINCT pages.content_hash), COALESCE(SUM(LENGTH(page_contents.body)), 0),
+                   COUNT(DISTINCT pages.session_id)
+            FROM pages JOIN page_contents ON page_contents.content_hash = pages.content_hash;
+        """
+        pages, contents, page_bytes, sessions = db.fetch_results(query)[0]
+
+        query = "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0), COUNT(summary) FROM page_contents;"
+        stored, stored_bytes, summaries = db.fetch_results(query)[0]
+
+        return {
+            "pages": pages,
+            "sessions": sessions,
+            "unique_contents": contents,
+            "dedup_ratio": round(pages / contents, 3) if contents else 0.0,
+            "body_bytes_per_page": int(page_bytes),
+            "body_bytes_stored": int(stored_bytes),
+            "bytes_saved": int(page_bytes) - int(stored_bytes),
+            "stored_contents": stored,
+            "shared_summaries": summaries
+        }
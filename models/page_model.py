@@ -1,14 +1,34 @@
 import hashlib
 
+from models.keyset import Keyset
+from models.page_content_model import PageContentModel
+
 
 class PageModel:
+    # every column a page can be loaded with, in constructor order
+    columns = ("session_id", "url", "title", "body", "summary", "parent_url_hash",
+               "search_term", "search_rank", "last_loaded", "last_opened", "created_at", "content_hash")
+
+    # list views skip the page body, it is loaded on first access
+    lite_columns = tuple(column for column in columns if column != "body")
+
+    # projections used to fill prompts, they always include session_id and url
+    link_columns = ("session_id", "url", "title")
+    summary_columns = ("session_id", "url", "title", "summary")
+    search_columns = ("session_id", "url", "title", "search_term", "search_rank")
+
+    keyset = Keyset("pages.created_at", "pages.url_hash")
+
     def __init__(self, db, session_id, url, title=None, body=None, summary=None, parent_url_hash=None,
-                 search_term=None, search_rank=None, last_loaded=None, last_opened=None, created_at=None):
+                 search_term=None, search_rank=None, last_loaded=None, last_opened=None, created_at=None,
+                 content_hash=None):
         self.db = db
         self.url = url
         self.session_id = session_id
         self.title = title
-        self.body = body
+        self._body = body
+        self.body_loaded = True
+        self.loaded_columns = self.columns
         self.summary = summary
         self.parent_url_hash = parent_url_hash
         self.search_term = search_term
@@ -16,6 +36,47 @@ class PageModel:
         self.last_loaded = last_loaded
         self.last_opened = last_opened
         self.created_at = created_at
+        self.content_hash = content_hash  # the body is stored once in page_contents under this hash
+
+    @property
+    def body(self):
+        if not self.body_loaded:
+            self._body = self.load_body()
+            self.body_loaded = True
+        return self._body
+
+    @body.setter
+    def body(self, body):
+        self._body = body
+        self.body_loaded = True
+
+    def load_body(self):
+        query = ("SELECT IFNULL(page_contents.body, pages.body) FROM pages "
+                 "LEFT JOIN page_contents ON page_contents.content_hash = pages.content_hash "
+                 "WHERE url_hash = %s AND session_id = %s;")
+        results = self.db.fetch_results(query, (PageModel.get_url_hash(self.url), self.session_id))
+        return results[0][0] if results else None
+
+    @classmethod
+    def select(cls, columns):
+        if "body" not in columns:
+            return "SELECT " + ", ".join(columns) + " FROM pages "
+
+        # shared bodies live in page_contents, pages.body only holds the empty body of an error page
+        expressions = ["IFNULL(page_contents.body, pages.body)" if column == "body" else f"pages.{column}"
+                       for column in columns]
+        return ("SELECT " + ", ".join(expressions) + " FROM pages "
+                "LEFT JOIN page_contents ON page_contents.content_hash = pages.content_hash ")
+
+    @classmethod
+    def from_rows(cls, db, columns, results):
+        pages = []
+        for row in results:
+            page = cls(db, **dict(zip(columns, row)))
+            page.loaded_columns = columns
+            page.body_loaded = "body" in columns
+            pages.append(page)
+        return pages
 
     @classmethod
     def get_url_hash(cls, url):
@@ -24,15 +85,12 @@ class PageModel:
     @classmethod
     def get_by_url(cls, db, url, session_id):
         url_hash = PageModel.get_url_hash(url)
-        query = ("SELECT session_id, url, title, body, summary, parent_url_hash, "
-                 "search_term, search_rank, last_loaded, last_opened, created_at "
-                 "FROM pages WHERE url_hash = %s AND session_id = %s;")
+        query = cls.select(cls.columns) + "WHERE url_hash = %s AND session_id = %s;"
         results = db.fetch_results(query, (url_hash, session_id))
 
         # If the page is found, return it
         if results:
-            row = results[0]
-            return cls(db, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9])
+            return cls.from_rows(db, cls.columns, results)[0]
 
         # If no page is found, create a new PageModel object
         if url:
@@ -55,88 +113,157 @@ class PageModel:
         return None
 
     @classmethod
-    def get_by_parent_url(cls, db, parent_url, session_id, max_results=10):
+    def get_by_parent_url(cls, db, parent_url, session_id, max_results=10, columns=None):
         parent_url_hash = PageModel.get_url_hash(parent_url)
-        query = ("SELECT session_id, url, title, body, summary, parent_url_hash, "
-                 "search_term, search_rank, last_loaded, last_opened, created_at "
-                 "FROM pages WHERE parent_url_hash = %s AND session_id = %s "
+        columns = columns or cls.lite_columns
+        query = (cls.select(columns) +
+                 "WHERE parent_url_hash = %s AND session_id = %s "
                  "ORDER BY created_at DESC LIMIT %s;")
         results = db.fetch_results(query, (parent_url_hash, session_id, max_results))
-        return [cls(db, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9]) for row in results]
+        return cls.from_rows(db, columns, results)
 
 
     @classmethod
-    def get_by_not_parent_url(cls, db, parent_url, session_id, max_results=10):
+    def get_by_not_parent_url(cls, db, parent_url, session_id, max_results=10, columns=None):
         parent_url_hash = PageModel.get_url_hash(parent_url)
-        query = ("SELECT session_id, url, title, body, summary, parent_url_hash, "
-                 "search_term, search_rank, last_loaded, last_opened, created_at "
-                 "FROM pages WHERE NOT is_summary_null AND (parent_url_hash IS NULL OR NOT parent_url_hash = %s) AND session_id = %s "
+        columns = columns or cls.lite_columns
+        query = (cls.select(columns) +
+                 "WHERE NOT is_summary_null AND (parent_url_hash IS NULL OR NOT parent_url_hash = %s) AND session_id = %s "
                  "ORDER BY created_at DESC LIMIT %s;")
         results = db.fetch_results(query, (parent_url_hash, session_id, max_results))
-        return [cls(db, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9]) for row in results]
+        return cls.from_rows(db, columns, results)
 
     @classmethod
-    def get_by_search_term(cls, db, search_term, session_id, max_results=10):
-        query = ("SELECT session_id, url, title, body, summary, parent_url_hash, "
-                 "search_term, search_rank, last_loaded, last_opened, created_at "
-                 "FROM pages WHERE search_term = %s AND session_id = %s "
+    def get_by_search_term(cls, db, search_term, session_id, max_results=10, columns=None):
+        columns = columns or cls.lite_columns
+        query = (cls.select(columns) +
+                 "WHERE search_term = %s AND session_id = %s "
                  "ORDER BY created_at DESC LIMIT %s;")
         results = db.fetch_results(query, (search_term, session_id, max_results))
-        return [cls(db, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9]) for row in results]
+        return cls.from_rows(db, columns, results)
 
     @classmethod
-    def get_search_results(cls, db, session_id, max_results=10):
-        query = ("SELECT session_id, url, title, body, summary, parent_url_hash, "
-                 "search_term, search_rank, last_loaded, last_opened, created_at "
-                 "FROM pages WHERE is_body_null AND search_term IS NOT NULL AND session_id = %s "
+    def get_search_results(cls, db, session_id, max_results=10, columns=None):
+        columns = columns or cls.lite_columns
+        query = (cls.select(columns) +
+                 "WHERE is_body_null AND search_term IS NOT NULL AND session_id = %s "
                  "ORDER BY created_at DESC LIMIT %s;")
         results = db.fetch_results(query, (session_id, max_results))
-        return [cls(db, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9]) for row in results]
+        return cls.from_rows(db, columns, results)
 
     @classmethod
-    def get_unsummarized_pages(cls, db, session_id, max_results=1):
-        query = ("SELECT session_id, url, title, body, summary, parent_url_hash, "
-                 "search_term, search_rank, last_loaded, last_opened, created_at "
-                 "FROM pages WHERE is_summary_null AND session_id = %s ORDER BY created_at DESC LIMIT %s;")
-        results = db.fetch_results(query, (session_id, max_results))
-        return [cls(db, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9]) for row in results]
+    def get_unsummarized_pages(cls, db, session_id, max_results=1, columns=None, exclude_urls=()):
+        columns = columns or cls.columns
+        exclude = ""
+        if exclude_urls:
+            exclude = " AND pages.url_hash NOT IN (" + ", ".join(["%s"] * len(exclude_urls)) + ")"
+        query = (cls.select(columns) +
+                 "WHERE is_summary_null AND NOT is_body_null AND session_id = %s" + exclude +
+                 " ORDER BY created_at DESC LIMIT %s;")
+        params = (session_id,) + tuple(cls.get_url_hash(url) for url in exclude_urls) + (max_results,)
+        results = db.fetch_results(query, params)
+        return cls.from_rows(db, columns, results)
 
     @classmethod
-    def get_unloaded_pages(cls, db, session_id, max_results=100):
-        query = ("SELECT session_id, url, title, body, summary, parent_url_hash, "
-                 "search_term, search_rank, last_loaded, last_opened, created_at "
-                 "FROM pages WHERE is_body_null AND session_id = %s ORDER BY created_at DESC LIMIT %s;")
+    def get_unloaded_pages(cls, db, session_id, max_results=100, columns=None):
+        columns = columns or cls.lite_columns
+        query = (cls.select(columns) +
+                 "WHERE is_body_null AND session_id = %s ORDER BY created_at DESC LIMIT %s;")
         results = db.fetch_results(query, (session_id, max_results))
-        return [cls(db, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9]) for row in results]
+        return cls.from_rows(db, columns, results)
 
     @classmethod
-    def get_by_session_id(cls, db, session_id):
-        query = ("SELECT session_id, url, title, body, summary, parent_url_hash, "
-                 "search_term, search_rank, last_loaded, last_opened, created_at "
-                 "FROM pages WHERE session_id = %s ORDER BY created_at DESC;")
+    def get_by_session_id(cls, db, session_id, columns=None):
+        columns = columns or cls.lite_columns
+        query = (cls.select(columns) +
+                 "WHERE session_id = %s ORDER BY created_at DESC;")
         results = db.fetch_results(query, (session_id, ))
-        return [cls(db, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9]) for row in results]
+        return cls.from_rows(db, columns, results)
 
 
     def save(self):
         if not self.url or not self.session_id:
             raise ValueError("url and session_id are required to save a page.")
 
+        missing = [column for column in self.columns
+                   if column not in self.loaded_columns and column not in ("body", "created_at", "content_hash")]
+        if missing:
+            raise ValueError(f"page {self.url} was loaded without {missing} and can't be saved.")
+
         url_hash = PageModel.get_url_hash(self.url)
+        body = self.store_content()
 
         query = ("""
-            INSERT INTO pages (url_hash, session_id, url, title, body, summary, parent_url_hash, 
+            INSERT INTO pages (url_hash, session_id, url, title, body, summary, content_hash, parent_url_hash, 
                                search_term, search_rank, last_loaded, last_opened)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             ON DUPLICATE KEY UPDATE
             url = VALUES(url), title = VALUES(title), body = VALUES(body), summary = VALUES(summary), 
-            parent_url_hash = VALUES(parent_url_hash), search_term = VALUES(search_term), 
-            search_rank = VALUES(search_rank), last_loaded = VALUES(last_loaded), last_opened = VALUES(last_opened);
+            content_hash = VALUES(content_hash), parent_url_hash = VALUES(parent_url_hash), 
+            search_term = VALUES(search_term), search_rank = VALUES(search_rank), 
+            last_loaded = VALUES(last_loaded), last_opened = VALUES(last_opened);
         """)
-        self.db.execute_query(query, (url_hash, self.session_id, self.url, self.title, self.body, self.summary,
-                                      self.parent_url_hash, self.search_term, self.search_rank,
+        self.db.execute_query(query, (url_hash, self.session_id, self.url, self.title, body, self.summary,
+                                      self.content_hash, self.parent_url_hash, self.search_term, self.search_rank,
                                       self.last_loaded, self.last_opened))
 
+    def store_content(self):
+        """
+        Store the body in page_contents and share the summary with the other pages that have the same content.
+        Returns the body to keep in pages, only an empty or missing body is kept there.
+        """
+        body = self.body
+        if not body:
+            self.content_hash = None
+            return body
+
+        content_hash = PageContentModel.get_content_hash(body)
+        if content_hash != self.content_hash:
+            PageContentModel(self.db, content_hash, body, self.summary).save()
+            self.content_hash = content_hash
+        elif self.summary:
+            PageContentModel.set_summary(self.db, content_hash, self.summary)
+
+        if not self.summary:
+            # summarized before, in another session or under another url
+            self.summary = PageContentModel.get_summary(self.db, content_hash)
+
+        return None
+
+    @classmethod
+    def bulk_upsert_links(cls, db, session_id, parent_url, links, max_title_length=500, max_url_length=2048):
+        """
+        Record the links discovered on a page in one batch.
+        Links are dicts with an absolute "href" and the link "text". Existing pages keep their title and
+        parent, only pages that have no title yet are given the link text and parent_url.
+        """
+        parent_url_hash = PageModel.get_url_hash(parent_url)
+
+        rows = {}
+        for link in links:
+            url = link["href"]
+            if not url or len(url) > max_url_length:
+                continue
+
+            url_hash = PageModel.get_url_hash(url)
+            title = (link["text"] or "")[:max_title_length] or None
+
+            # keep the first link text found for each url, unless it was empty
+            if url_hash not in rows or (title and not rows[url_hash][3]):
+                rows[url_hash] = (url_hash, session_id, url, title, parent_url_hash)
+
+        # parent_url_hash is assigned before title because MySQL applies the updates left to right
+        query = ("""
+            INSERT INTO pages (url_hash, session_id, url, title, parent_url_hash)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+            parent_url_hash = IF(title IS NULL, VALUES(parent_url_hash), parent_url_hash),
+            title = IFNULL(title, VALUES(title));
+        """)
+        db.execute_many(query, rows.values())
+
+        return len(rows)
+
     def delete(self):
         if not self.url or not self.session_id:
             raise ValueError("url and session_id are required to delete a page.")
@@ -148,26 +275,46 @@ class PageModel:
     def delete_by_session_id(cls, db, session_id):
         query = "DELETE FROM pages WHERE session_id = %s;"
         db.execute_query(query, (session_id, ))
+        PageContentModel.delete_unreferenced(db)
 
     @classmethod
-    def get_summarized(cls, db, session_id, page, per_page):
+    def get_summarized(cls, db, session_id, page, per_page, columns=None):
         """Retrieve paginated page entries."""
         offset = (page - 1) * per_page
-        query = ("SELECT session_id, url, title, body, summary, parent_url_hash, "
-                 "search_term, search_rank, last_loaded, last_opened, created_at "
-                 "FROM pages WHERE NOT is_summary_null AND session_id = %s ORDER BY created_at DESC LIMIT %s OFFSET %s;")
+        columns = columns or cls.lite_columns
+        query = (cls.select(columns) +
+                 "WHERE NOT is_summary_null AND session_id = %s ORDER BY created_at DESC LIMIT %s OFFSET %s;")
         results = db.fetch_results(query, (session_id, per_page, offset))
-        return [cls(db, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9]) for row in results]
+        return cls.from_rows(db, columns, results)
+
+    @classmethod
+    def get_page(cls, db, session_id, per_page, after=None, before=None, columns=None, summarized=False):
+        """
+        Retrieve a page of page entries, newest first, after or before a cursor from an earlier page.
+        Returns a KeysetPage of pages, columns must include url and created_at.
+        """
+        columns = columns or cls.lite_columns
+        where = "pages.session_id = %s"
+        if summarized:
+            where += " AND NOT pages.is_summary_null"
+
+        url_index = columns.index("url")
+        created_index = columns.index("created_at")
+
+        page = cls.keyset.fetch(db, cls.select(columns), where, (session_id,), per_page,
+                                lambda row: (row[created_index], cls.get_url_hash(row[url_index])), after, before)
+        page.items = cls.from_rows(db, columns, page.items)
+        return page
 
     @classmethod
-    def get_paginated(cls, db, session_id, page, per_page):
+    def get_paginated(cls, db, session_id, page, per_page, columns=None):
         """Retrieve paginated page entries."""
         offset = (page - 1) * per_page
-        query = ("SELECT session_id, url, title, body, summary, parent_url_hash, "
-                 "search_term, search_rank, last_loaded, last_opened, created_at "
-                 "FROM pages WHERE session_id = %s ORDER BY created_at DESC LIMIT %s OFFSET %s;")
+        columns = columns or cls.lite_columns
+        query = (cls.select(columns) +
+                 "WHERE session_id = %s ORDER BY created_at DESC LIMIT %s OFFSET %s;")
         results = db.fetch_results(query, (session_id, per_page, offset))
-        return [cls(db, row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9]) for row in results]
+        return cls.from_rows(db, columns, results)
 
     @classmethod
     def get_total_count(cls, db, session_id):
@@ -1,4 +1,9 @@
+from models.keyset import Keyset
+
+
 class SessionHistoryModel:
+    keyset = Keyset("timestamp", "id", int)
+
     def __init__(self, db, id, session_id, role, content, timestamp=None):
         self.db = db
         self.id = id
@@ -59,7 +64,8 @@ class SessionHistoryModel:
             INSERT INTO session_history (session_id, role, content)
             VALUES (%s, %s, %s);
             """
-            self.id = self.db.execute_query(insert_query, (self.session_id, self.role, self.content))
+            self.id = self.db.execute_query(insert_query, (self.session_id, self.role, self.content),
+                                            return_last_insert_id=True)
         else:
             # Omit timestamp to use the default CURRENT_TIMESTAMP
             insert_query = """
@@ -70,11 +76,38 @@ class SessionHistoryModel:
             """
             self.db.execute_query(insert_query, (self.id, self.session_id, self.role, self.content))
 
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "session_id": self.session_id,
+            "role": self.role,
+            "content": self.content,
+            "timestamp": str(self.timestamp) if self.timestamp else None
+        }
+
     def delete(self):
         if self.id:
             query = "DELETE FROM session_history WHERE id = %s;"
             self.db.execute_query(query, (self.id,))
 
+    @classmethod
+    def get_page_by_session_id(cls, db, session_id, per_page, after=None, before=None, role=None):
+        """
+        Retrieve a page of session history entries, newest first, after or before a cursor from an earlier page.
+        Returns a KeysetPage of entries.
+        """
+        where = "session_id = %s"
+        params = (session_id,)
+        if role:
+            where += " AND role = %s"
+            params += (role,)
+
+        page = cls.keyset.fetch(db,
+                                "SELECT id, session_id, role, content, timestamp FROM session_history ",
+                                where, params, per_page, lambda row: (row[4], row[0]), after, before)
+        page.items = [cls(db, row[0], row[1], row[2], row[3], row[4]) for row in page.items]
+        return page
+
     @classmethod
     def get_paginated_by_session_id(cls, db, session_id, page, per_page):
         """Retrieve paginated session history entries."""
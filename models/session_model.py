@@ -6,58 +6,60 @@ from models.session_transcript_model import SessionTranscriptModel
 
 
 class SessionModel:
-    def __init__(self, db, id=None, name=None, game=None, judge=None, summary=None):
+    def __init__(self, db, id=None, name=None, game=None, judge=None, summary=None, target_buffer=None):
         self.db = db
         self.id = id
         self.name = name
         self.game = game
         self.judge = judge
         self.summary = summary
+        self.target_buffer = target_buffer  # seconds of airtime to keep queued, None uses the configured default
 
 
     @classmethod
     def get_all(cls, db):
-        query = "SELECT id, name, game, judge, summary FROM sessions;"
+        query = "SELECT id, name, game, judge, summary, target_buffer FROM sessions;"
         results = db.fetch_results(query)
         sessions = []
         for row in results:
-            sessions.append(cls(db, row[0], row[1], row[2], row[3], row[4]))
+            sessions.append(cls(db, row[0], row[1], row[2], row[3], row[4], row[5]))
         return sessions
 
     @classmethod
     def get(cls, db, id):
-        query = "SELECT id, name, game, judge, summary FROM sessions WHERE id = %s;"
+        query = "SELECT id, name, game, judge, summary, target_buffer FROM sessions WHERE id = %s;"
         result = db.fetch_results(query, (id,))
         if result:
             row = result[0]
-            return cls(db, row[0], row[1], row[2], row[3], row[4])
+            return cls(db, row[0], row[1], row[2], row[3], row[4], row[5])
         return None
 
     def save(self):
         if self.id:
             # Update an existing session
             query = """
-            INSERT INTO sessions (id, name, game, judge, summary)
-            VALUES (%s, %s, %s, %s, %s)
+            INSERT INTO sessions (id, name, game, judge, summary, target_buffer)
+            VALUES (%s, %s, %s, %s, %s, %s)
             ON DUPLICATE KEY UPDATE
             name = VALUES(name),
             game = VALUES(game),
             judge = VALUES(judge),
-            summary = VALUES(summary);
+            summary = VALUES(summary),
+            target_buffer = VALUES(target_buffer);
             """
             self.db.execute_query(
                 query,
-                (self.id, self.name, self.game, self.judge, self.summary)
+                (self.id, self.name, self.game, self.judge, self.summary, self.target_buffer)
             )
         else:
             # Insert a new session and retrieve the auto-incremented id
             query = """
-            INSERT INTO sessions (name, game, judge, summary)
-            VALUES (%s, %s, %s, %s);
+            INSERT INTO sessions (name, game, judge, summary, target_buffer)
+            VALUES (%s, %s, %s, %s, %s);
             """
             self.id = self.db.execute_query(
                 query,
-                (self.name, self.game, self.judge, self.summary),
+                (self.name, self.game, self.judge, self.summary, self.target_buffer),
                 return_last_insert_id=True
             )
 
@@ -73,5 +75,4 @@ class SessionModel:
             self.db.execute_query(query, (self.id,))
 
     def delete_players(self):
-        query = "DELETE FROM session_players WHERE session_id = %s;"
-        self.db.execute_query(query, (self.id,))
+        SessionPlayerModel.delete_by_session_id(self.db, self.id)
@@ -1,4 +1,9 @@
+from models.model_cache import model_cache
+
+
 class SessionPlayerModel:
+    cache_namespace = "session_players"
+
     def __init__(self, db, session_id, turn_order, player, voice=None):
         self.db = db
         self.session_id = session_id
@@ -18,12 +23,14 @@ class SessionPlayerModel:
             query,
             (self.session_id, self.turn_order, self.player, self.voice)
         )
+        model_cache.invalidate(self.cache_namespace)
 
     @classmethod
     def get_by_session_id(cls, db, session_id):
         """Retrieve all players for a specific session_id."""
         query = "SELECT turn_order, player, voice FROM session_players WHERE session_id = %s ORDER BY turn_order;"
-        results = db.fetch_results(query, (session_id,))
+        # keyed as a string, session ids come from urls and forms as well as from the database
+        results = model_cache.get(cls.cache_namespace, str(session_id), lambda: db.fetch_results(query, (session_id,)))
         return [cls(db, session_id, row[0], row[1], row[2]) for row in results]
 
     @classmethod
@@ -42,8 +49,10 @@ class SessionPlayerModel:
         """Delete all players for a given session_id."""
         query = "DELETE FROM session_players WHERE session_id = %s;"
         db.execute_query(query, (session_id,))
+        model_cache.invalidate(cls.cache_namespace)
 
     def delete(self):
         """Delete a specific player by session_id and turn_order."""
         query = "DELETE FROM session_players WHERE session_id = %s and turn_order = %s;"
         self.db.execute_query(query, (self.session_id, self.turn_order))
+        model_cache.invalidate(self.cache_namespace)
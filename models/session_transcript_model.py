@@ -1,4 +1,9 @@
+from models.keyset import Keyset
+
+
 class SessionTranscriptModel:
+    keyset = Keyset("timestamp", "id", int)
+
     def __init__(self, db, id, session_id, agent, url, content, timestamp=None):
         self.db = db
         self.id = id
@@ -17,6 +22,20 @@ class SessionTranscriptModel:
             transcripts.append(cls(db, row[0], row[1], row[2], row[3], row[4], row[5]))
         return transcripts
 
+    @classmethod
+    def get_page(cls, db, per_page, after=None, before=None, session_id=None):
+        """
+        Retrieve a page of transcripts, newest first, for one session or all of them, after or before a cursor
+        from an earlier page. Returns a KeysetPage of transcripts.
+        """
+        where, params = ("session_id = %s", (session_id,)) if session_id else ("TRUE", ())
+
+        page = cls.keyset.fetch(db,
+                                "SELECT id, session_id, agent, url, content, timestamp FROM transcripts ",
+                                where, params, per_page, lambda row: (row[5], row[0]), after, before)
+        page.items = [cls(db, row[0], row[1], row[2], row[3], row[4], row[5]) for row in page.items]
+        return page
+
     @classmethod
     def get(cls, db, id):
         query = "SELECT id, session_id, agent, url, content, timestamp FROM transcripts WHERE id = %s;"
@@ -27,34 +46,30 @@ class SessionTranscriptModel:
         return None
 
     @classmethod
-    def get_new_transcripts_since(cls, db, timestamp):
-        """Retrieve all transcripts created after a specific timestamp."""
+    def get_new_transcripts_after_id(cls, db, transcript_id, session_id=None):
+        """Retrieve the transcripts added after transcript_id, optionally for one session."""
         query = """
         SELECT id, session_id, agent, url, content, timestamp
         FROM transcripts
-        WHERE timestamp > %s
-        ORDER BY timestamp;
+        WHERE id > %s
         """
-        results = db.fetch_results(query, (timestamp,))
+        params = (transcript_id,)
+        if session_id:
+            query += " AND session_id = %s"
+            params += (session_id,)
+        query += " ORDER BY id;"
+
+        results = db.fetch_results(query, params)
         transcripts = []
         for row in results:
             transcripts.append(cls(db, row[0], row[1], row[2], row[3], row[4], row[5]))
         return transcripts
 
     @classmethod
-    def get_new_session_transcripts_since(cls, db, session, timestamp):
-        """Retrieve all transcripts created after a specific timestamp."""
-        query = """
-        SELECT id, session_id, agent, url, content, timestamp
-        FROM transcripts
-        WHERE session_id = %s and timestamp > %s
-        ORDER BY timestamp;
-        """
-        results = db.fetch_results(query, (session, timestamp,))
-        transcripts = []
-        for row in results:
-            transcripts.append(cls(db, row[0], row[1], row[2], row[3], row[4], row[5]))
-        return transcripts
+    def get_max_id(cls, db):
+        query = "SELECT MAX(id) FROM transcripts;"
+        result = db.fetch_results(query)
+        return (result[0][0] or 0) if result else 0
 
     @classmethod
     def get_by_session_id(cls, db, session_id):
@@ -95,6 +110,16 @@ class SessionTranscriptModel:
                 return_last_insert_id=True
             )
 
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "session_id": self.session_id,
+            "agent": self.agent,
+            "url": self.url,
+            "content": self.content,
+            "timestamp": str(self.timestamp) if self.timestamp else None
+        }
+
     def delete(self):
         if self.id:
             query = "DELETE FROM transcripts WHERE id = %s;"
@@ -0,0 +1,36 @@
+-- Store each page body once in page_contents, keyed by the hash of the body, and share summaries between
+-- every page with the same content across sessions and urls.
+
+CREATE TABLE IF NOT EXISTS page_contents (
+    content_hash CHAR(64) NOT NULL,
+    body TEXT NOT NULL,
+    summary TEXT DEFAULT NULL,
+    stored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (content_hash)
+);
+
+ALTER TABLE pages ADD COLUMN content_hash CHAR(64) DEFAULT NULL AFTER summary;
+
+CREATE INDEX idx_pages_content_hash ON pages(content_hash);
+
+-- one row per distinct body, keeping any summary one of its pages already has
+INSERT IGNORE INTO page_contents (content_hash, body, summary)
+SELECT SHA2(body, 256), ANY_VALUE(body), MAX(summary)
+FROM pages
+WHERE body IS NOT NULL AND body <> ''
+GROUP BY SHA2(body, 256);
+
+UPDATE pages SET content_hash = SHA2(body, 256) WHERE body IS NOT NULL AND body <> '';
+
+UPDATE pages JOIN page_contents ON page_contents.content_hash = pages.content_hash
+SET pages.summary = page_contents.summary
+WHERE pages.summary IS NULL;
+
+-- a page is loaded once it has a body of its own (error pages keep an empty one) or shared content
+DROP INDEX idx_pages_body_null ON pages;
+
+ALTER TABLE pages MODIFY COLUMN is_body_null BOOLEAN GENERATED ALWAYS AS (body IS NULL AND content_hash IS NULL);
+
+CREATE INDEX idx_pages_body_null ON pages(is_body_null);
+
+UPDATE pages SET body = NULL WHERE content_hash IS NOT NULL;
@@ -0,0 +1,3 @@
+-- Seconds of airtime each session keeps queued ahead of the show, NULL uses the configured default.
+
+ALTER TABLE sessions ADD COLUMN target_buffer INT DEFAULT NULL;
@@ -0,0 +1,12 @@
+-- Indexes for keyset pagination: each filters on the session (and role) and reads rows in time order.
+-- InnoDB appends the primary key to every secondary index, which covers the id / url_hash tie breaker.
+
+CREATE INDEX idx_history_session_timestamp ON session_history (session_id, timestamp);
+
+CREATE INDEX idx_history_session_role_timestamp ON session_history (session_id, role, timestamp);
+
+CREATE INDEX idx_transcripts_session_timestamp ON transcripts (session_id, timestamp);
+
+CREATE INDEX idx_transcripts_timestamp ON transcripts (timestamp);
+
+CREATE INDEX idx_pages_session_created ON pages (session_id, created_at);
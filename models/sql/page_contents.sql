@@ -0,0 +1,8 @@
+DROP TABLE IF EXISTS page_contents;
+CREATE TABLE page_contents (
+    content_hash CHAR(64) NOT NULL,           -- Hash of the cleaned page body (SHA-256)
+    body TEXT NOT NULL,                       -- The page body, stored once for every page with this content
+    summary TEXT DEFAULT NULL,                -- AI-generated summary shared by every page with this content
+    stored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- When the content was first seen
+    PRIMARY KEY (content_hash)
+);
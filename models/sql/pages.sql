@@ -6,13 +6,14 @@ CREATE TABLE pages (
     title VARCHAR(500) DEFAULT NULL,          -- The page title, NULL if not yet loaded
     body TEXT DEFAULT NULL,                   -- The page body, NULL if not yet loaded
     summary TEXT DEFAULT NULL,                -- AI-generated summary, NULL if not yet summarized
+    content_hash CHAR(64) DEFAULT NULL,       -- Hash of the body stored in page_contents, NULL if not yet loaded
     parent_url_hash CHAR(64) DEFAULT NULL,    -- Refers to the hash of the parent URL (self-referencing foreign key)
     search_term VARCHAR(500) DEFAULT NULL,    -- The search query that resulted in this page
     search_rank INT DEFAULT NULL,             -- The rank of this page in the search results
     last_loaded TIMESTAMP DEFAULT NULL,       -- Last time the page was loaded
     last_opened TIMESTAMP DEFAULT NULL,       -- Last time the page was opened (shown to the user)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- When the page was first seen
-    is_body_null BOOLEAN GENERATED ALWAYS AS (body IS NULL),  -- Tracks if body is NULL
+    is_body_null BOOLEAN GENERATED ALWAYS AS (body IS NULL AND content_hash IS NULL),  -- Tracks if the page is not loaded
     is_summary_null BOOLEAN GENERATED ALWAYS AS (summary IS NULL),  -- Tracks if summary is NULL
     PRIMARY KEY (url_hash, session_id)       -- Composite primary key for session and page
 );
@@ -31,3 +32,9 @@ CREATE INDEX idx_pages_search ON pages(search_term);
 
 -- Index for quickly finding pages based on their parent URL hash
 CREATE INDEX idx_pages_parent_url_hash ON pages(parent_url_hash);
+
+-- Index for finding the pages that share a body in page_contents
+CREATE INDEX idx_pages_content_hash ON pages(content_hash);
+
+-- Index for keyset pagination over a session's pages in the order they were first seen
+CREATE INDEX idx_pages_session_created ON pages(session_id, created_at);
@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT NOT NULL,                     -- Number at the start of the migration file name
+    name VARCHAR(255) NOT NULL,               -- The migration file name
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- When the migration was applied
+    PRIMARY KEY (version)
+);
@@ -16,5 +16,7 @@ CREATE INDEX idx_timestamp ON session_history (timestamp);
 -- Add an index on the role column for efficient filtering
 CREATE INDEX idx_role ON session_history (role);
 
--- Add a composite index on session_id, role, and timestamp for optimized filtering and ordering
-CREATE INDEX idx_session_role_timestamp ON session_history (session_id, role, timestamp);
+-- Composite indexes on session_id (and role) and timestamp for keyset pagination in time order
+CREATE INDEX idx_history_session_timestamp ON session_history (session_id, timestamp);
+
+CREATE INDEX idx_history_session_role_timestamp ON session_history (session_id, role, timestamp);
@@ -8,4 +8,9 @@ CREATE TABLE transcripts (
     content TEXT NOT NULL,
     timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE
-);
\ No newline at end of file
+);
+
+-- Indexes for keyset pagination in time order, for one session or all of them
+CREATE INDEX idx_transcripts_session_timestamp ON transcripts (session_id, timestamp);
+
+CREATE INDEX idx_transcripts_timestamp ON transcripts (timestamp);
@@ -6,6 +6,7 @@ CREATE TABLE sessions (
     name VARCHAR(255) NOT NULL,
     game VARCHAR(255) NOT NULL,
     judge VARCHAR(255) NOT NULL,
-    summary VARCHAR(255) NOT NULL
+    summary VARCHAR(255) NOT NULL,
+    target_buffer INT DEFAULT NULL
 );
 
@@ -1,4 +1,9 @@
+from models.model_cache import model_cache
+
+
 class VoiceModel:
+    cache_namespace = "voices"
+
     def __init__(self, db, name):
         self.db = db
         self.name = name
@@ -7,7 +12,7 @@ class VoiceModel:
     @classmethod
     def get_all(cls, db):
         query = "SELECT name FROM voices;"
-        results = db.fetch_results(query)
+        results = model_cache.get(cls.cache_namespace, None, lambda: db.fetch_results(query))
         return [cls(db, row[0]) for row in results]
 
     def get_data(self):
@@ -20,6 +25,13 @@ class VoiceModel:
 
         return self.data
 
+    def get_data_hash(self):
+        """SHA-256 of the WAV data computed by the database, so the sample doesn't need to be downloaded."""
+        query = "SELECT SHA2(data, 256) FROM voices WHERE name = %s;"
+        result = model_cache.get(self.cache_namespace, ("hash", self.name),
+                                 lambda: self.db.fetch_results(query, (self.name,)))
+        return result[0][0] if result else None
+
     def save(self):
         query = """
         INSERT INTO voices (name, data)
@@ -28,8 +40,10 @@ class VoiceModel:
         data = VALUES(data);
         """
         self.db.execute_query(query, (self.name, self.data))
+        model_cache.invalidate(self.cache_namespace)
 
     def delete(self):
         query = "DELETE FROM voices WHERE name = %s;"
         self.db.execute_query(query, (self.name,))
+        model_cache.invalidate(self.cache_namespace)
 
@@ -1,7 +1,9 @@
+import threading
+
 from flask import request, render_template, redirect, url_for, Blueprint
 from flask_wtf import FlaskForm
 from wtforms.fields.choices import SelectField
-from wtforms.fields.simple import StringField, SubmitField, TextAreaField, HiddenField
+from wtforms.fields.simple import StringField, SubmitField, TextAreaField, HiddenField, BooleanField
 from wtforms.validators import DataRequired, ReadOnly, Disabled
 
 from models.agent_model import AgentModel
@@ -13,6 +15,7 @@ class AgentPage(BasePage):
     def __init__(self, app):
         super().__init__(app)
         self.blueprint = Blueprint('agent_page', __name__, template_folder='pages/templates')
+        self.max_speak_wait = 300
         self.routes()
 
     class AgentForm(FlaskForm):
@@ -40,6 +43,7 @@ class AgentPage(BasePage):
     class TestAgentForm(FlaskForm):
         session = SelectField('Session')
         prompt = TextAreaField('Prompt', render_kw={"rows": 7})
+        speak = BooleanField('Speak the response as it is generated')
         send = SubmitField('Send')
 
         def __init__(self, page):
@@ -47,6 +51,26 @@ class AgentPage(BasePage):
 
             self.session.choices = [(obj.id, obj.name) for obj in page.get_sessions()]
 
+    def speak_response(self, game_moves, agent, prompt):
+        """Stream the agent's response into the speech system and return the full text once generated."""
+        chunks = []
+        generated = threading.Event()
+
+        def record(stream):
+            try:
+                for chunk in stream:
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                generated.set()
+
+        stream = game_moves.get_response_stream(agent, prompt, exclusive=False)
+        self.app.speech().voice_say_stream(agent.voice, record(stream))
+        # give up waiting if the speech system never starts reading the stream
+        generated.wait(timeout=self.max_speak_wait)
+
+        return "".join(chunks).strip()
+
     def routes(self):
         @self.blueprint.route('/agents', methods=['GET'])
         def agents():
@@ -128,7 +152,12 @@ class AgentPage(BasePage):
             if request.method == 'POST':
                 session_id = request.form['session']
                 prompt = request.form['prompt']
-                response = GameMoves(self.app, self.get_session(session_id)).get_response(agent, prompt)
+                game_moves = GameMoves(self.app, self.get_session(session_id))
+
+                if request.form.get('speak'):
+                    response = self.speak_response(game_moves, agent, prompt)
+                else:
+                    response = game_moves.get_response(agent, prompt)
 
             return render_template('agent/agent_test.html',
                                    agent=agent,
@@ -1,10 +1,17 @@
-from flask import request, render_template, redirect, url_for, Blueprint
+import json
+
+from flask import request, render_template, redirect, url_for, Blueprint, jsonify, Response
 from flask_wtf import FlaskForm
 from wtforms.fields.simple import SubmitField, TextAreaField
 
 from pages.base_page import BasePage
 
 class IndexPage(BasePage):
+    # events streamed to the live feed on the index page
+    event_topics = ("history", "transcript", "speech", "media")
+    max_event_content = 2000
+    keep_alive_interval = 15
+
     def __init__(self, app):
         super().__init__(app)
         self.blueprint = Blueprint('index_page', __name__, template_folder='templates')
@@ -28,6 +35,9 @@ class IndexPage(BasePage):
     class StartListenerButtonForm(FlaskForm):
         start_listener_button = SubmitField('Start Voice Listener', render_kw={'class': 'btn btn-info btn-sm'})
 
+    class FocusButtonForm(FlaskForm):
+        focus_button = SubmitField('Make Current', render_kw={'class': 'btn btn-info btn-sm'})
+
     class SessionButtonForm(FlaskForm):
         session_button = SubmitField('Edit Sessions', render_kw={'class': 'btn btn-info btn-sm'})
 
@@ -35,6 +45,26 @@ class IndexPage(BasePage):
         input_text = TextAreaField('Send Text to Session', render_kw={"rows": 7})
         submit = SubmitField('Submit', render_kw={'class': 'btn btn-info btn-sm'})
 
+    def event_data(self, event):
+        data = event.data.to_dict() if hasattr(event.data, "to_dict") else dict(event.data)
+        if isinstance(data.get("content"), str) and len(data["content"]) > self.max_event_content:
+            data["content"] = data["content"][:self.max_event_content] + "..."
+        return data
+
+    def event_stream(self, subscription):
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = subscription.get(timeout=self.keep_alive_interval)
+                if event is None:
+                    # comments keep proxies from closing the connection and notice clients that have gone away
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield f"id: {event.id}\nevent: {event.topic}\ndata: {json.dumps(self.event_data(event), default=str)}\n\n"
+        finally:
+            subscription.close()
+
     def routes(self):
         # Flask pages for interacting with the AI system
         @self.blueprint.route('/')
@@ -55,12 +85,27 @@ class IndexPage(BasePage):
                 stop_transcript_form=self.StopTranscriptsButtonForm(),
                 start_session_form=self.StartButtonForm(),
                 stop_session_form=self.StopButtonForm(),
+                focus_form=self.FocusButtonForm(),
                 browser_form=self.StartBrowserButtonForm(),
                 listener_form=self.StartListenerButtonForm(),
                 session_form=self.SessionButtonForm(),
                 input_form=self.UserInputForm()
             )
 
+        @self.blueprint.route('/events', methods=['GET'])
+        def events():
+            """Server-sent events with new history, transcripts and speech and media player state."""
+            subscription = self.app.events().subscribe(*self.event_topics)
+            return Response(
+                self.event_stream(subscription),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        @self.blueprint.route('/stats', methods=['GET'])
+        def stats():
+            return jsonify(self.app.stats())
+
         @self.blueprint.route('/user_input', methods=['POST'])
         def user_input():
             self.app.game().on_user_input(
@@ -80,11 +125,21 @@ class IndexPage(BasePage):
             return redirect(url_for('index_page.index'))
 
         # Route to stop AI, browser, and speech
-        @self.blueprint.route('/stop', methods=['POST'])
+        @self.blueprint.route('/stop', methods=['GET', 'POST'])
         def stop_all():
             self.app.game().stop()
             return redirect(url_for('index_page.index'))
 
+        @self.blueprint.route('/stop/<int:session_id>', methods=['GET', 'POST'])
+        def stop_session(session_id):
+            self.app.game().stop(session_id)
+            return redirect(url_for('index_page.index'))
+
+        @self.blueprint.route('/focus/<int:session_id>', methods=['POST'])
+        def focus_session(session_id):
+            self.app.game().focus(session_id)
+            return redirect(url_for('index_page.index'))
+
         # Route to quit the application
         @self.blueprint.route('/quit', methods=['POST'])
         def quit_app():
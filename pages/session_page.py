@@ -1,8 +1,9 @@
 from flask import request, render_template, redirect, url_for, Blueprint
 from flask_wtf import FlaskForm
 from wtforms.fields.choices import SelectField
+from wtforms.fields.numeric import IntegerField
 from wtforms.fields.simple import StringField, SubmitField
-from wtforms.validators import DataRequired
+from wtforms.validators import DataRequired, NumberRange, Optional
 
 from models.session_model import SessionModel
 from pages.base_page import BasePage
@@ -20,6 +21,8 @@ class SessionPage(BasePage):
         game = SelectField('Game', validators=[DataRequired()])
         judge = SelectField('Transcript Judge', validators=[DataRequired()])
         summary = SelectField('Page Summarizer', validators=[DataRequired()])
+        target_buffer = IntegerField('Target Buffer (seconds of airtime, blank for the default, 0 for no pacing)',
+                                     validators=[Optional(), NumberRange(min=0)])
         submit = SubmitField('Save')
 
         def set_agents(self, agents):
@@ -35,6 +38,7 @@ class SessionPage(BasePage):
             self.game.data = session.game
             self.judge.data = session.judge
             self.summary.data = session.summary
+            self.target_buffer.data = session.target_buffer
 
     class DetailsButtonForm(FlaskForm):
         details_button = SubmitField('Details', render_kw={'class': 'btn btn-info btn-sm'})
@@ -55,6 +59,11 @@ class SessionPage(BasePage):
         play_button = SubmitField('Play Transcript', render_kw={'class': 'btn btn-success btn-sm'})
 
 
+    @staticmethod
+    def get_target_buffer(form):
+        value = form.get('target_buffer', '').strip()
+        return max(0, int(value)) if value else None
+
     def routes(self):
         @self.blueprint.route('/sessions', methods=['GET'])
         def sessions():
@@ -94,7 +103,9 @@ class SessionPage(BasePage):
                 prompt_replacements=prompt_replacements,
                 players=self.get_session_players(session_id),
                 settings=self.get_session_settings(session_id),
+                game_stats=self.app.game().get_session_stats(session.id),
                 start_form=self.StartButtonForm(),
+                stop_form=self.StopButtonForm(),
                 edit_form=self.EditButtonForm(),
                 player_form=self.PlayersButtonForm(),
                 history_form=self.HistoryButtonForm(),
@@ -120,7 +131,8 @@ class SessionPage(BasePage):
                     request.form['name'],
                     request.form['game'],
                     request.form['judge'],
-                    request.form['summary']
+                    request.form['summary'],
+                    self.get_target_buffer(request.form)
                 )
                 session.save()
 
@@ -139,6 +151,7 @@ class SessionPage(BasePage):
                 session.game = request.form['game']
                 session.judge = request.form['judge']
                 session.summary = request.form['summary']
+                session.target_buffer = self.get_target_buffer(request.form)
 
                 session.save()
 
@@ -14,13 +14,24 @@ class SessionTranscriptsPage(BasePage):
     class PlayTranscriptsButtonForm(FlaskForm):
         play_button = SubmitField('Play', render_kw={'class': 'btn btn-info btn-sm'})
 
+    per_page = 20
+
+    def get_transcript_page(self, session_id=None):
+        """The page of transcripts after or before the cursor in the request, the newest when there is none."""
+        try:
+            return self.get_transcripts_page(self.per_page, request.args.get('after'), request.args.get('before'),
+                                             session_id)
+        except ValueError:
+            return self.get_transcripts_page(self.per_page, session_id=session_id)
+
     def routes(self):
         @self.blueprint.route('/transcripts', methods=['GET'])
         def transcripts():
             return render_template(
                 'session/session_transcripts.html',
+                session=None,
                 sessions=self.get_sessions(),
-                transcripts=self.get_transcripts(),
+                transcripts=self.get_transcript_page(),
                 play_form=self.PlayTranscriptsButtonForm(),
                 delete_form=self.DeleteButtonForm(),
                 done_form=self.DoneButtonForm()
@@ -31,7 +42,7 @@ class SessionTranscriptsPage(BasePage):
             return render_template(
                 'session/session_transcripts.html',
                 session=self.get_session(session_id),
-                transcripts=self.get_session_transcripts(session_id),
+                transcripts=self.get_transcript_page(session_id),
                 play_form=self.PlayTranscriptsButtonForm(),
                 delete_form=self.DeleteButtonForm(),
                 done_form=self.DoneButtonForm()
@@ -48,11 +59,12 @@ class SessionTranscriptsPage(BasePage):
 
             if transcript:
                 self.app.transcripts().session_id = transcript.session_id
-                self.app.transcripts().last_checked_timestamp = transcript.timestamp
+                self.app.transcripts().last_transcript_id = transcript.id
 
                 agent = self.get_agent(transcript.agent)
                 if agent:
-                    self.app.transcripts().show_and_say(transcript.url, agent.voice, transcript.content)
+                    self.app.transcripts().show_and_say(transcript.url, agent.voice, transcript.content,
+                                                        transcript.session_id)
 
             return redirect(request.referrer or url_for('index_page.index'))
 
@@ -80,11 +92,12 @@ class SessionTranscriptsPage(BasePage):
 
             if transcript:
                 self.app.transcripts().session_id = transcript.session_id
-                self.app.transcripts().last_checked_timestamp = transcript.timestamp
+                self.app.transcripts().last_transcript_id = transcript.id
 
                 agent = self.get_agent(transcript.agent)
                 if agent:
-                    self.app.transcripts().show_and_say(transcript.url, agent.voice, transcript.content)
+                    self.app.transcripts().show_and_say(transcript.url, agent.voice, transcript.content,
+                                                        transcript.session_id)
 
             return redirect(request.referrer or url_for('session_transcripts_page.session_transcripts', session_id=session_id))
 
@@ -38,7 +38,7 @@ class VoicePage(BasePage):
                 file = request.files['file']
                 voice = self.get_voice(request.form['name'])
                 voice.data = file.read()
-                voice.save()
+                self.save_voice(voice)
             else:
                 flash(f"Invalid file format. Please upload a WAV file.", 'error')
 
@@ -50,7 +50,7 @@ class VoicePage(BasePage):
             voice = self.get_voice(name)
 
             if voice:
-                voice.delete()
+                self.delete_voice(voice)
 
             return redirect(url_for('voice_page.voices'))
 
@@ -1,15 +1,21 @@
+import socket
 import threading
+import time
 
 from systems.config import Config
 from systems.database import Database
+from systems.event_bus import EventBus
+from systems.migrations import Migrations
+from models.model_cache import model_cache
 
-from systems.text_generator import TextGenerator
-from systems.browser import BrowserSystem
 from systems.game_system import GameSystem
-from systems.speach_listener import SpeachListener
-from systems.text_to_speach import TextToSpeach
-from systems.media_player import MediaPlayer
+from systems.summary_worker import SummaryWorker
+from systems.turn_pacer import TurnPacer
 from systems.transcript_player import TranscriptPlayer
+from utils.stats_tools import StartupTimer
+
+# the text generator, speech, listener, browser and media player modules import torch, TTS, vosk, selenium and
+# mitmproxy, they are imported by the accessors the first time the system is used
 
 
 class App:
@@ -18,6 +24,8 @@ class App:
     def __init__(self):
         App.instance = self
 
+        self.startup = StartupTimer()
+        self.system_locks = {}  # system attribute -> lock held while it is created
         self.cuda_lock = threading.Lock()
         self.browser_system = None
         self.text_generator_system = None
@@ -26,23 +34,49 @@ class App:
         self.speech_system = None
         self.game_system = None
         self.transcript_player = None
+        self.summary_worker = None
+        self.turn_pacer = None
         self.config_system = None
         self.db_system = None
+        self.db_lock = threading.Lock()
+        self.event_bus = EventBus()
 
         if self.config().auto_play_media:
             self.media_player().start()
 
-    def media_player(self):
-
-        if not self.media_player_system:
-            self.media_player_system = MediaPlayer(self.config().playlist_path, self.config().vlc_player_path)
+    def get_system(self, name, module_name, create):
+        """
+        Return the system stored in attribute name, creating it on first use with create(module) once its
+        module has been imported. Only one thread creates a system, others wait for it.
+        """
+        system = getattr(self, name)
+        if system is None:
+            with self.system_locks.setdefault(name, threading.Lock()):
+                system = getattr(self, name)
+                if system is None:
+                    module = self.startup.import_module(module_name)
+                    system = self.startup.time("systems", name, lambda: create(module))
+                    setattr(self, name, system)
+        return system
 
-        return self.media_player_system
+    def media_player(self):
+        return self.get_system(
+            "media_player_system", "systems.media_player",
+            lambda module: module.MediaPlayer(self.config().playlist_path, self.config().vlc_player_path,
+                                              events=self.events())
+        )
 
     def db(self):
         if not self.db_system:
-            self.db_system = Database()
-            self.db_system.connect()
+            with self.db_lock:
+                # request threads and the warm up may all ask for the database at startup, it is only handed
+                # out once migrated
+                if not self.db_system:
+                    db = Database()
+                    db.connect()
+                    Migrations(db).apply()
+                    model_cache.ttl = self.config().model_cache_ttl
+                    self.db_system = db
 
         return self.db_system
 
@@ -52,24 +86,38 @@ class App:
 
         return self.config_system
 
-    def browser(self):
-
-        if not self.browser_system:
-            self.browser_system = BrowserSystem(self, auto_play=True)
+    def events(self):
+        # created up front so publishers and subscribers on different threads always share one bus
+        return self.event_bus
 
-        return self.browser_system
+    def browser(self):
+        return self.get_system(
+            "browser_system", "systems.browser",
+            lambda module: module.BrowserSystem(
+                self,
+                auto_play=True,
+                use_http_fetch=self.config().use_http_fetch,
+                fetch_workers=self.config().fetch_workers,
+                fetch_per_domain=self.config().fetch_per_domain,
+                fetch_browsers=self.config().fetch_browsers,
+                fetch_browser_timeout=self.config().fetch_browser_timeout,
+                page_ready_timeout=self.config().page_ready_timeout,
+                page_stable_interval=self.config().page_stable_interval
+            )
+        )
 
     def text_generator(self):
-
-        if not self.text_generator_system:
-            self.text_generator_system = TextGenerator(
+        def create(module):
+            text_generator = module.TextGenerator(
                 model_path=self.config().ai_model_path,
                 max_tokens=512,
-                cuda_lock=self.cuda_lock
+                cuda_lock=self.cuda_lock,
+                prefix_cache_size=self.config().prefix_cache_size
             )
-            self.text_generator_system.load_model()
+            self.startup.time("models", "text_generator", text_generator.load_model)
+            return text_generator
 
-        return self.text_generator_system
+        return self.get_system("text_generator_system", "systems.text_generator", create)
 
     def game(self):
 
@@ -78,40 +126,162 @@ class App:
 
         return self.game_system
 
+    def summaries(self):
+
+        if not self.summary_worker:
+            self.summary_worker = SummaryWorker(
+                self,
+                backfill_batch=self.config().summary_backfill_batch,
+                idle_interval=self.config().summary_idle_interval
+            )
+
+        return self.summary_worker
+
+    def pacer(self):
+
+        if not self.turn_pacer:
+            self.turn_pacer = TurnPacer(
+                self,
+                target_buffer=self.config().pacing_target_buffer,
+                resume_fraction=self.config().pacing_resume_fraction,
+                max_delay=self.config().pacing_max_delay,
+                max_pending_summaries=self.config().pacing_max_pending_summaries
+            )
+
+        return self.turn_pacer
+
     def transcripts(self):
 
         if not self.transcript_player:
-            self.transcript_player = TranscriptPlayer(self)
+            self.transcript_player = TranscriptPlayer(
+                self,
+                lookahead_depth=self.config().transcript_lookahead_depth,
+                lookahead_max_bytes=self.config().transcript_lookahead_max_bytes
+            )
 
         return self.transcript_player
 
     def speech(self):
-
-        if not self.speech_system:
-            self.speech_system = TextToSpeach(
+        return self.get_system(
+            "speech_system", "systems.text_to_speach",
+            lambda module: module.TextToSpeach(
                 self,
                 model_path=self.config().text_to_speech_model_path,
                 tmp_path=self.config().audio_temp_path,
                 default_voice=self.config().default_voice,
-                cuda_lock=self.cuda_lock
+                cuda_lock=self.cuda_lock,
+                voice_latent_path=self.config().voice_latent_path,
+                precompute_voices=self.config().precompute_voices,
+                audio_cache_path=self.config().audio_cache_path,
+                audio_cache_max_bytes=self.config().audio_cache_max_bytes
             )
-
-        return self.speech_system
+        )
 
     def listener(self):
+        return self.get_system(
+            "listen_system", "systems.speach_listener",
+            lambda module: module.SpeachListener(model_path=self.config().speech_to_text_model_path)
+        )
+
+    def warm_up(self, systems, port=None, host="127.0.0.1", timeout=60):
+        """
+        Load the models of systems ("text_generator", "speech", "listener") at the same time on background
+        threads, once the web server is accepting connections on port so the admin pages come up first.
+        """
+        thread = threading.Thread(target=self.do_warm_up, args=(systems, port, host, timeout), daemon=True)
+        thread.start()
+        return thread
+
+    def do_warm_up(self, systems, port, host, timeout):
+        if port:
+            self.wait_for_port(host, port, timeout)
+
+        loaders = {
+            "text_generator": self.text_generator,
+            "speech": lambda: self.startup.time("models", "speech", self.speech().load_model),
+            "listener": lambda: self.startup.time("models", "listener", self.listener().load_model)
+        }
+
+        def load(name):
+            try:
+                loaders[name]()
+            except Exception as ex:
+                print(f"warm up {name} exception {ex}")
+
+        threads = []
+        for name in systems:
+            if name not in loaders:
+                print(f"warm up: unknown system {name}")
+                continue
+            threads.append(threading.Thread(target=load, args=(name,), daemon=True))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        print(self.startup.report())
+
+    @staticmethod
+    def wait_for_port(host, port, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection((host, port), timeout=1):
+                    return True
+            except OSError:
+                time.sleep(0.2)
+        return False
+
+    def stats(self):
+        """Collect monitoring stats from the systems that have been started."""
+        stats = {}
+
+        if self.db_system:
+            stats["database"] = self.db_system.get_stats()
+            stats["model_cache"] = model_cache.get_stats()
+
+        if self.text_generator_system:
+            stats["text_generator"] = self.text_generator_system.get_stats()
 
-        if not self.listen_system:
-            self.listen_system = SpeachListener(model_path=self.config().speech_to_text_model_path)
+        if self.browser_system:
+            stats["browser"] = self.browser_system.get_stats()
+
+        if self.speech_system:
+            stats["speech"] = self.speech_system.get_stats()
 
-        return self.listen_system
+        stats["events"] = self.event_bus.get_stats()
+        stats["startup"] = self.startup.to_dict()
+
+        if self.transcript_player:
+            stats["transcripts"] = self.transcript_player.get_stats()
+
+        if self.summary_worker:
+            stats["summaries"] = self.summary_worker.get_stats()
+
+        if self.turn_pacer:
+            stats["pacing"] = self.turn_pacer.get_stats()
+
+        if self.game_system:
+            stats["games"] = self.game_system.get_stats()
+            if self.game_system.current_game:
+                stats["last_turn"] = self.game_system.current_game.last_turn_stats
+
+        return stats
 
     def stop(self):
         if self.game_system:
             self.game_system.stop()
 
+        if self.summary_worker:
+            self.summary_worker.stop()
+
         if self.browser_system:
             self.browser_system.stop()
 
+        if self.text_generator_system:
+            self.text_generator_system.stop()
+
         if self.speech_system:
             self.speech_system.stop()
 
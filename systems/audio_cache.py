@@ -0,0 +1,109 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+class AudioCache:
+    """
+    Synthesized speech saved to disk as PCM, addressed by a hash of the voice, its sample, the tts model and the
+    cleaned text. The least recently played files are removed once the cache grows past max_bytes.
+    """
+
+    extension = ".pcm"
+
+    def __init__(self, path="audio_cache", max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.path, exist_ok=True)
+        self.load_index()
+
+    @staticmethod
+    def make_key(voice_name, voice_hash, model_id, text):
+        return hashlib.sha256("\0".join([voice_name, voice_hash or "", model_id, text]).encode()).hexdigest()
+
+    def file_path(self, key):
+        return os.path.join(self.path, key + self.extension)
+
+    def load_index(self):
+        files = []
+        for name in os.listdir(self.path):
+            if name.endswith(self.extension):
+                stat = os.stat(os.path.join(self.path, name))
+                files.append((stat.st_mtime, name[:-len(self.extension)], stat.st_size))
+
+        for _, key, size in sorted(files):
+            self.entries[key] = size
+            self.total_bytes += size
+
+        with self.lock:
+            self.evict()
+
+    def get(self, key):
+        """Return the cached PCM for key, or None."""
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+
+        try:
+            with open(self.file_path(key), 'rb') as f:
+                pcm = f.read()
+            os.utime(self.file_path(key))  # keeps the LRU order across restarts
+        except OSError as ex:
+            print(f"audio cache get {key} exception {ex}")
+            with self.lock:
+                self.total_bytes -= self.entries.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+
+        return pcm
+
+    def put(self, key, pcm):
+        if len(pcm) > self.max_bytes:
+            return
+
+        # write to a temporary file first so a reader never sees a partial file
+        tmp_path = f"{self.file_path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(pcm)
+        os.replace(tmp_path, self.file_path(key))
+
+        with self.lock:
+            self.total_bytes += len(pcm) - self.entries.pop(key, 0)
+            self.entries[key] = len(pcm)
+            self.evict()
+
+    def evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.file_path(key))
+            except OSError as ex:
+                print(f"audio cache evict {key} exception {ex}")
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
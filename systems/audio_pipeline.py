@@ -0,0 +1,224 @@
+import queue
+import threading
+import time
+
+from utils.stats_tools import TimingStats
+
+SAMPLE_WIDTH = 2  # audio is passed around as 16 bit signed PCM
+
+
+def to_pcm16(samples):
+    """Convert float samples in the range -1..1 (list, numpy array or tensor) to 16 bit PCM bytes."""
+    import numpy as np
+
+    samples = np.clip(np.asarray(samples, dtype=np.float32), -1.0, 1.0)
+    return (samples * 32767).astype("<i2").tobytes()
+
+
+class PyAudioSink:
+    """Plays PCM through one PyAudio output stream that stays open between chunks and utterances."""
+
+    def __init__(self):
+        self.pyaudio = None  # opened on the first write so creating the sink doesn't touch the audio device
+        self.stream = None
+        self.format = None
+
+    def write(self, pcm, sample_rate, channels=1):
+        if not self.pyaudio:
+            import pyaudio
+
+            self.pyaudio = pyaudio.PyAudio()
+
+        if self.format != (sample_rate, channels):
+            self.close()
+            self.stream = self.pyaudio.open(
+                format=self.pyaudio.get_format_from_width(SAMPLE_WIDTH),
+                channels=channels,
+                rate=sample_rate,
+                output=True
+            )
+            self.format = (sample_rate, channels)
+
+        self.stream.write(pcm)
+
+    def close(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+            self.format = None
+
+
+class NullAudioSink:
+    """Discards audio, optionally taking as long as playing it would. Used for tests and benchmarks."""
+
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.chunks = []
+
+    def write(self, pcm, sample_rate, channels=1):
+        self.chunks.append(pcm)
+        if self.realtime:
+            time.sleep(len(pcm) / (sample_rate * channels * SAMPLE_WIDTH))
+
+    def close(self):
+        pass
+
+
+class AudioPipeline:
+    """
+    Bounded queue of synthesized PCM chunks played by a single thread, so the next chunk can be synthesized
+    while the current one plays. put_chunk blocks once max_chunks are waiting.
+    clear() drops everything queued; chunks put by a producer that started before the clear are dropped too.
+    """
+
+    def __init__(self, sink, max_chunks=8, on_start=None, on_stop=None):
+        self.sink = sink
+        self.on_start = on_start  # called before audio starts playing after the pipeline was quiet
+        self.on_stop = on_stop  # called once the queue has run dry
+
+        self.audio_queue = queue.Queue(maxsize=max_chunks)
+        self.thread = None
+        self.running = False
+        self.playing = False
+        self.generation = 0
+        self.seconds_lock = threading.Lock()
+        self.seconds_queued = 0.0  # audio waiting to be played
+
+        # monitoring
+        self.chunks_played = 0
+        self.chunk_gap = TimingStats()  # silence waiting for the next chunk of the same utterance
+        self.first_audio_time = TimingStats()  # say request to the start of its first chunk
+
+    @staticmethod
+    def pcm_seconds(pcm, sample_rate, channels=1):
+        return len(pcm) / (SAMPLE_WIDTH * channels * sample_rate) if sample_rate else 0.0
+
+    def put_chunk(self, pcm, sample_rate, channels=1, submitted=None, generation=None, first=False, on_play=None):
+        seconds = self.pcm_seconds(pcm, sample_rate, channels)
+        with self.seconds_lock:
+            self.seconds_queued += seconds
+
+        self.audio_queue.put({
+            "pcm": pcm,
+            "seconds": seconds,
+            "sample_rate": sample_rate,
+            "channels": channels,
+            "submitted": submitted,
+            "first": first,
+            "on_play": on_play,  # called when the chunk starts playing
+            "generation": self.generation if generation is None else generation
+        })
+
+    def put_callback(self, callback):
+        self.audio_queue.put({"callback": callback})
+
+    def queued(self):
+        return self.audio_queue.qsize()
+
+    def queued_seconds(self):
+        """Seconds of audio waiting to be played."""
+        with self.seconds_lock:
+            return max(0.0, self.seconds_queued)
+
+    def played(self, audio):
+        with self.seconds_lock:
+            self.seconds_queued -= audio.get("seconds", 0.0)
+
+    def clear(self):
+        self.generation += 1
+
+        while True:
+            try:
+                audio = self.audio_queue.get(False)
+            except queue.Empty:
+                break
+
+            try:
+                if audio:
+                    self.played(audio)
+                if audio and audio.get("callback"):
+                    audio["callback"]()
+            except Exception as ex:
+                print(f"clear callback exception {ex}")
+            finally:
+                self.audio_queue.task_done()
+
+    def play(self, audio):
+        if audio["generation"] != self.generation:
+            return
+
+        if not self.playing:
+            self.playing = True
+            if self.on_start:
+                self.on_start()
+
+        if audio["submitted"]:
+            self.first_audio_time.add(time.monotonic() - audio["submitted"])
+
+        if audio["on_play"]:
+            audio["on_play"]()
+
+        self.sink.write(audio["pcm"], audio["sample_rate"], audio["channels"])
+        self.chunks_played += 1
+
+    def do_play(self):
+        last_chunk_end = None
+        while self.running:
+            audio = self.audio_queue.get()
+            try:
+                if audio is None:
+                    continue
+
+                if "pcm" in audio:
+                    if last_chunk_end is not None and not audio["first"]:
+                        self.chunk_gap.add(time.monotonic() - last_chunk_end)
+                    try:
+                        self.play(audio)
+                    finally:
+                        self.played(audio)
+                    last_chunk_end = time.monotonic()
+
+                if "callback" in audio:
+                    last_chunk_end = None
+                    if audio["callback"]:
+                        audio["callback"]()
+            except Exception as ex:
+                print(f"do_play exception {ex}")
+            finally:
+                self.audio_queue.task_done()
+
+            if self.playing and self.audio_queue.qsize() == 0:
+                self.playing = False
+                if self.on_stop:
+                    try:
+                        self.on_stop()
+                    except Exception as ex:
+                        print(f"on_stop exception {ex}")
+
+    def wait(self):
+        """Block until everything queued so far has been played."""
+        self.audio_queue.join()
+
+    def get_stats(self):
+        return {
+            "queued": self.audio_queue.qsize(),
+            "queued_seconds": round(self.queued_seconds(), 2),
+            "chunks_played": self.chunks_played,
+            "chunk_gap": self.chunk_gap.to_dict(),
+            "time_to_first_audio": self.first_audio_time.to_dict()
+        }
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self.do_play, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if self.running:
+            self.running = False
+            self.clear()
+            self.audio_queue.put(None)
+            self.thread.join()
+            self.thread = None
+            self.sink.close()
@@ -0,0 +1,198 @@
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future
+
+from utils.stats_tools import Histogram, TimingStats
+
+
+class GenerationRequest:
+    def __init__(self, records, max_new_tokens, cache_key=None, owner=None):
+        self.records = records
+        self.max_new_tokens = max_new_tokens
+        self.cache_key = cache_key  # prompts with the same key are likely to share a prefix
+        self.owner = owner  # who is waiting on the response, e.g. a session id
+        self.future = Future()
+        self.submitted = time.monotonic()
+        self.tokens = 0  # prompt length, filled in by the scheduler when it can count tokens
+
+
+class BatchScheduler:
+    """
+    Collects generation requests from many threads and runs them through the model in batches.
+    Requests arriving within batch_window seconds of each other are grouped, up to max_batch_size requests
+    or max_padded_tokens tokens once every prompt is padded to the longest one.
+    Owners take turns: a batch is filled with one request from each owner before a second from any of them,
+    starting with the owner that was served least recently, so one busy session can't starve the others.
+    """
+
+    def __init__(self, run_batch, max_batch_size=4, batch_window=0.05, max_padded_tokens=8192, count_tokens=None):
+        self.run_batch = run_batch  # run_batch(requests) returns one response per request
+        self.count_tokens = count_tokens  # count_tokens(records) returns the prompt length in tokens
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.max_padded_tokens = max_padded_tokens
+
+        self.condition = threading.Condition()
+        self.pending = deque()
+        self.last_served = {}  # owner -> batch number it was last served in
+        self.batches = 0
+        self.running = False
+        self.worker = None
+
+        # monitoring
+        self.batch_sizes = Histogram()
+        self.queue_wait = TimingStats()
+        self.batch_time = TimingStats()
+        self.served = Counter()  # owner -> requests run
+        self.owner_wait = {}  # owner -> TimingStats
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+
+        self.worker = threading.Thread(target=self.do_schedule, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        if self.worker:
+            self.worker.join()
+            self.worker = None
+
+        # fail anything still waiting so callers don't block forever
+        with self.condition:
+            while self.pending:
+                self.pending.popleft().future.set_exception(RuntimeError("text generation stopped"))
+
+    def submit(self, records, max_new_tokens, cache_key=None, owner=None):
+        request = GenerationRequest(records, max_new_tokens, cache_key, owner)
+
+        if self.count_tokens:
+            try:
+                request.tokens = self.count_tokens(records)
+            except Exception as ex:
+                print(f"count_tokens exception {ex}")
+
+        with self.condition:
+            if not self.running:
+                request.future.set_exception(RuntimeError("text generation is not running"))
+                return request.future
+
+            self.pending.append(request)
+            self.condition.notify()
+
+        return request.future
+
+    def padded_tokens(self, batch):
+        longest = max(request.tokens + request.max_new_tokens for request in batch)
+        return longest * len(batch)
+
+    def fair_order(self):
+        """The pending requests taking one from each owner in turn, least recently served owner first."""
+        queues = OrderedDict()
+        for request in self.pending:
+            queues.setdefault(request.owner, []).append(request)
+
+        # sorted is stable, owners that have never been served keep the order they arrived in
+        owners = sorted(queues, key=lambda owner: self.last_served.get(owner, -1))
+
+        order = []
+        for index in range(max(len(requests) for requests in queues.values())):
+            for owner in owners:
+                if index < len(queues[owner]):
+                    order.append(queues[owner][index])
+        return order
+
+    def next_batch(self):
+        with self.condition:
+            while self.running and not self.pending:
+                self.condition.wait()
+
+            if not self.running:
+                return []
+
+            # give other threads a moment to add their requests to this batch
+            deadline = self.pending[0].submitted + self.batch_window
+            while self.running and len(self.pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+            candidates = self.fair_order()
+            batch = [candidates[0]]
+            for request in candidates[1:]:
+                if len(batch) >= self.max_batch_size:
+                    break
+                if (request.max_new_tokens == batch[0].max_new_tokens and
+                        self.padded_tokens(batch + [request]) <= self.max_padded_tokens):
+                    batch.append(request)
+
+            # requests that didn't fit keep their place in the queue
+            chosen = set(map(id, batch))
+            self.pending = deque(request for request in self.pending if id(request) not in chosen)
+
+            self.batches += 1
+            for request in batch:
+                self.last_served[request.owner] = self.batches
+
+            return batch
+
+    def do_schedule(self):
+        while self.running:
+            batch = self.next_batch()
+            if not batch:
+                continue
+
+            start = time.monotonic()
+            with self.condition:
+                for request in batch:
+                    self.served[request.owner] += 1
+                    if request.owner not in self.owner_wait:
+                        self.owner_wait[request.owner] = TimingStats()
+            for request in batch:
+                self.queue_wait.add(start - request.submitted)
+                self.owner_wait[request.owner].add(start - request.submitted)
+            self.batch_sizes.add(len(batch))
+
+            try:
+                responses = self.run_batch(batch)
+                if len(responses) != len(batch):
+                    raise RuntimeError(f"batch of {len(batch)} requests returned {len(responses)} responses")
+
+                for request, response in zip(batch, responses):
+                    request.future.set_result(response)
+            except Exception as ex:
+                print(f"run_batch exception {ex}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(ex)
+
+            self.batch_time.add(time.monotonic() - start)
+
+    def get_stats(self):
+        with self.condition:
+            queued = len(self.pending)
+            owners = {str(owner): {"served": self.served[owner], "queue_wait": wait.to_dict()}
+                      for owner, wait in self.owner_wait.items()}
+
+        return {
+            "queued": queued,
+            "batch_sizes": self.batch_sizes.to_dict(),
+            "queue_wait": self.queue_wait.to_dict(),
+            "batch_time": self.batch_time.to_dict(),
+            "owners": owners
+        }
+
+    def get_owner_stats(self, owner):
+        with self.condition:
+            wait = self.owner_wait.get(owner)
+            served = self.served[owner]
+
+        return {"served": served, "queue_wait": wait.to_dict() if wait else TimingStats().to_dict()}
@@ -5,20 +5,28 @@ import threading
 import urllib.parse
 from urllib.parse import urlparse
 
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver import FirefoxProfile
 from selenium import webdriver
+from urllib3.exceptions import HTTPError
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions
 
+from models.page_model import PageModel
 from systems.browser_proxy import BrowserProxy
+from systems.fetch_pool import FetchPool
+from systems.http_fetcher import HttpFetcher
+from systems.page_readiness import PageReadiness
 from systems.system_base import SystemBase
 from utils.html_tools import HtmlTools
+from utils.stats_tools import TimingStats
 
 
 class BrowserSystem(SystemBase):
-    def __init__(self, app, auto_play=True):
+    def __init__(self, app, auto_play=True, use_http_fetch=True, fetch_workers=4, fetch_per_domain=2,
+                 fetch_browsers=2, page_ready_timeout=10, page_stable_interval=0.5, fetch_browser_timeout=60):
         super().__init__(app)
 
         self.current_user_session_id = None
@@ -44,6 +52,21 @@ class BrowserSystem(SystemBase):
         self.paused = False
         self.auto_play = auto_play
 
+        # pages are fetched with plain http when they don't need a browser, use_http_fetch=False always uses firefox
+        self.http_fetcher = HttpFetcher() if use_http_fetch else None
+        self.browser_fetch_time = TimingStats()
+
+        # pages are fetched in parallel, pages that need a browser share a pool of headless firefox instances
+        self.fetch_pool = FetchPool(self.fetch, max_workers=fetch_workers, max_per_domain=fetch_per_domain)
+        self.max_fetch_browsers = fetch_browsers
+        self.fetch_browser_timeout = fetch_browser_timeout  # seconds to wait for a browser when all are busy
+        self.fetch_browsers = []  # idle browsers
+        self.fetch_browser_count = 0  # idle, checked out and being created
+        self.fetch_browser_condition = threading.Condition()
+
+        # wait for pages to finish loading instead of sleeping
+        self.page_readiness = PageReadiness(timeout=page_ready_timeout, stable_interval=page_stable_interval)
+
     def start_user_browser(self, session_id, page_load_callback):
         self.get_user_browser()
         self.current_user_session_id = session_id
@@ -76,7 +99,49 @@ class BrowserSystem(SystemBase):
 
         return self.display_browser
 
-    def browser_options(self, use_proxy=True):
+    def checkout_fetch_browser(self):
+        """Reuse an idle fetch browser, else create one if under the limit, else wait for one to be checked in."""
+        deadline = time.monotonic() + self.fetch_browser_timeout
+        with self.fetch_browser_condition:
+            while True:
+                if self.fetch_browsers:
+                    return self.fetch_browsers.pop()
+
+                if self.fetch_browser_count < self.max_fetch_browsers:
+                    self.fetch_browser_count += 1
+                    break
+
+                # loop rather than wait for a checkin, a browser that fails to start or crashes frees its slot
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"no fetch browser free after {self.fetch_browser_timeout} seconds")
+                self.fetch_browser_condition.wait(remaining)
+
+        try:
+            return webdriver.Firefox(options=self.browser_options(use_proxy=False, headless=True))
+        except Exception:
+            self.release_fetch_browser()
+            raise
+
+    def checkin_fetch_browser(self, browser):
+        with self.fetch_browser_condition:
+            self.fetch_browsers.append(browser)
+            self.fetch_browser_condition.notify()
+
+    def discard_fetch_browser(self, browser):
+        """Quit a browser whose driver failed instead of handing it to the next fetch."""
+        try:
+            browser.quit()
+        except Exception as ex:
+            print(f"discard_fetch_browser quit exception {ex}")
+        self.release_fetch_browser()
+
+    def release_fetch_browser(self):
+        with self.fetch_browser_condition:
+            self.fetch_browser_count -= 1
+            self.fetch_browser_condition.notify()
+
+    def browser_options(self, use_proxy=True, headless=False):
         profile = FirefoxProfile()
 
         # use the browser proxy
@@ -98,6 +163,8 @@ class BrowserSystem(SystemBase):
 
         # private mode
         firefox_options.add_argument("-private-window")
+        if headless:
+            firefox_options.add_argument("-headless")
         firefox_options.profile = profile
 
         return firefox_options
@@ -124,33 +191,31 @@ class BrowserSystem(SystemBase):
             pass
 
     def get_page_details(self, session_id, browser, page):
+        self.save_page_details(session_id, page, browser.title, HtmlTools.extract(browser.page_source))
+
+    def save_page_details(self, session_id, page, title, extracted):
 
         p = urlparse(page.url)
         url_prefix = f"{p.scheme}://{p.netloc}"
 
         try:
-            page.title = HtmlTools.strip_string(browser.title)
-            page.body = HtmlTools.get_page_content(
-                HtmlTools.strip_string(browser.page_source)
-            )
+            page.title = HtmlTools.strip_string(title) if title else extracted.title
+            page.body = extracted.body
             if HtmlTools.has_error(page.body):
                 page.body = ""
 
-            links = HtmlTools.get_page_links(browser.page_source)
-
-            # get up to max_links and mark them as seen
-            for link in links:
+            links = []
+            for link in extracted.links:
                 href = link["href"]
 
                 if href and href.startswith("/"):
                     href = f"{url_prefix}{href}"
 
                 if HtmlTools.is_url(href):
-                    link_page = self.get_session_page(session_id, href)
-                    if not link_page.title:
-                        link_page.title = link["text"]
-                        link_page.set_parent_url(page.url)
-                        link_page.save()
+                    links.append({"href": href, "text": link["text"]})
+
+            # mark the links as seen in a single batch
+            PageModel.bulk_upsert_links(self.app.db(), session_id, page.url, links)
 
         except Exception as ex:
             print(f"get_page_details Exception: {ex}")
@@ -167,10 +232,10 @@ class BrowserSystem(SystemBase):
             try:
                 watch_url = self.browser_watch_queue.get()
                 if watch_url and self.page_load_func:
-                    # give the page time to load
-                    time.sleep(5)
                     # Block a url has been loaded
                     with self.user_browser_lock:
+                        # give the page time to load
+                        self.page_readiness.wait(self.user_browser, network_idle=self.proxy.is_network_idle)
                         url = self.user_browser.current_url
                         if url and url != self.user_browser_string:
                             page = self.get_session_page(self.current_user_session_id, url)
@@ -192,25 +257,44 @@ class BrowserSystem(SystemBase):
         if not page.body:
             print(f"do_fetch {url}")
 
-            with self.search_browser_lock:
-                self.fetching = True
-                try:
-                    search_browser = self.get_search_browser()
-                    search_browser.set_page_load_timeout(10)
-                    search_browser.get(url)
-                    search_browser.implicitly_wait(10)
-
-                    # give the page a few seconds to render
-                    time.sleep(3)
+            if self.http_fetcher:
+                result = self.http_fetcher.fetch(url)
+                if result:
+                    self.save_page_details(session_id, page, result.title, result.extracted)
+                    return page
 
-                    self.get_page_details(session_id, search_browser, page)
-                except Exception as ex:
-                    print(f"do_fetch get page details {url} exception {ex}")
+            start = time.monotonic()
+            fetch_browser = self.checkout_fetch_browser()
+            try:
+                fetch_browser.set_page_load_timeout(10)
+                fetch_browser.get(url)
+                fetch_browser.implicitly_wait(10)
+
+                # give the page time to render
+                self.page_readiness.wait(fetch_browser)
+
+                self.get_page_details(session_id, fetch_browser, page)
+                self.checkin_fetch_browser(fetch_browser)
+            except TimeoutException as ex:
+                # the page was slow, the browser is fine
+                print(f"do_fetch get page details {url} timeout {ex}")
+                self.checkin_fetch_browser(fetch_browser)
+            except (WebDriverException, HTTPError) as ex:
+                # the driver crashed or lost its session, every later fetch would fail on it too
+                print(f"do_fetch get page details {url} browser exception {ex}, discarding the browser")
+                self.discard_fetch_browser(fetch_browser)
+            except Exception as ex:
+                print(f"do_fetch get page details {url} exception {ex}")
+                self.checkin_fetch_browser(fetch_browser)
 
-                self.fetching = False
+            self.browser_fetch_time.add(time.monotonic() - start)
 
         return page
 
+    def fetch_all(self, session_id, urls):
+        """Fetch urls in parallel, returns futures for the pages in the same order."""
+        return self.fetch_pool.fetch_all(session_id, urls)
+
     def search(self, session_id, search, max_results=10, max_url_length=300):
         print(f"search {search}")
 
@@ -242,8 +326,8 @@ class BrowserSystem(SystemBase):
                 search_browser.get(url)
                 search_browser.implicitly_wait(10)
 
-                # give the page a few seconds to render
-                time.sleep(3)
+                # give the page time to render
+                self.page_readiness.wait(search_browser)
                 search_rank = start
                 for link in search_browser.find_elements("css selector", "div[data-async-context] a"):
                     try:
@@ -284,6 +368,17 @@ class BrowserSystem(SystemBase):
         if self.auto_play:
             self.auto_play_video(browser)
 
+    def get_stats(self):
+        stats = {
+            "fetch_pool": self.fetch_pool.get_stats(),
+            "fetch_browsers": self.fetch_browser_count,
+            "browser_fetch_time": self.browser_fetch_time.to_dict(),
+            "page_ready": self.page_readiness.get_stats()
+        }
+        if self.http_fetcher:
+            stats["http_fetch"] = self.http_fetcher.get_stats()
+        return stats
+
     def clear(self):
         self.browser_watch_queue.queue.clear()
 
@@ -304,3 +399,13 @@ class BrowserSystem(SystemBase):
             self.search_browser.quit()
             self.search_browser = None
 
+        self.fetch_pool.stop()
+        with self.fetch_browser_condition:
+            idle, self.fetch_browsers = self.fetch_browsers, []
+            self.fetch_browser_count -= len(idle)
+        for browser in idle:
+            browser.quit()
+
+        if self.http_fetcher:
+            self.http_fetcher.close()
+
@@ -7,14 +7,33 @@ from mitmproxy import options
 from mitmproxy.tools import dump
 from urllib.parse import urlparse
 
+from utils.patterns import SubstringMatcher
+
 
 class RequestListener:
     def __init__(self, callback_func):
         self.callback_func = callback_func
 
+        # requests waiting on a response, used to tell when the browser has stopped loading
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.last_activity = time.monotonic()
+
+    def update_in_flight(self, change):
+        with self.lock:
+            self.in_flight = max(0, self.in_flight + change)
+            self.last_activity = time.monotonic()
+
     def request(self, flow: mitmproxy.http.HTTPFlow):
+        self.update_in_flight(1)
         self.callback_func(flow.request.pretty_url)
 
+    def response(self, flow: mitmproxy.http.HTTPFlow):
+        self.update_in_flight(-1)
+
+    def error(self, flow: mitmproxy.http.HTTPFlow):
+        self.update_in_flight(-1)
+
 
 class BrowserProxy:
     def __init__(self, callback_func, host, port):
@@ -32,24 +51,22 @@ class BrowserProxy:
                                     'json', 'svg', 'm3u8', 'webm', 'txt', 'pdf', 'chain']
         self.EXCLUDED_DOMAINS = [
             'firefox.settings.services.mozilla.com',
-            'cdn.mozilla.net'
+            'cdn.mozilla.net',
             'gstatic.com'
         ]
 
+        # built once, should_exclude runs for every request the browser makes
+        self.excluded_domains = SubstringMatcher(self.EXCLUDED_DOMAINS)
+        self.excluded_extensions = re.compile(r'\.(' + '|'.join(self.EXCLUDED_EXTENSIONS) + r')($|\?)', re.IGNORECASE)
+
     def should_exclude(self, url):
         try:
-            # Regex pattern to match excluded domains
-            domains_pattern = r'(' + '|'.join(re.escape(domain) for domain in self.EXCLUDED_DOMAINS) + r')'
-
-            # Check if URL matches excluded domains pattern
-            if re.search(domains_pattern, url, re.IGNORECASE):
+            # Check if URL contains an excluded domain
+            if self.excluded_domains.matches(url):
                 return True
 
-            # Regex pattern to match file extensions with a preceding period (.)
-            extensions_pattern = r'\.(' + '|'.join(self.EXCLUDED_EXTENSIONS) + r')($|\?)'
-
-            # Check if URL matches file extensions pattern
-            if re.search(extensions_pattern, url, re.IGNORECASE):
+            # Check if URL matches file extensions with a preceding period (.)
+            if self.excluded_extensions.search(url):
                 return True
 
             # Exclude if it has an excluded extension and a query string
@@ -60,6 +77,15 @@ class BrowserProxy:
 
         return False
 
+    def is_network_idle(self, quiet_period=0.5, stale_after=2.0):
+        """
+        True once no requests have been in flight for quiet_period seconds.
+        Requests that never finish, like long polling, are ignored once nothing has happened for stale_after seconds.
+        """
+        with self.listener.lock:
+            quiet = time.monotonic() - self.listener.last_activity
+            return (self.listener.in_flight == 0 and quiet >= quiet_period) or quiet >= stale_after
+
     def callback_wrapper(self, url):
         try:
             current_time = time.time()
@@ -16,9 +16,31 @@ class Config:
                                                         'models/vosk-model-en-us-0.22')
             self.text_to_speech_model_path = config.get('text_to_speech_model_path', 'models/XTTS-v2')
             self.audio_temp_path = config.get('audio_temp_path', 'stream_audio_tmp/')
+            self.voice_latent_path = config.get('voice_latent_path', 'voice_latents/')
+            self.precompute_voices = config.get('precompute_voices', False)
+            self.audio_cache_path = config.get('audio_cache_path', 'audio_cache/')
+            self.audio_cache_max_bytes = config.get('audio_cache_max_bytes', 512 * 1024 * 1024)
+            self.transcript_lookahead_depth = config.get('transcript_lookahead_depth', 2)
+            self.transcript_lookahead_max_bytes = config.get('transcript_lookahead_max_bytes', 64 * 1024 * 1024)
             self.auto_play_media = config.get('auto_play_media', False)
             self.listen_for_input = config.get('listen_for_input', False)
             self.vlc_player_path = config.get('vlc_player_path', r'C:\Program Files\VideoLAN\VLC')
+            self.prefix_cache_size = config.get('prefix_cache_size', 4)
+            self.use_http_fetch = config.get('use_http_fetch', True)
+            self.fetch_workers = config.get('fetch_workers', 4)
+            self.fetch_per_domain = config.get('fetch_per_domain', 2)
+            self.fetch_browsers = config.get('fetch_browsers', 2)
+            self.fetch_browser_timeout = config.get('fetch_browser_timeout', 60)
+            self.page_ready_timeout = config.get('page_ready_timeout', 10)
+            self.page_stable_interval = config.get('page_stable_interval', 0.5)
+            self.summary_backfill_batch = config.get('summary_backfill_batch', 5)
+            self.summary_idle_interval = config.get('summary_idle_interval', 10)
+            self.pacing_target_buffer = config.get('pacing_target_buffer', 60)
+            self.pacing_resume_fraction = config.get('pacing_resume_fraction', 0.75)
+            self.pacing_max_delay = config.get('pacing_max_delay', 10)
+            self.pacing_max_pending_summaries = config.get('pacing_max_pending_summaries', 3)
+            self.model_cache_ttl = config.get('model_cache_ttl', 60)
+            self.warm_up = config.get('warm_up', [])
 
             # Load database configuration from JSON
             self.db_host = config['mysql']['host']
@@ -26,5 +48,8 @@ class Config:
             self.db_database = config['mysql']['database']
             self.db_user = config['mysql']['user']
             self.db_password = config['mysql']['password']
+            self.db_pool_size = config['mysql'].get('pool_size', 5)
+            self.db_pool_timeout = config['mysql'].get('pool_timeout', 10)
+            self.db_pool_health_check_interval = config['mysql'].get('pool_health_check_interval', 30)
 
             # os.environ["PYTORCH_CUDA_ALLOC_CONF"] = "expandable_segments:True"
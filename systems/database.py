@@ -2,116 +2,341 @@ import mysql.connector
 from mysql.connector import Error
 
 from systems.config import Config
+from utils.stats_tools import TimingStats
+from collections import deque
 import time
 import threading
 
 
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections shared by all threads."""
+
+    def __init__(self, connect_func, size=5, timeout=10, health_check_interval=30):
+        self.connect_func = connect_func
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval  # seconds a connection may idle before it is pinged
+
+        self.condition = threading.Condition()
+        self.idle = deque()  # (connection, last_used) pairs ready for checkout
+        self.created = 0
+        self.closed = False
+
+        # monitoring
+        self.waiters = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.checkout_time = TimingStats()
+
+    @staticmethod
+    def is_healthy(connection):
+        try:
+            return connection.is_connected()
+        except Exception:
+            return False
+
+    def checkout(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            connection = None
+            last_used = None
+
+            with self.condition:
+                while True:
+                    if self.closed:
+                        raise PoolTimeoutError("connection pool is closed")
+
+                    if self.idle:
+                        connection, last_used = self.idle.pop()
+                        break
+
+                    if self.created < self.size:
+                        # reserve a slot and open the connection outside the lock
+                        self.created += 1
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeoutError(f"no database connection available after {timeout} seconds")
+
+                    self.waiters += 1
+                    try:
+                        self.condition.wait(remaining)
+                    finally:
+                        self.waiters -= 1
+
+            if connection is None:
+                try:
+                    connection = self.connect_func()
+                except Exception:
+                    self.release_slot()
+                    raise
+            elif time.monotonic() - last_used > self.health_check_interval and not self.is_healthy(connection):
+                print("discarding stale database connection")
+                self.discard(connection)
+                continue
+
+            with self.condition:
+                self.checkouts += 1
+            self.checkout_time.add(time.monotonic() - start)
+            return connection
+
+    def checkin(self, connection, healthy=True):
+        if not healthy or self.closed:
+            self.discard(connection)
+            return
+
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception as ex:
+            print(f"error closing database connection {ex}")
+
+        with self.condition:
+            self.discarded += 1
+        self.release_slot()
+
+    def release_slot(self):
+        with self.condition:
+            self.created -= 1
+            self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            idle = list(self.idle)
+            self.idle.clear()
+            self.condition.notify_all()
+
+        for connection, _ in idle:
+            self.discard(connection)
+
+    def get_stats(self):
+        with self.condition:
+            stats = {
+                "size": self.size,
+                "open": self.created,
+                "idle": len(self.idle),
+                "in_use": self.created - len(self.idle),
+                "waiters": self.waiters,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "discarded": self.discarded
+            }
+
+        stats["checkout_latency"] = self.checkout_time.to_dict()
+        return stats
+
+
 class Database:
-    _connection = None
-    _cursor = None
+    _pool = None
     _max_retries = 3
     _retry_delay = 2  # seconds
-    _lock = threading.Lock()  # Lock for thread safety
+    _lock = threading.Lock()  # guards creation of the pool
+    _stats_lock = threading.Lock()
+    _thread_stats = threading.local()
+    _queries = 0
+    _bytes_fetched = 0
 
     @classmethod
     def connect(cls):
         with cls._lock:
-            if cls._connection is not None and cls._connection.is_connected():
+            if cls._pool is not None:
                 return  # Already connected
 
             config = Config()
-            for attempt in range(cls._max_retries):
-                try:
-                    cls._connection = mysql.connector.connect(
-                        host=config.db_host,
-                        user=config.db_user,
-                        port=config.db_port,
-                        password=config.db_password,
-                        database=config.db_database,
-                        use_unicode=False
-                    )
-                    cls._cursor = cls._connection.cursor()
-                    cls._cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED;")
-
-                    print("Connected to MySQL database")
-                    break  # Break the loop if connection is successful
-                except Error as ex:
-                    print(f"Error connecting to MySQL (attempt {attempt + 1}): {ex}")
-                    cls._connection = None
-                    cls._cursor = None
-                    if attempt < cls._max_retries - 1:  # Wait before retrying
-                        time.sleep(cls._retry_delay)
-                    else:
-                        raise Exception("Max retries reached. Could not connect to MySQL database.")
+            cls._pool = ConnectionPool(
+                cls.create_connection,
+                size=config.db_pool_size,
+                timeout=config.db_pool_timeout,
+                health_check_interval=config.db_pool_health_check_interval
+            )
+
+        # open the first connection now so bad credentials are reported at startup
+        cls._pool.checkin(cls._pool.checkout())
 
     @classmethod
-    def reconnect(cls):
-        """Re-establish the database connection."""
-        with cls._lock:
-            print("Attempting to reconnect to the database...")
-            cls.close()
+    def create_connection(cls):
+        config = Config()
+        for attempt in range(cls._max_retries):
+            try:
+                connection = mysql.connector.connect(
+                    host=config.db_host,
+                    user=config.db_user,
+                    port=config.db_port,
+                    password=config.db_password,
+                    database=config.db_database,
+                    use_unicode=False
+                )
+                cursor = connection.cursor()
+                cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED;")
+                cursor.close()
+
+                print("Connected to MySQL database")
+                return connection
+            except Error as ex:
+                print(f"Error connecting to MySQL (attempt {attempt + 1}): {ex}")
+                if attempt < cls._max_retries - 1:  # Wait before retrying
+                    time.sleep(cls._retry_delay)
+
+        raise Exception("Max retries reached. Could not connect to MySQL database.")
+
+    @classmethod
+    def pool(cls):
+        if cls._pool is None:
             cls.connect()
+        return cls._pool
+
+    @classmethod
+    def run(cls, operation, retry=False):
+        """
+        Run operation(connection) on a pooled connection. With retry the operation is run again on a new
+        connection if the connection died, only pass it for reads: a write whose commit reached the server
+        before the connection dropped would be written twice. Connections that died while idle are already
+        replaced by the pool's checkout before anything is sent.
+        """
+        with cls._stats_lock:
+            cls._queries += 1
+        cls._thread_stats.queries = getattr(cls._thread_stats, "queries", 0) + 1
+
+        for attempt in range(2):
+            pool = cls.pool()
+            connection = pool.checkout()
+            healthy = True
+            try:
+                return operation(connection)
+            except Error:
+                healthy = pool.is_healthy(connection)
+                if healthy:
+                    connection.rollback()
+                elif retry and attempt == 0:
+                    print("lost database connection, retrying on a new connection")
+                    continue
+                raise
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                pool.checkin(connection, healthy)
 
     @classmethod
     def execute_query(cls, query, params=None, return_last_insert_id=False):
-        with cls._lock:
-            if cls._cursor is None:
-                cls.connect()
+        def execute(connection):
+            cursor = connection.cursor()
             try:
-                cls._cursor.execute(query, params or ())
-                cls._connection.commit()
+                cursor.execute(query, params or ())
+                connection.commit()
                 if return_last_insert_id:
-                    return cls._cursor.lastrowid
-            except Error as ex:
-                print(f"Error executing query: {ex}")
-                if ex.errno in (2006, 2013, 2014, 2047, 2055):  # MySQL server has gone away or lost connection
-                    cls.reconnect()
-                    return cls.execute_query(query, params, return_last_insert_id)
-                cls._connection.rollback()
+                    return cursor.lastrowid
                 return None
-            except Exception as ex:
-                print(f"execute_query exception {ex} for {query}")
-                cls._connection.rollback()
-                return None
-            return None
+            finally:
+                cursor.close()
+
+        try:
+            return cls.run(execute)
+        except Error as ex:
+            print(f"Error executing query: {ex}")
+        except Exception as ex:
+            print(f"execute_query exception {ex} for {query}")
+        return None
+
+    @classmethod
+    def execute_many(cls, query, seq_params, batch_size=500):
+        """Execute query for every parameter tuple in batches on one connection and commit once."""
+        seq_params = list(seq_params)
+        if not seq_params:
+            return
+
+        def execute(connection):
+            cursor = connection.cursor()
+            try:
+                for start in range(0, len(seq_params), batch_size):
+                    cursor.executemany(query, seq_params[start:start + batch_size])
+                connection.commit()
+            finally:
+                cursor.close()
+
+        try:
+            cls.run(execute)
+        except Error as ex:
+            print(f"Error executing batch: {ex}")
+        except Exception as ex:
+            print(f"execute_many exception {ex} for {query}")
 
     @classmethod
     def fetch_results(cls, query, params=None, binary=False):
-        with cls._lock:
-            if cls._cursor is None:
-                cls.connect()
+        def fetch(connection):
+            cursor = connection.cursor()
             try:
-                cls._cursor.execute(query, params or ())
-                results = cls._cursor.fetchall()
+                cursor.execute(query, params or ())
+                return cursor.fetchall()
+            finally:
+                cursor.close()
 
-                if not binary:
-                    # Decode bytes to strings
-                    decoded_results = []
-                    for row in results:
-                        decoded_row = tuple(
-                            column.decode('utf-8') if isinstance(column, bytes) else column for column in row
-                        )
-                        decoded_results.append(decoded_row)
-                    return decoded_results
+        try:
+            results = cls.run(fetch, retry=True)
+        except Error as ex:
+            print(f"Error fetching results: {ex}")
+            return []
+        except Exception as ex:
+            print(f"fetch_results exception {ex} during query {query}")
+            return []
 
-                return results
+        with cls._stats_lock:
+            cls._bytes_fetched += sum(
+                len(column) for row in results for column in row if isinstance(column, (bytes, bytearray))
+            )
 
-            except Error as ex:
-                print(f"Error fetching results: {ex}")
-                if ex.errno in (2006, 2013, 2014, 2047, 2055):  # MySQL server has gone away or lost connection
-                    cls.reconnect()
-                    return cls.fetch_results(query, params, binary)
-                return []
-            except Exception as ex:
-                print(f"fetch_results exception {ex} during query {query}")
-                return []
+        if not binary:
+            # Decode bytes to strings
+            decoded_results = []
+            for row in results:
+                decoded_row = tuple(
+                    column.decode('utf-8') if isinstance(column, bytes) else column for column in row
+                )
+                decoded_results.append(decoded_row)
+            return decoded_results
+
+        return results
+
+    @classmethod
+    def get_query_count(cls):
+        with cls._stats_lock:
+            return cls._queries
+
+    @classmethod
+    def get_thread_query_count(cls):
+        """Number of queries issued by the calling thread."""
+        return getattr(cls._thread_stats, "queries", 0)
+
+    @classmethod
+    def get_bytes_fetched(cls):
+        with cls._stats_lock:
+            return cls._bytes_fetched
+
+    @classmethod
+    def get_stats(cls):
+        stats = {"queries": cls.get_query_count(), "bytes_fetched": cls.get_bytes_fetched()}
+        if cls._pool is not None:
+            stats["pool"] = cls._pool.get_stats()
+        return stats
 
     @classmethod
     def close(cls):
         with cls._lock:
-            if cls._cursor:
-                cls._cursor.close()
-                cls._cursor = None
-            if cls._connection:
-                cls._connection.close()
-                cls._connection = None
+            if cls._pool:
+                cls._pool.close()
+                cls._pool = None
@@ -0,0 +1,84 @@
+import itertools
+import queue
+import threading
+import time
+
+
+class Event:
+    def __init__(self, id, topic, data):
+        self.id = id
+        self.topic = topic
+        self.data = data
+        self.published = time.monotonic()
+
+
+class Subscription:
+    """Queue of events for one subscriber, the oldest events are dropped if the subscriber falls behind."""
+
+    def __init__(self, bus, topics, max_events=256):
+        self.bus = bus
+        self.topics = set(topics)
+        self.events = queue.Queue(maxsize=max_events)
+        self.dropped = 0
+
+    def put(self, event):
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Return the next event, or None if there was none within timeout seconds."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """In-process publish/subscribe, used to push new transcripts and history to players and pages."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = []
+        self.ids = itertools.count(1)
+        self.published = {}
+
+    def subscribe(self, *topics, max_events=256):
+        subscription = Subscription(self, topics, max_events)
+        with self.lock:
+            self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+
+    def publish(self, topic, data):
+        with self.lock:
+            event = Event(next(self.ids), topic, data)
+            self.published[topic] = self.published.get(topic, 0) + 1
+            subscribers = [subscription for subscription in self.subscriptions if topic in subscription.topics]
+
+        for subscription in subscribers:
+            subscription.put(event)
+
+        return event
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "subscribers": len(self.subscriptions),
+                "published": dict(self.published),
+                "dropped": sum(subscription.dropped for subscription in self.subscriptions)
+            }
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+from utils.stats_tools import TimingStats
+
+
+class FetchJob:
+    def __init__(self, session_id, url):
+        self.session_id = session_id
+        self.url = url
+        self.domain = FetchPool.get_domain(url)
+        self.future = Future()
+        self.submitted = time.monotonic()
+
+
+class FetchPool:
+    """
+    Worker threads that fetch pages in parallel, at most max_workers at a time and max_per_domain at a time
+    from any one site. A url that is already queued or being fetched for a session shares the same future.
+    """
+
+    def __init__(self, fetch_page, max_workers=4, max_per_domain=2):
+        self.fetch_page = fetch_page  # fetch_page(session_id, url) returns the page
+        self.max_workers = max_workers
+        self.max_per_domain = max_per_domain
+
+        self.condition = threading.Condition()
+        self.pending = deque()
+        self.in_flight = {}  # (session id, url) -> future
+        self.active_domains = Counter()
+        self.workers = []
+        self.running = False
+
+        # monitoring
+        self.queue_wait = TimingStats()
+        self.fetch_time = TimingStats()
+
+    @staticmethod
+    def get_domain(url):
+        domain = urlparse(url).netloc.lower()
+        return domain[4:] if domain.startswith("www.") else domain
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+
+        self.workers = [threading.Thread(target=self.do_work, daemon=True) for _ in range(self.max_workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+        # fail anything still waiting so callers don't block forever
+        with self.condition:
+            while self.pending:
+                job = self.pending.popleft()
+                self.in_flight.pop((job.session_id, job.url), None)
+                job.future.set_exception(RuntimeError("fetch pool stopped"))
+
+    def submit(self, session_id, url):
+        self.start()
+
+        with self.condition:
+            key = (session_id, url)
+            if key in self.in_flight:
+                return self.in_flight[key]
+
+            job = FetchJob(session_id, url)
+            self.in_flight[key] = job.future
+            self.pending.append(job)
+            self.condition.notify()
+
+        return job.future
+
+    def fetch_all(self, session_id, urls):
+        """Queue every url at once and return their futures in the same order."""
+        return [self.submit(session_id, url) for url in urls]
+
+    def next_job(self):
+        with self.condition:
+            while self.running:
+                # the oldest job whose site isn't at its limit
+                for job in self.pending:
+                    if self.active_domains[job.domain] < self.max_per_domain:
+                        self.pending.remove(job)
+                        self.active_domains[job.domain] += 1
+                        return job
+
+                self.condition.wait()
+
+        return None
+
+    def do_work(self):
+        while self.running:
+            job = self.next_job()
+            if not job:
+                continue
+
+            start = time.monotonic()
+            self.queue_wait.add(start - job.submitted)
+            try:
+                job.future.set_result(self.fetch_page(job.session_id, job.url))
+            except Exception as ex:
+                print(f"fetch {job.url} exception {ex}")
+                job.future.set_exception(ex)
+            finally:
+                self.fetch_time.add(time.monotonic() - start)
+                with self.condition:
+                    self.active_domains[job.domain] -= 1
+                    if not self.active_domains[job.domain]:
+                        del self.active_domains[job.domain]
+                    self.in_flight.pop((job.session_id, job.url), None)
+                    self.condition.notify_all()
+
+    def get_stats(self):
+        with self.condition:
+            queued = len(self.pending)
+            active = sum(self.active_domains.values())
+
+        return {
+            "queued": queued,
+            "active": active,
+            "queue_wait": self.queue_wait.to_dict(),
+            "fetch_time": self.fetch_time.to_dict()
+        }
@@ -1,8 +1,11 @@
 import json
 import re
+from concurrent.futures import as_completed
 
+from systems.summary_worker import SummaryWorker
 from systems.system_base import SystemBase
-from utils.html_tools import HtmlTools
+from systems.turn_context import TurnContext
+from utils import patterns
 from utils.text_tools import TextTools
 
 
@@ -22,6 +25,10 @@ class GameMoves(SystemBase):
 
         self.current_player_index = 0
 
+        # prompt data shared by every prompt in the current turn
+        self.context = TurnContext(self)
+        self.last_turn_stats = {}
+
         self.command_strings = [
             r'^\s*assistant\s*$',
             r'the browser is at this page',
@@ -31,6 +38,7 @@ class GameMoves(SystemBase):
             r'i have finished speaking',
             r'you have finished speaking'
         ]
+        self.command_strings_pattern = patterns.compile_any(self.command_strings, re.MULTILINE | re.IGNORECASE)
 
     def add_to_history(self, role, content):
         if content:
@@ -42,6 +50,9 @@ class GameMoves(SystemBase):
 
                 self.add_session_history(self.session.id, role, content_str)
 
+                if role.startswith("agent-"):
+                    self.context.invalidate("%AGENTS%")
+
             except Exception as ex:
                 print(f"add_to_history exception {ex}")
 
@@ -49,29 +60,46 @@ class GameMoves(SystemBase):
         setting = self.get_session_setting(self.session.id, name)
         setting.value = value
         setting.save()
+        self.context.invalidate("%SETTINGS%")
 
     def do_search(self, search_string):
         try:
             print(f"do_search {search_string}")
             self.app.browser().search(self.session.id, search_string)
+            self.context.invalidate("%SEARCHES%", "%LINKS%")
 
         except Exception as ex:
             print(f"do_search exception {ex}")
 
-    def do_open(self, url):
-        try:
-            print(f"do_open {url}")
-            page = self.app.browser().fetch(self.session.id, url)
-            if page.body and not page.summary:
-                self.summarize_page(page)
-        except Exception as ex:
-            print(f"do_open exception {ex}")
+    def do_open_all(self, urls):
+        """Fetch all the urls in parallel and queue each page to be summarized as soon as it has loaded."""
+        if not urls:
+            return
+
+        print(f"do_open {urls}")
+        futures = self.app.browser().fetch_all(self.session.id, list(dict.fromkeys(urls)))
+
+        for future in as_completed(futures):
+            try:
+                page = future.result()
+                self.context.invalidate("%SEARCHES%", "%LINKS%")
+                if page.body and not page.summary:
+                    self.app.summaries().submit(self.session.id, page)
+            except Exception as ex:
+                print(f"do_open exception {ex}")
 
     def summarize_page(self, page):
         try:
             if not page.summary:
+                # pages saved before their content was summarized elsewhere don't have the shared summary yet
+                page.summary = self.get_content_summary(page.body)
+                if page.summary:
+                    print(f"reusing the summary of {page.url}")
+                    page.save()
+                    self.context.invalidate("%PAGES%", "%CURRENT_PAGE%", "%CURRENT_USER_PAGE%")
+                    return page.summary
 
-                summary_agent = self.get_agent(self.session.summary)
+                summary_agent = self.context.get_agent(self.session.summary)
 
                 print(f"summarizing {page.url}")
                 page.summary = self.app.text_generator().generate_response(
@@ -80,21 +108,34 @@ class GameMoves(SystemBase):
                         "url": page.url,
                         "title": page.title,
                         "body": page.body[:self.max_page_body]
-                    })
+                    }),
+                    cache_key=f"summary/{summary_agent.name}",
+                    owner=self.session.id
                 )
 
                 if page.summary:
                     page.save()
+                    self.context.invalidate("%PAGES%", "%CURRENT_PAGE%", "%CURRENT_USER_PAGE%")
 
         except Exception as ex:
             print(f"handle_page exception {ex}")
 
+        return page.summary
+
     def on_page_load(self, page):
         print(f"on_page_load {page.url}")
         if not page.summary:
-            self.summarize_page(page)
-            if page.summary:
-                self.add_to_history("user", f"user is looking at {page.url}\n\n{page.summary}")
+            # the user's page is summarized ahead of everything else, without holding up the page watcher
+            future = self.app.summaries().submit(self.session.id, page, SummaryWorker.USER_PAGE)
+            future.add_done_callback(lambda done: self.on_page_summarized(page, done))
+
+    def on_page_summarized(self, page, future):
+        if future.cancelled() or future.exception():
+            return
+
+        summary = future.result()
+        if summary:
+            self.add_to_history("user", f"user is looking at {page.url}\n\n{summary}")
 
     def on_user_input(self, user_input):
         self.add_to_history("user", user_input)
@@ -102,11 +143,25 @@ class GameMoves(SystemBase):
     def get_response(self, player, text):
         print(f"generating response for {player.name}")
         response = self.app.text_generator().generate_response(
-            prompt=self.get_game(self.session.game).rules + "\n\n" + self.prepare_prompt(player.prompt),
+            prompt=self.context.get_game().rules + "\n\n" + self.prepare_prompt(player.prompt),
             input=text,
-            history=self.get_user_from_history(self.session.id, self.max_user_history))
+            history=self.get_user_from_history(self.session.id, self.max_user_history),
+            cache_key=f"{self.session.game}/{player.name}",
+            owner=self.session.id)
         return response
 
+    def get_response_stream(self, player, text, exclusive=True):
+        """
+        Stream a player's response, for the agent test page. Game turns don't stream, the judge decides on the
+        whole response before any of it is spoken.
+        """
+        print(f"streaming response for {player.name}")
+        return self.app.text_generator().generate_stream(
+            prompt=self.context.get_game().rules + "\n\n" + self.prepare_prompt(player.prompt),
+            input=text,
+            history=self.get_user_from_history(self.session.id, self.max_user_history),
+            exclusive=exclusive)
+
     def judge_decision(self, content):
         url = ""
 
@@ -116,11 +171,11 @@ class GameMoves(SystemBase):
                 print(f"rejected content due to low entropy {entropy}\n {content}")
                 return url
 
-            judge = self.get_agent(self.session.judge)
+            judge = self.context.get_agent(self.session.judge)
             judge_response = self.get_response(judge, content)
 
             print(f"the judge says {judge_response}")
-            for match in re.finditer(HtmlTools.url_pattern, judge_response, flags=re.IGNORECASE):
+            for match in patterns.URL.finditer(judge_response):
                 url = match.group(0)  # Get the first matched URL
 
             if not url:
@@ -132,10 +187,10 @@ class GameMoves(SystemBase):
     def do_turn(self, turn: str = ""):
         #        print(f"processing {tool.name} commands for {response}")
 
-        # Updated regex pattern to capture commands with either one or two values
-        pattern = r'(?P<command>set|search|get|open)\s*(?:\(\s*"(?P<payload>[^"]+)"(?:\s*,\s*"(?P<value>[^"]+)")?\s*\)|:\s*"(?P<colon_payload>[^"]+)"|\s+"(?P<no_paren_payload>[^"]+)")'
+        # pages to open are collected and fetched together once the other commands have run
+        open_urls = []
 
-        for match in re.finditer(pattern, turn, flags=re.IGNORECASE):
+        for match in patterns.COMMAND.finditer(turn):
             command = match.group('command')
             if command.lower() == 'set':
                 variable = (match.group('payload') or
@@ -148,7 +203,7 @@ class GameMoves(SystemBase):
                            match.group('colon_payload') or
                            match.group('no_paren_payload')).strip()
 
-                payload = re.sub(r'[\"*\']', '', payload)
+                payload = patterns.QUOTES.sub('', payload)
 
             print(f'Command: {command}')
             print(f'Payload: {payload}')
@@ -165,94 +220,46 @@ class GameMoves(SystemBase):
                     case "search":
                         self.do_search(payload)
                     case "get" | "open":
-                        self.do_open(payload)
+                        open_urls.append(payload)
             except Exception as ex:
                 print(f"process_commands {command} {payload} exception {ex}")
 
         # Clean up the response after processing commands
-        response = re.sub(pattern, '', turn).strip()
+        response = patterns.COMMAND.sub('', turn).strip()
         # remove chat actions
-        response = re.sub(r'\*\s*[^*]+\s*\*', '', response)
+        response = patterns.ACTION.sub('', response)
 
         # remove command strings
-        for command in self.command_strings:
-            response = re.sub(command, '', response, flags=re.MULTILINE | re.IGNORECASE)
+        response = self.command_strings_pattern.sub('', response)
 
         # open any urls instead of speaking them
-        for match in re.finditer(HtmlTools.url_pattern, response, flags=re.IGNORECASE):
-            url = match.group(0)  # Get the matched URL
-            self.do_open(url)
+        for match in patterns.URL.finditer(response):
+            open_urls.append(match.group(0))  # Get the matched URL
 
-        response = re.sub(HtmlTools.url_pattern, '', response, flags=re.IGNORECASE).strip()
+        self.do_open_all(open_urls)
+
+        response = patterns.URL.sub('', response).strip()
 
         return response
 
     def prepare_prompt(self, prompt):
-
-        if "%PAGES%" in prompt:
-            pages = self.get_pages(self.session.id, self.max_page_history)
-            prompt = prompt.replace(
-                "%PAGES%",
-                json.dumps(
-                    [{"title": page.title, "url": page.url, "summary": page.summary} for page in pages],
-                    indent=2)
-            )
-        if "%CURRENT_PAGE%" in prompt:
-            pages = self.get_discovered_pages(self.session.id, 1)
-            prompt = prompt.replace(
-                "%CURRENT_PAGE%",
-                json.dumps(
-                    [{"title": page.title, "url": page.url, "summary": page.summary} for page in pages],
-                    indent=2)
-            )
-        if "%CURRENT_USER_PAGE%" in prompt:
-            pages = self.get_user_pages(self.session.id, 1)
-            prompt = prompt.replace(
-                "%CURRENT_USER_PAGE%",
-                json.dumps(
-                    [{"title": page.title, "url": page.url, "summary": page.summary} for page in pages],
-                    indent=2)
-            )
-
-        if "%SEARCHES%" in prompt:
-            results = self.get_search_pages(self.session.id, self.max_search_history)
-            prompt = prompt.replace(
-                "%SEARCHES%",
-                json.dumps(
-                    [
-                        {"search": page.search_term, "rank": page.search_rank, "title": page.title, "url": page.url}
-                        for page in results
-                    ],
-                    indent=2)
-            )
-        if "%SETTINGS%" in prompt:
-            prompt = prompt.replace(
-                "%SETTINGS%",
-                json.dumps(
-                    self.get_session_settings_limited(self.session.id, self.max_settings),
-                    indent=2)
-            )
-        if "%LINKS%" in prompt:
-            pages = self.get_unloaded_pages(self.session.id, self.max_link_history)
-            prompt = prompt.replace(
-                "%LINKS%",
-                json.dumps(
-                    [{"title": page.title, "url": page.url} for page in pages],
-                    indent=2)
-            )
-        if "%AGENTS%" in prompt:
-            prompt = prompt.replace(
-                "%AGENTS%",
-                json.dumps(
-                    self.get_agents_from_history(self.session.id, self.max_agent_history),
-                    indent=2)
-            )
+        for placeholder in self.context.placeholders:
+            if placeholder in prompt:
+                prompt = prompt.replace(placeholder, self.context.get(placeholder))
 
         return prompt
 
     def next_turn(self, previous_response):
         self.session = self.get_session(self.session.id)
+        self.context = TurnContext(self)
+
+        try:
+            return self.play_turn(previous_response)
+        finally:
+            self.last_turn_stats = self.context.get_stats()
+            print(f"turn stats {self.last_turn_stats}")
 
+    def play_turn(self, previous_response):
         players = self.get_session_players(self.session.id)
 
         if players:
@@ -263,7 +270,7 @@ class GameMoves(SystemBase):
                 self.current_player_index = (self.current_player_index + 1) % len(players)
 
             current_player = players[self.current_player_index]
-            current_agent = self.get_agent(current_player.player)
+            current_agent = self.context.get_agent(current_player.player)
 
             response = self.get_response(current_agent, previous_response)
 
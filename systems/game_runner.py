@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import deque
+
+from systems.game_moves import GameMoves
+from utils.stats_tools import TimingStats
+
+
+class GameRunner:
+    """
+    Plays one session on its own thread until it is stopped, each turn paced against the airtime already queued.
+    Keeps the session's turn rate and how long its turns take.
+    """
+
+    def __init__(self, app, session, error_delay=1.0, rate_window=20):
+        self.app = app
+        self.session = session
+        self.game = GameMoves(app, session)
+        self.error_delay = error_delay
+
+        self.stopping = threading.Event()
+        self.thread = None
+        self.last_response = ""
+
+        # monitoring
+        self.lock = threading.Lock()
+        self.started = None
+        self.turns = 0
+        self.errors = 0
+        self.turn_time = TimingStats()
+        self.turn_ends = deque(maxlen=rate_window)  # when the latest turns finished
+
+    @property
+    def running(self):
+        return self.thread is not None and not self.stopping.is_set()
+
+    def start(self):
+        if self.running:
+            return
+
+        self.stopping.clear()
+        self.started = time.monotonic()
+        self.thread = threading.Thread(target=self.do_play, daemon=True)
+        self.thread.start()
+
+    def stop(self, wait=True):
+        """Stop after the current turn, wait for it to finish unless wait is False."""
+        self.stopping.set()
+
+        thread = self.thread
+        if wait and thread and thread is not threading.current_thread():
+            thread.join()
+        self.thread = None
+
+    def play_turn(self):
+        start = time.monotonic()
+        try:
+            self.last_response = self.game.next_turn(self.last_response)
+            return True
+        except Exception as ex:
+            print(f"session {self.session.id} turn exception {ex}")
+            with self.lock:
+                self.errors += 1
+            return False
+        finally:
+            end = time.monotonic()
+            self.turn_time.add(end - start)
+            with self.lock:
+                self.turns += 1
+                self.turn_ends.append(end)
+
+    def do_play(self):
+        while not self.stopping.is_set():
+            self.app.pacer().pace(self.game.session, self.stopping)
+            if self.stopping.is_set():
+                break
+
+            if not self.play_turn():
+                # don't spin on a session that keeps failing, e.g. while the database is down
+                self.stopping.wait(self.error_delay)
+
+    def turns_per_minute(self):
+        with self.lock:
+            ends = list(self.turn_ends)
+            started = self.started
+
+        if len(ends) > 1:
+            return round(60 * (len(ends) - 1) / max(ends[-1] - ends[0], 1e-6), 2)
+        if ends and started is not None:
+            return round(60 / max(ends[0] - started, 1e-6), 2)
+        return 0.0
+
+    def get_stats(self):
+        with self.lock:
+            turns = self.turns
+            errors = self.errors
+            started = self.started
+
+        return {
+            "session": self.session.name,
+            "running": self.running,
+            "uptime": round(time.monotonic() - started, 1) if started is not None else 0.0,
+            "turns": turns,
+            "errors": errors,
+            "turns_per_minute": self.turns_per_minute(),
+            "turn_time": self.turn_time.to_dict(),
+            "last_turn": self.game.last_turn_stats
+        }
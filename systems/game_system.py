@@ -1,53 +1,121 @@
 import threading
 
-from systems.game_moves import GameMoves
+from systems.game_runner import GameRunner
 
 
 class GameSystem:
+    """
+    Plays any number of sessions at once, each on its own GameRunner, sharing the loaded models.
+    The user browser, voice listener and typed input follow the current session, the one started last
+    unless another is chosen with focus.
+    """
+
     def __init__(self, app):
         self.app = app
 
-        self.playing = False
-        self.running = False
-        self.play_thread = None
-        self.current_game = None
-        self.session = None
-        self.last_response = ""
+        self.lock = threading.Lock()
+        self.runners = {}  # session id -> GameRunner
+        self.current_session_id = None
+
+    @property
+    def current_game(self):
+        runner = self.get_runner(self.current_session_id)
+        return runner.game if runner else None
+
+    @property
+    def running(self):
+        with self.lock:
+            return any(runner.running for runner in self.runners.values())
+
+    def get_runner(self, session_id):
+        with self.lock:
+            return self.runners.get(session_id)
+
+    def get_runners(self):
+        with self.lock:
+            return list(self.runners.values())
+
+    def is_playing(self, session_id):
+        runner = self.get_runner(session_id)
+        return bool(runner and runner.running)
 
     def start_playing(self, session):
-        self.running = True
-        self.session = session
-        self.last_response = ""
-        self.current_game = GameMoves(self.app, session)
+        with self.lock:
+            runner = self.runners.get(session.id)
+            if runner and runner.running:
+                self.current_session_id = session.id
+                return runner
 
-        self.play_thread = threading.Thread(target=self.do_play)
-        self.play_thread.start()
+            runner = GameRunner(self.app, session)
+            self.runners[session.id] = runner
+            self.current_session_id = session.id
+
+        self.app.summaries().register(session.id, runner.game.summarize_page)
+        runner.start()
+        return runner
+
+    def focus(self, session_id):
+        """Send the user browser, voice listener and typed input to this session."""
+        if self.is_playing(session_id):
+            self.current_session_id = session_id
+            # move the user browser over if it's already open
+            if self.app.browser_system and self.app.browser_system.page_load_func:
+                self.start_user_browser()
 
     def start_user_browser(self):
-        if self.running and self.current_game:
-            self.app.browser().start_user_browser(self.current_game.session.id, self.on_page_load)
+        if self.current_game:
+            self.app.browser().start_user_browser(self.current_session_id, self.on_page_load)
 
     def start_voice_listener(self):
         self.app.listener().start(self.on_user_input)
 
-    def stop(self):
-        self.running = False
+    def stop(self, session_id=None):
+        """Stop one session, or every session when session_id is None."""
+        with self.lock:
+            if session_id is None:
+                runners = list(self.runners.values())
+                self.runners.clear()
+            else:
+                runner = self.runners.pop(session_id, None)
+                runners = [runner] if runner else []
+
+            if self.current_session_id not in self.runners:
+                # fall back to the most recently started session that's still playing
+                self.current_session_id = next(reversed(self.runners), None)
 
-        if self.play_thread:
-            self.play_thread.join()
-            self.play_thread = None
+        # signal every runner first so they finish their turns together
+        for runner in runners:
+            runner.stopping.set()
 
-        self.current_game = None
+        for runner in runners:
+            runner.stop()
+            self.app.summaries().unregister(runner.session.id)
+            self.app.pacer().forget(runner.session.id)
 
     def on_page_load(self, page):
-        if self.running and self.current_game:
-            self.current_game.on_page_load(page)
+        runner = self.get_runner(page.session_id)
+        if runner and runner.running:
+            runner.game.on_page_load(page)
+
+    def on_user_input(self, user_input, session_id=None):
+        runner = self.get_runner(session_id if session_id is not None else self.current_session_id)
+        if runner and runner.running:
+            runner.game.on_user_input(user_input)
+
+    def get_session_stats(self, session_id):
+        runner = self.get_runner(session_id)
+        if not runner:
+            return None
+
+        stats = runner.get_stats()
+        stats["buffer"] = self.app.pacer().get_session_stats(session_id)
+        # time waiting for the model, only when it's already loaded
+        if self.app.text_generator_system:
+            stats["llm"] = self.app.text_generator_system.get_owner_stats(session_id)
+        return stats
 
-    def on_user_input(self, user_input):
-        if self.running and self.current_game:
-            self.current_game.on_user_input(user_input)
+    def get_stats(self):
+        with self.lock:
+            session_ids = list(self.runners)
 
-    def do_play(self):
-        response = ""
-        while self.running:
-            response = self.current_game.next_turn(response)
+        return {str(session_id): self.get_session_stats(session_id) for session_id in session_ids}
@@ -0,0 +1,161 @@
+import re
+import threading
+import time
+from collections import Counter
+
+import urllib3
+
+from utils.html_tools import HtmlTools
+from utils.stats_tools import TimingStats
+
+
+class FetchResult:
+    def __init__(self, url, html, extracted, elapsed):
+        self.url = url
+        self.html = html
+        self.extracted = extracted  # title, body and links parsed from html
+        self.title = extracted.title
+        self.body = extracted.body
+        self.elapsed = elapsed
+
+
+class HttpFetcher:
+    """
+    Fetches pages with a plain HTTP GET on pooled connections, for pages that don't need a browser.
+    fetch() returns None when the page should be loaded in the browser instead: errors, non html responses,
+    oversized pages and pages that look like they are rendered with javascript.
+    """
+
+    js_markers = [
+        "enable javascript",
+        "javascript is required",
+        "javascript is disabled",
+        "turn on javascript",
+        "requires javascript"
+    ]
+
+    def __init__(self,
+                 connect_timeout=3,
+                 read_timeout=7,
+                 max_bytes=2 * 1024 * 1024,
+                 min_content_length=500,
+                 max_pool_size=4,
+                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:130.0) Gecko/20100101 Firefox/130.0"):
+        self.max_bytes = max_bytes
+        self.min_content_length = min_content_length
+
+        self.http = urllib3.PoolManager(
+            num_pools=50,
+            maxsize=max_pool_size,
+            timeout=urllib3.Timeout(connect=connect_timeout, read=read_timeout),
+            retries=urllib3.Retry(total=1, redirect=5, raise_on_redirect=False),
+            headers={
+                "User-Agent": user_agent,
+                "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                "Accept-Encoding": "gzip, deflate",
+                "Accept-Language": "en-US,en;q=0.5"
+            }
+        )
+
+        # monitoring
+        self.lock = threading.Lock()
+        self.attempts = 0
+        self.hits = 0
+        self.fallbacks = Counter()  # reason -> count
+        self.hit_time = TimingStats()
+        self.fallback_time = TimingStats()
+
+    def fetch(self, url):
+        start = time.monotonic()
+        with self.lock:
+            self.attempts += 1
+
+        try:
+            html, reason = self.get_html(url)
+            if html is not None:
+                extracted = HtmlTools.extract(html)
+                reason = self.needs_browser(html, extracted.body)
+        except Exception as ex:
+            print(f"http fetch {url} exception {ex}")
+            reason = type(ex).__name__
+
+        elapsed = time.monotonic() - start
+        if reason:
+            print(f"http fetch {url} falling back to the browser: {reason}")
+            with self.lock:
+                self.fallbacks[reason] += 1
+            self.fallback_time.add(elapsed)
+            return None
+
+        with self.lock:
+            self.hits += 1
+        self.hit_time.add(elapsed)
+
+        return FetchResult(url, html, extracted, elapsed)
+
+    def get_html(self, url):
+        """Return (html, None) or (None, reason the page can't be used)."""
+        response = self.http.request("GET", url, preload_content=False)
+        try:
+            if response.status != 200:
+                return None, f"status {response.status}"
+
+            content_type = response.headers.get("Content-Type", "")
+            if "html" not in content_type.lower():
+                return None, "not html"
+
+            content_length = response.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+                return None, "too large"
+
+            data = bytearray()
+            for chunk in response.stream(64 * 1024, decode_content=True):
+                data.extend(chunk)
+                if len(data) > self.max_bytes:
+                    return None, "too large"
+
+            return bytes(data).decode(self.get_charset(content_type, data), errors="replace"), None
+        finally:
+            response.release_conn()
+
+    @staticmethod
+    def get_charset(content_type, data):
+        match = re.search(r'charset=["\']?([\w-]+)', content_type, flags=re.I)
+        if not match:
+            match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', bytes(data[:4096]), flags=re.I)
+            if match:
+                return match.group(1).decode("ascii")
+            return "utf-8"
+        return match.group(1)
+
+    def needs_browser(self, html, body):
+        """Return why the page should be loaded in the browser, or None if the fetched content can be used."""
+        if HtmlTools.has_error(body):
+            return "error page"
+
+        if len(body) < self.min_content_length:
+            return "too short"
+
+        lower_html = html.lower()
+        if len(body) < self.min_content_length * 4 and any(marker in lower_html for marker in self.js_markers):
+            return "javascript"
+
+        return None
+
+    def get_stats(self):
+        with self.lock:
+            attempts = self.attempts
+            hits = self.hits
+            fallbacks = dict(self.fallbacks)
+
+        return {
+            "attempts": attempts,
+            "hits": hits,
+            "hit_rate": round(hits / attempts, 3) if attempts else 0.0,
+            "fallbacks": fallbacks,
+            "hit_time": self.hit_time.to_dict(),
+            "fallback_time": self.fallback_time.to_dict()
+        }
+
+    def close(self):
+        self.http.clear()
@@ -4,12 +4,13 @@ import time
 import random
 
 class MediaPlayer:
-    def __init__(self, media_path, vlc_player_path=None):
+    def __init__(self, media_path, vlc_player_path=None, events=None):
         if vlc_player_path:
             os.environ['PATH'] += os.pathsep + vlc_player_path
             os.add_dll_directory(vlc_player_path)
 
         self.media_path = media_path
+        self.events = events  # optional EventBus, gets the player state when it changes
 
         self.fade_interval = 0.1  # Interval between volume changes (seconds)
         self.fade_duration = 3
@@ -47,6 +48,23 @@ class MediaPlayer:
 
         media_list_player.set_media_list(vlc_media_list)
 
+    def get_state(self):
+        state = {"playing": self.playing, "volume": 0, "track": None}
+        try:
+            if self.media_player:
+                state["volume"] = self.media_player.audio_get_volume()
+            if self.media_list_player:
+                media = self.media_list_player.get_media_player().get_media()
+                if media:
+                    state["track"] = os.path.basename(media.get_mrl())
+        except Exception as ex:
+            print(f"media player get_state exception {ex}")
+        return state
+
+    def publish_state(self):
+        if self.events:
+            self.events.publish("media", self.get_state())
+
     def set_volume(self, volume):
         """Set the media player's volume."""
         # print(f"setting volume to {volume}")
@@ -79,6 +97,7 @@ class MediaPlayer:
             self.media_list_player.pause()
 
             self.fade_in()
+            self.publish_state()
 
     def stop(self):
         if self.playing:
@@ -87,6 +106,7 @@ class MediaPlayer:
             self.fade_out()
             self.media_list_player.pause()
             self.playing = False
+            self.publish_state()
 
     def fade_in(self):
         if not self.playing:
@@ -119,6 +139,8 @@ class MediaPlayer:
             if not self.fading:
                 self.set_volume(target_volume)
 
+            self.publish_state()
+
         # Start the fade-in effect in a new thread
 
         self.fade_thread = threading.Thread(target=fade_in_thread)
@@ -154,6 +176,7 @@ class MediaPlayer:
                 self.set_volume(target_volume)
 
             self.fading = False
+            self.publish_state()
 
         self.fade_thread = threading.Thread(target=fade_out_thread)
         self.fade_thread.start()
@@ -164,6 +187,7 @@ class MediaPlayer:
 
         print("next media")
         self.media_list_player.next()
+        self.publish_state()
 
     def previous_media(self):
         if not self.playing:
@@ -171,3 +195,4 @@ class MediaPlayer:
 
         print("previous media")
         self.media_list_player.previous()
+        self.publish_state()
@@ -0,0 +1,113 @@
+import os
+import re
+
+from mysql.connector import Error, errorcode
+
+SQL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "sql")
+
+
+class Migrations:
+    """
+    Brings an existing database up to date with the schema in models/sql.
+    Every file in models/sql/migrations is named <version>_<name>.sql and is applied once, in version order,
+    and recorded in the schema_migrations table. default.sql already includes every migration.
+    MySQL commits each DDL statement as it runs, so a migration can't be rolled back when it fails halfway.
+    Instead every statement must be safe to run again: a migration that failed is rerun from the start on the
+    next startup, and statements whose change is already there are skipped.
+    """
+
+    lock_name = "schema_migrations"
+
+    # errors for DDL whose change was made by an earlier, interrupted run
+    already_applied_errors = {
+        errorcode.ER_TABLE_EXISTS_ERROR,
+        errorcode.ER_DUP_FIELDNAME,
+        errorcode.ER_DUP_KEYNAME,
+        errorcode.ER_CANT_DROP_FIELD_OR_KEY
+    }
+
+    def __init__(self, db, path=os.path.join(SQL_PATH, "migrations"), lock_timeout=60):
+        self.db = db
+        self.path = path
+        self.lock_timeout = lock_timeout  # seconds to wait for another process that is migrating
+
+    @staticmethod
+    def get_version(file_name):
+        match = re.match(r'^(\d+)_.+\.sql$', file_name)
+        return int(match.group(1)) if match else None
+
+    def get_migrations(self):
+        migrations = []
+        for file_name in os.listdir(self.path):
+            version = self.get_version(file_name)
+            if version is not None:
+                migrations.append((version, file_name))
+        return sorted(migrations)
+
+    @staticmethod
+    def split_statements(sql):
+        """Split a script into statements, dropping -- comment lines. Statements end with ; at the end of a line."""
+        lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+        statements = re.split(r';\s*$', "\n".join(lines), flags=re.MULTILINE)
+        return [statement.strip() for statement in statements if statement.strip()]
+
+    def run_script(self, connection, sql):
+        cursor = connection.cursor()
+        try:
+            for statement in self.split_statements(sql):
+                try:
+                    cursor.execute(statement)
+                except Error as ex:
+                    if ex.errno not in self.already_applied_errors:
+                        raise
+                    print(f"migration statement already applied, skipping: {ex}")
+            connection.commit()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def query(connection, query, params=()):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall() if cursor.with_rows else []
+        finally:
+            cursor.close()
+
+    def get_applied(self, connection):
+        with open(os.path.join(SQL_PATH, "schema_migrations.sql"), "r") as file:
+            self.run_script(connection, file.read())
+
+        return {row[0] for row in self.query(connection, "SELECT version FROM schema_migrations;")}
+
+    def apply(self):
+        """Apply the migrations that haven't been applied yet, returns their file names."""
+        # one connection for the whole run, the lock belongs to it, and a failed DDL statement is never retried
+        return self.db.run(self.apply_locked)
+
+    def apply_locked(self, connection):
+        # other app processes starting at the same time wait here and then find nothing left to apply
+        locked = self.query(connection, "SELECT GET_LOCK(%s, %s);", (self.lock_name, self.lock_timeout))
+        if not locked or locked[0][0] != 1:
+            raise RuntimeError(f"timed out after {self.lock_timeout} seconds waiting for another migration")
+
+        try:
+            applied = self.get_applied(connection)
+            done = []
+
+            for version, file_name in self.get_migrations():
+                if version in applied:
+                    continue
+
+                print(f"applying migration {file_name}")
+                with open(os.path.join(self.path, file_name), "r") as file:
+                    self.run_script(connection, file.read())
+
+                self.query(connection, "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                           (version, file_name))
+                connection.commit()
+                done.append(file_name)
+
+            return done
+        finally:
+            self.query(connection, "SELECT RELEASE_LOCK(%s);", (self.lock_name,))
@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import Counter
+
+from utils.stats_tools import TimingStats
+
+
+class PageReadiness:
+    """
+    Waits until a page in a webdriver browser has loaded instead of sleeping for a fixed time.
+    A page is ready once document.readyState is complete, the network is idle (when a network_idle check is
+    given) and the size of the DOM hasn't changed for stable_interval seconds. Every stage shares one timeout.
+    """
+
+    ready_state_script = "return document.readyState;"
+    dom_size_script = "return document.body ? document.body.innerHTML.length : 0;"
+
+    def __init__(self, timeout=10, stable_interval=0.5, poll_interval=0.1):
+        self.timeout = timeout
+        self.stable_interval = stable_interval
+        self.poll_interval = poll_interval
+
+        # monitoring
+        self.lock = threading.Lock()
+        self.timeouts = Counter()  # stage -> count
+        self.stage_time = {
+            "ready_state": TimingStats(),
+            "network_idle": TimingStats(),
+            "dom_stable": TimingStats()
+        }
+        self.total_time = TimingStats()
+
+    def wait(self, browser, network_idle=None, timeout=None):
+        """Block until the page in browser is ready or the timeout has passed, returns the seconds waited."""
+        start = time.monotonic()
+        deadline = start + (timeout or self.timeout)
+
+        self.run_stage("ready_state", deadline, lambda: browser.execute_script(self.ready_state_script) == "complete")
+
+        if network_idle:
+            self.run_stage("network_idle", deadline, network_idle)
+
+        self.run_stage("dom_stable", deadline, self.dom_stable_check(browser))
+
+        elapsed = time.monotonic() - start
+        self.total_time.add(elapsed)
+        return elapsed
+
+    def run_stage(self, stage, deadline, is_ready):
+        start = time.monotonic()
+        try:
+            while not is_ready():
+                if time.monotonic() + self.poll_interval > deadline:
+                    with self.lock:
+                        self.timeouts[stage] += 1
+                    break
+                time.sleep(self.poll_interval)
+        except Exception as ex:
+            print(f"page readiness {stage} exception {ex}")
+
+        self.stage_time[stage].add(time.monotonic() - start)
+
+    def dom_stable_check(self, browser):
+        last = {"size": None, "changed": time.monotonic()}
+
+        def is_stable():
+            size = browser.execute_script(self.dom_size_script)
+            now = time.monotonic()
+            if size != last["size"]:
+                last["size"] = size
+                last["changed"] = now
+                return False
+            return now - last["changed"] >= self.stable_interval
+
+        return is_stable
+
+    def get_stats(self):
+        with self.lock:
+            timeouts = dict(self.timeouts)
+
+        stats = {stage: timing.to_dict() for stage, timing in self.stage_time.items()}
+        stats["total"] = self.total_time.to_dict()
+        stats["timeouts"] = timeouts
+        return stats
@@ -0,0 +1,89 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class PrefixCache:
+    """
+    Bounded LRU of model past key values for prompt prefixes, keyed by a hash of the prefix token ids.
+    A prefix is cached once two prompts with the same key (e.g. game and agent) are seen to share it.
+    """
+
+    def __init__(self, max_entries=4, min_prefix_tokens=64, max_keys=64):
+        self.max_entries = max_entries
+        self.min_prefix_tokens = min_prefix_tokens
+        self.max_keys = max_keys
+
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # prefix hash -> (prefix token ids, past key values)
+        self.last_tokens = OrderedDict()  # key -> token ids of the last prompt seen for that key
+
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+
+    @staticmethod
+    def hash_tokens(token_ids):
+        return hashlib.sha256(",".join(map(str, token_ids)).encode()).hexdigest()
+
+    def lookup(self, token_ids):
+        """Return (prefix length, past key values) for the longest cached prefix of token_ids."""
+        token_ids = tuple(token_ids)
+
+        with self.lock:
+            best_hash = None
+            best_length = 0
+            for prefix_hash, (prefix, _) in self.entries.items():
+                # at least one token has to be left over for the model to process
+                if best_length < len(prefix) < len(token_ids) and token_ids[:len(prefix)] == prefix:
+                    best_hash = prefix_hash
+                    best_length = len(prefix)
+
+            if best_hash is None:
+                self.misses += 1
+                return 0, None
+
+            self.entries.move_to_end(best_hash)
+            self.hits += 1
+            self.reused_tokens += best_length
+            return best_length, self.entries[best_hash][1]
+
+    def shared_prefix(self, key, token_ids):
+        """Remember token_ids for key and return how many leading tokens it shares with the previous prompt."""
+        token_ids = tuple(token_ids)
+
+        with self.lock:
+            previous = self.last_tokens.pop(key, ())
+            self.last_tokens[key] = token_ids
+            while len(self.last_tokens) > self.max_keys:
+                self.last_tokens.popitem(last=False)
+
+        length = 0
+        for a, b in zip(previous, token_ids[:-1]):
+            if a != b:
+                break
+            length += 1
+
+        return length if length >= self.min_prefix_tokens else 0
+
+    def store(self, prefix_ids, past_key_values):
+        prefix_ids = tuple(prefix_ids)
+
+        with self.lock:
+            self.entries[self.hash_tokens(prefix_ids)] = (prefix_ids, past_key_values)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.last_tokens.clear()
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reused_tokens": self.reused_tokens
+            }
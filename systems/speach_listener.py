@@ -1,5 +1,3 @@
-from vosk import Model, KaldiRecognizer
-import pyaudio
 import threading
 import json
 import time
@@ -18,7 +16,18 @@ class SpeachListener:
         self.model = None
         self.recognizer = None
 
+    def load_model(self):
+        # vosk is only imported once listening is used
+        if not self.model:
+            from vosk import Model, KaldiRecognizer
+
+            model = Model(self.model_path)
+            self.recognizer = KaldiRecognizer(model, 16000)
+            self.model = model
+
     def open_mic(self):
+        import pyaudio
+
         self.mic = pyaudio.PyAudio()
         self.stream = self.mic.open(
             format=pyaudio.paInt16,
@@ -93,9 +102,7 @@ class SpeachListener:
 
     def start(self, callback):
         if not self.running:
-            if not self.model:
-                self.model = Model(self.model_path)
-                self.recognizer = KaldiRecognizer(self.model, 16000)
+            self.load_model()
             self.running = True
             self.callback = callback
             self.listen_thread.start()
@@ -0,0 +1,233 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from systems.system_base import SystemBase
+from utils.stats_tools import TimingStats
+
+
+class SummaryJob:
+    def __init__(self, session_id, page, priority):
+        self.session_id = session_id
+        self.page = page
+        self.priority = priority
+        self.future = Future()
+        self.submitted = time.monotonic()
+
+
+class SummaryWorker(SystemBase):
+    """
+    Summarizes pages on a background thread so game turns and the page watcher don't wait on the model.
+    Each session registers the function that summarizes its pages. A page that is already queued or being
+    summarized shares one future, the page the user is looking at goes to the front of the queue, and when
+    the queue is empty the worker backfills pages that were saved without a summary. A page the backfill
+    couldn't summarize is left out of it for skip_interval seconds, the max_skipped most recent ones are kept.
+    """
+
+    USER_PAGE = 0
+    OPENED_PAGE = 1
+    BACKFILL = 2
+
+    def __init__(self, app, backfill_batch=5, idle_interval=10, skip_interval=600, max_skipped=500):
+        super().__init__(app)
+
+        self.backfill_batch = backfill_batch
+        self.idle_interval = idle_interval
+        self.skip_interval = skip_interval
+        self.max_skipped = max_skipped
+
+        self.condition = threading.Condition()
+        self.queue = []  # heap of (priority, order, key)
+        self.order = itertools.count()
+        self.pending = {}  # (session id, url) -> job waiting in the queue
+        self.in_flight = {}  # (session id, url) -> job being summarized
+        self.sessions = {}  # session id -> summarize(page), returns the summary
+        self.skipped = OrderedDict()  # (session id, url) -> when backfill may retry a page it failed to summarize
+        self.next_backfill = 0
+        self.running = False
+        self.worker = None
+
+        # monitoring
+        self.summarized = 0
+        self.backfilled = 0
+        self.deduped = 0
+        self.latency = TimingStats()
+        self.summary_time = TimingStats()
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+
+        self.worker = threading.Thread(target=self.do_work, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        if self.worker:
+            self.worker.join()
+            self.worker = None
+
+        # fail anything still waiting so callers don't block forever
+        with self.condition:
+            for job in self.pending.values():
+                job.future.set_exception(RuntimeError("summary worker stopped"))
+            self.pending.clear()
+            self.queue.clear()
+
+    def register(self, session_id, summarize):
+        self.start()
+
+        with self.condition:
+            self.sessions[session_id] = summarize
+            self.next_backfill = 0
+            self.condition.notify()
+
+    def unregister(self, session_id):
+        with self.condition:
+            self.sessions.pop(session_id, None)
+            for key in [key for key in self.pending if key[0] == session_id]:
+                self.pending.pop(key).future.cancel()
+
+    def submit(self, session_id, page, priority=OPENED_PAGE):
+        """Queue page to be summarized, returns a future for the summary."""
+        key = (session_id, page.url)
+
+        with self.condition:
+            job = self.in_flight.get(key) or self.pending.get(key)
+            if job:
+                self.deduped += 1
+                if key in self.pending and priority < job.priority:
+                    job.priority = priority
+                    heapq.heappush(self.queue, (priority, next(self.order), key))
+                    self.condition.notify()
+                return job.future
+
+            job = SummaryJob(session_id, page, priority)
+            if not self.running or session_id not in self.sessions:
+                job.future.set_exception(RuntimeError(f"no summarizer for session {session_id}"))
+                return job.future
+
+            self.pending[key] = job
+            heapq.heappush(self.queue, (priority, next(self.order), key))
+            self.condition.notify()
+
+        return job.future
+
+    def queued(self, session_id):
+        """Pages of the session waiting to be summarized or being summarized."""
+        with self.condition:
+            return (sum(1 for key in self.pending if key[0] == session_id) +
+                    sum(1 for key in self.in_flight if key[0] == session_id))
+
+    def next_job(self):
+        with self.condition:
+            while self.running:
+                while self.queue:
+                    priority, _, key = heapq.heappop(self.queue)
+                    job = self.pending.get(key)
+                    # entries left behind when a job was moved up the queue or cancelled are skipped
+                    if job and job.priority == priority:
+                        del self.pending[key]
+                        self.in_flight[key] = job
+                        return job
+
+                if time.monotonic() >= self.next_backfill and self.sessions:
+                    return None
+
+                self.condition.wait(max(0.0, self.next_backfill - time.monotonic()) or self.idle_interval)
+
+        return None
+
+    def skip(self, key):
+        with self.condition:
+            self.skipped.pop(key, None)
+            self.skipped[key] = time.monotonic() + self.skip_interval
+            while len(self.skipped) > self.max_skipped:
+                self.skipped.popitem(last=False)
+
+    def get_skipped_urls(self, session_id):
+        """Urls of the session's pages backfill shouldn't retry yet, forgets the ones that may be retried."""
+        now = time.monotonic()
+        with self.condition:
+            for key in [key for key, retry_at in self.skipped.items() if retry_at <= now]:
+                del self.skipped[key]
+            return [url for skipped_session_id, url in self.skipped if skipped_session_id == session_id]
+
+    def backfill(self):
+        """Queue pages that were saved without a summary, waits idle_interval once there are none left."""
+        with self.condition:
+            session_ids = list(self.sessions)
+
+        queued = 0
+        for session_id in session_ids:
+            skipped = self.get_skipped_urls(session_id)
+            try:
+                pages = self.get_unsummarized_pages(session_id, self.backfill_batch, exclude_urls=skipped)
+            except Exception as ex:
+                print(f"summary backfill exception {ex}")
+                continue
+
+            for page in pages:
+                key = (session_id, page.url)
+                if page.body:
+                    with self.condition:
+                        known = key in self.pending or key in self.in_flight or key in self.skipped
+                    if not known:
+                        self.submit(session_id, page, self.BACKFILL)
+                        queued += 1
+
+        if not queued:
+            with self.condition:
+                self.next_backfill = time.monotonic() + self.idle_interval
+
+    def do_work(self):
+        while self.running:
+            job = self.next_job()
+            if not job:
+                if self.running:
+                    self.backfill()
+                continue
+
+            key = (job.session_id, job.page.url)
+            start = time.monotonic()
+            try:
+                with self.condition:
+                    summarize = self.sessions.get(job.session_id)
+                summary = summarize(job.page) if summarize else None
+                if not summary and job.priority == self.BACKFILL:
+                    self.skip(key)
+                job.future.set_result(summary)
+            except Exception as ex:
+                print(f"summarize {job.page.url} exception {ex}")
+                self.skip(key)
+                job.future.set_exception(ex)
+            finally:
+                now = time.monotonic()
+                self.summary_time.add(now - start)
+                self.latency.add(now - job.submitted)
+                with self.condition:
+                    self.in_flight.pop(key, None)
+                    self.summarized += 1
+                    if job.priority == self.BACKFILL:
+                        self.backfilled += 1
+
+    def get_stats(self):
+        with self.condition:
+            return {
+                "queued": len(self.pending),
+                "in_flight": len(self.in_flight),
+                "summarized": self.summarized,
+                "backfilled": self.backfilled,
+                "deduped": self.deduped,
+                "skipped": len(self.skipped),
+                "latency": self.latency.to_dict(),
+                "summary_time": self.summary_time.to_dict()
+            }
@@ -1,5 +1,6 @@
 from models.agent_model import AgentModel
 from models.game_model import GameModel
+from models.page_content_model import PageContentModel
 from models.page_model import PageModel
 from models.session_model import SessionModel
 from models.session_history_model import SessionHistoryModel
@@ -33,6 +34,17 @@ class SystemBase:
     def get_voice(self, name):
         return VoiceModel(self.app.db(), name)
 
+    def save_voice(self, voice):
+        voice.save()
+        # the speech system keeps a voice's latents until it is told the sample changed
+        if self.app.speech_system:
+            self.app.speech_system.forget_voice(voice.name)
+
+    def delete_voice(self, voice):
+        voice.delete()
+        if self.app.speech_system:
+            self.app.speech_system.forget_voice(voice.name)
+
     def get_sessions(self):
         return SessionModel.get_all(self.app.db())
 
@@ -70,6 +82,9 @@ class SystemBase:
     def get_transcripts(self):
         return SessionTranscriptModel.get_all(self.app.db())
 
+    def get_transcripts_page(self, per_page, after=None, before=None, session_id=None):
+        return SessionTranscriptModel.get_page(self.app.db(), per_page, after, before, session_id)
+
     def get_session_transcript(self, transcript_id):
         return SessionTranscriptModel.get(self.app.db(), transcript_id)
 
@@ -82,19 +97,20 @@ class SystemBase:
             agent=agent,
             content=content)
         transcript.save()
+        if not transcript.id:
+            # execute_query already printed why, players only play transcripts that have an id
+            print(f"transcript for session {session_id} by {agent} was not saved")
+            return transcript
 
-    def get_session_transcripts_since(self, session_id, timestamp):
-        return SessionTranscriptModel.get_new_session_transcripts_since(
-            self.app.db(),
-            session_id,
-            timestamp
-        )
+        # players waiting for transcripts get it straight away instead of on their next poll
+        self.app.events().publish("transcript", transcript)
+        return transcript
 
-    def get_transcripts_since(self, timestamp):
-        return SessionTranscriptModel.get_new_transcripts_since(
-            self.app.db(),
-            timestamp
-        )
+    def get_transcripts_after_id(self, transcript_id, session_id=None):
+        return SessionTranscriptModel.get_new_transcripts_after_id(self.app.db(), transcript_id, session_id)
+
+    def get_max_transcript_id(self):
+        return SessionTranscriptModel.get_max_id(self.app.db())
 
     def get_session_history(self, session_id):
         return SessionHistoryModel.get_by_session_id(self.app.db(), session_id)
@@ -109,6 +125,8 @@ class SystemBase:
                                       role=role,
                                       content=content)
         history.save()
+
+        self.app.events().publish("history", history)
         return history
 
     def get_history(self, history_id):
@@ -145,14 +163,23 @@ class SystemBase:
         return users
 
     def get_pages(self, session_id, max_results):
-        return PageModel.get_summarized(self.app.db(), session_id, 1, max_results)
+        return PageModel.get_summarized(self.app.db(), session_id, 1, max_results,
+                                        columns=PageModel.summary_columns)
+
+    def get_unsummarized_pages(self, session_id, max_results, exclude_urls=()):
+        return PageModel.get_unsummarized_pages(self.app.db(), session_id, max_results, exclude_urls=exclude_urls)
 
     def get_unloaded_pages(self, session_id, max_results):
-        return PageModel.get_unloaded_pages(self.app.db(), session_id, max_results)
+        return PageModel.get_unloaded_pages(self.app.db(), session_id, max_results,
+                                            columns=PageModel.link_columns)
 
     def get_last_page(self, session_id):
         return PageModel.get_summarized(self.app.db(), session_id, 1, 1)
 
+    def get_content_summary(self, body):
+        """The summary already written for a page body, in any session and under any url."""
+        return PageContentModel.get_summary(self.app.db(), PageContentModel.get_content_hash(body)) if body else None
+
     def get_session_page(self, session_id, url):
         return PageModel.get_by_url(self.app.db(), url, session_id)
 
@@ -160,14 +187,16 @@ class SystemBase:
         return PageModel.get_by_search_term(self.app.db(), session_id, search_term, max_results)
 
     def get_search_pages(self, session_id, max_results):
-        return PageModel.get_search_results(self.app.db(), session_id, max_results)
+        return PageModel.get_search_results(self.app.db(), session_id, max_results,
+                                            columns=PageModel.search_columns)
 
     def get_user_pages(self, session_id, max_pages):
         return PageModel.get_by_parent_url(
             self.app.db(),
             self.user_browser_string,
             session_id,
-            max_pages
+            max_pages,
+            columns=PageModel.summary_columns
         )
 
     def get_discovered_pages(self, session_id, max_pages):
@@ -175,5 +204,6 @@ class SystemBase:
             self.app.db(),
             self.user_browser_string,
             session_id,
-            max_pages
+            max_pages,
+            columns=PageModel.summary_columns
         )
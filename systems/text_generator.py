@@ -1,34 +1,69 @@
+import copy
 import gc
 import textwrap
 from datetime import datetime
 import threading
+import time
 
 import torch
 import transformers
 
+from systems.batch_scheduler import BatchScheduler
+from systems.prefix_cache import PrefixCache
 from utils.date_tools import DateTools
+from utils.stats_tools import TimingStats
 
 
 class TextGenerator:
     def __init__(self,
                  model_path: str = "models/Meta-Llama-3.1-8B-Instruct",
                  max_tokens: int = 256,
-                 cuda_lock: threading.Lock = threading.Lock()):
+                 cuda_lock: threading.Lock = threading.Lock(),
+                 max_batch_size: int = 4,
+                 batch_window: float = 0.05,
+                 max_padded_tokens: int = 8192,
+                 prefix_cache_size: int = 4,
+                 min_prefix_tokens: int = 64):
         """
         Initializes the ChatbotModel with a path to the local LLM model.
         Args:
             model_path (str): The file path to the pretrained local LLM model (can be GGUF or transformer-supported).
             max_tokens (int): The maximum number of tokens that the input to the model can have.
+            max_batch_size (int): The most prompts generated together in one batch.
+            batch_window (float): Seconds to wait for more prompts before running a batch.
+            max_padded_tokens (int): Limit on batch size times the longest padded prompt plus new tokens.
+            prefix_cache_size (int): Number of prompt prefixes to keep past key values for, 0 disables caching.
+            min_prefix_tokens (int): Shortest shared prefix worth caching.
         """
         self.model_path = model_path
         self.max_tokens = max_tokens
         self.pipeline = None
         self.cuda_lock = cuda_lock
+        # one generation on the model at a time, batches and streams alike, cuda_lock is shared with speech synthesis
+        self.generation_lock = threading.Lock()
         self.log_path = "prompt-log.txt"
         self.enable_logging = False
         self.model_loaded = False
         self.ready_gate = threading.Event()
 
+        self.scheduler = BatchScheduler(
+            self.run_batch,
+            max_batch_size=max_batch_size,
+            batch_window=batch_window,
+            max_padded_tokens=max_padded_tokens,
+            count_tokens=self.count_tokens
+        )
+
+        self.first_token_time = TimingStats()
+
+        # extra arguments for every generation, e.g. {"do_sample": False} for repeatable output
+        self.generation_kwargs = {}
+
+        self.prefix_cache = None
+        if prefix_cache_size > 0:
+            self.prefix_cache = PrefixCache(max_entries=prefix_cache_size, min_prefix_tokens=min_prefix_tokens)
+        self.prefix_encode_time = TimingStats()
+
     def log(self, entry):
         if self.enable_logging:
             try:
@@ -38,16 +73,15 @@ class TextGenerator:
             except Exception as ex:
                 print(f"log exception {ex} for {entry}")
 
-    def generate_response(self, prompt: str = "", input: str = "", history: list = None) -> str:
-        self.wait_for_ready()
-
+    @staticmethod
+    def build_input_records(prompt: str = "", input: str = "", history: list = None) -> list:
         current = datetime.now()
         date = DateTools.human_readable_date(current)
-        time = DateTools.human_readable_time(current)
+        time_of_day = DateTools.human_readable_time(current)
 
         input_records = [{
             "role": "system",
-            "content": prompt.replace('DATE', date).replace('TIME', time)
+            "content": prompt.replace('DATE', date).replace('TIME', time_of_day)
         }]
 
         if history and isinstance(history, list) and len(history) > 0:
@@ -58,28 +92,184 @@ class TextGenerator:
             next_prompt = {"role": "user", "content": clean_input}
             input_records.append(next_prompt)
 
+        return input_records
+
+    def generate_response(self, prompt: str = "", input: str = "", history: list = None, cache_key: str = None,
+                          owner=None) -> str:
+        """
+        Generate a response to the prompt.
+        Args:
+            cache_key (str): Prompts submitted with the same key, e.g. the game and agent, reuse the
+                             past key values of the prefix they share.
+            owner: Who the response is for, e.g. the session id. Owners take turns on the model.
+        """
+        self.wait_for_ready()
+
+        input_records = self.build_input_records(prompt, input, history)
+
         self.log("INPUT\n======\n")
         self.log(input_records)
-        gc.collect()
 
-        with self.cuda_lock:
+        try:
+            # the scheduler batches this prompt with any others submitted at the same time
+            response = self.scheduler.submit(input_records, self.max_tokens, cache_key, owner).result()
+
+            self.log("RESPONSE\n======\n")
+            self.log(response)
+
+            return response.strip()
+        except Exception as ex:
+            print(f"generate_response exception {ex}")
+
+        return ""
+
+    def generate_stream(self, prompt: str = "", input: str = "", history: list = None, exclusive: bool = True):
+        """
+        Generate a response and yield the text as it is produced.
+        Args:
+            exclusive (bool): Hold the cuda lock for the whole generation. Pass False to let speech synthesis
+                              interleave with generation, both models are already loaded on the GPU. The
+                              generation lock is held either way, so batches wait for the stream to finish.
+        """
+        self.wait_for_ready()
+
+        input_records = self.build_input_records(prompt, input, history)
+        self.log("INPUT\n======\n")
+        self.log(input_records)
+
+        tokenizer = self.pipeline.tokenizer
+        model = self.pipeline.model
+
+        input_ids = tokenizer.apply_chat_template(
+            input_records,
+            add_generation_prompt=True,
+            return_tensors="pt"
+        ).to(model.device)
+
+        streamer = transformers.TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+
+        def generate():
             try:
+                with self.generation_lock:
+                    if exclusive:
+                        self.cuda_lock.acquire()
+                    try:
+                        model.generate(
+                            input_ids,
+                            attention_mask=torch.ones_like(input_ids),
+                            max_new_tokens=self.max_tokens,
+                            pad_token_id=tokenizer.pad_token_id,
+                            streamer=streamer,
+                            **self.generation_kwargs
+                        )
+                    finally:
+                        if exclusive:
+                            self.cuda_lock.release()
+            except Exception as ex:
+                print(f"generate_stream exception {ex}")
+                # unblock the reader
+                streamer.end()
+
+        start = time.monotonic()
+        threading.Thread(target=generate, daemon=True).start()
+
+        response = ""
+        for text in streamer:
+            if text:
+                if not response:
+                    self.first_token_time.add(time.monotonic() - start)
+                response += text
+                yield text
+
+        self.log("RESPONSE\n======\n")
+        self.log(response)
 
-                # Use transformers to generate response
+    def count_tokens(self, input_records):
+        if not self.pipeline:
+            return 0
+        return len(self.pipeline.tokenizer.apply_chat_template(input_records, tokenize=True))
+
+    def run_batch(self, requests):
+        gc.collect()
+
+        # streams don't go through the scheduler, wait for one that is generating
+        with self.generation_lock:
+            if len(requests) == 1 and requests[0].cache_key and self.prefix_cache:
+                return [self.run_cached(requests[0])]
+
+            with self.cuda_lock:
+                # Use transformers to generate responses for the whole batch
                 outputs = self.pipeline(
-                    input_records,
-                    max_new_tokens=self.max_tokens
+                    [request.records for request in requests],
+                    max_new_tokens=requests[0].max_new_tokens,
+                    batch_size=len(requests),
+                    **self.generation_kwargs
                 )
-                response = outputs[0]["generated_text"][-1]["content"]
 
-                self.log("RESPONSE\n======\n")
-                self.log(response)
+        responses = []
+        for output in outputs:
+            # each conversation in a batch returns a list of generated sequences
+            if isinstance(output, list):
+                output = output[0]
+            responses.append(output["generated_text"][-1]["content"])
 
-                return response.strip()
-            except Exception as ex:
-                print(f"generate_response exception {ex}")
+        return responses
 
-        return ""
+    def run_cached(self, request):
+        """Generate a response resuming from the cached past key values of the prompt's prefix."""
+        tokenizer = self.pipeline.tokenizer
+        model = self.pipeline.model
+
+        input_ids = tokenizer.apply_chat_template(
+            request.records,
+            add_generation_prompt=True,
+            return_tensors="pt"
+        ).to(model.device)
+        token_ids = input_ids[0].tolist()
+
+        with self.cuda_lock:
+            with torch.no_grad():
+                prefix_length, past_key_values = self.prefix_cache.lookup(token_ids)
+                shared_length = self.prefix_cache.shared_prefix(request.cache_key, token_ids)
+
+                if past_key_values is None and shared_length:
+                    # encode the prefix shared with the last prompt once and keep it for the next ones
+                    start = time.monotonic()
+                    past_key_values = transformers.DynamicCache()
+                    model(input_ids[:, :shared_length], past_key_values=past_key_values, use_cache=True)
+                    self.prefix_encode_time.add(time.monotonic() - start)
+
+                    self.prefix_cache.store(token_ids[:shared_length], past_key_values)
+                    prefix_length = shared_length
+
+                kwargs = dict(self.generation_kwargs)
+                if past_key_values is not None:
+                    # generate extends the cache in place, work on a copy so the prefix stays reusable
+                    kwargs["past_key_values"] = copy.deepcopy(past_key_values)
+
+                output = model.generate(
+                    input_ids,
+                    attention_mask=torch.ones_like(input_ids),
+                    max_new_tokens=request.max_new_tokens,
+                    pad_token_id=tokenizer.pad_token_id,
+                    **kwargs
+                )
+
+        if prefix_length:
+            print(f"reused {prefix_length} of {len(token_ids)} prompt tokens for {request.cache_key}")
+
+        return tokenizer.decode(output[0, input_ids.shape[1]:], skip_special_tokens=True)
+
+    def get_stats(self):
+        stats = self.scheduler.get_stats()
+        if self.prefix_cache:
+            stats["prefix_cache"] = self.prefix_cache.get_stats()
+            stats["prefix_cache"]["encode_time"] = self.prefix_encode_time.to_dict()
+        stats["time_to_first_token"] = self.first_token_time.to_dict()
+        return stats
+
+    def get_owner_stats(self, owner):
+        return self.scheduler.get_owner_stats(owner)
 
     def wait_for_ready(self):
         self.ready_gate.wait()
@@ -95,11 +285,21 @@ class TextGenerator:
                 self.pipeline = transformers.pipeline(
                     "text-generation",
                     model=self.model_path,
-                    model_kwargs={"torch_dtype": torch.bfloat16},
+                    model_kwargs={"torch_dtype": torch.bfloat16 if torch.cuda.is_available() else torch.float32},
                     device_map="auto"
                 )
+
+                # batched generation pads prompts on the left so every prompt ends where generation starts
+                tokenizer = self.pipeline.tokenizer
+                tokenizer.padding_side = "left"
+                if tokenizer.pad_token_id is None:
+                    tokenizer.pad_token = tokenizer.eos_token
             except Exception as ex:
                 print(f"load_model exception {ex}")
             finally:
                 self.model_loaded = True
+                self.scheduler.start()
                 self.ready_gate.set()
+
+    def stop(self):
+        self.scheduler.stop()
@@ -1,19 +1,15 @@
 import os
-import re
 import threading
+import time
 import queue
 import tempfile
-import wave
-
-import pyaudio
-import soundfile as sf
-
-import pyttsx3
-
-from TTS.tts.configs.xtts_config import XttsConfig
-from TTS.tts.models.xtts import Xtts
 
+from systems.audio_cache import AudioCache
+from systems.audio_pipeline import AudioPipeline, PyAudioSink, to_pcm16
+from utils.stats_tools import TimingStats
 from systems.system_base import SystemBase
+from systems.voice_latent_cache import VoiceLatentCache
+from utils import patterns
 from utils.text_tools import TextTools
 
 
@@ -23,7 +19,13 @@ class TextToSpeach(SystemBase):
                  tmp_path: str = "tmp",
                  default_voice: str = "en_sample",
                  model_path: str = "models/XTTS-v2",
-                 cuda_lock: threading.Lock = threading.Lock()):
+                 cuda_lock: threading.Lock = threading.Lock(),
+                 max_audio_chunks: int = 8,
+                 audio_sink=None,
+                 voice_latent_path: str = "voice_latents",
+                 precompute_voices: bool = False,
+                 audio_cache_path: str = "audio_cache",
+                 audio_cache_max_bytes: int = 512 * 1024 * 1024):
         super().__init__(app)
 
         temp_dir = tmp_path
@@ -31,207 +33,324 @@ class TextToSpeach(SystemBase):
 
         self.tmp_path = tmp_path
         self.model_path = model_path
+        self.model_id = os.path.basename(os.path.normpath(model_path))
         self.ready_gate = threading.Event()
         self.cuda_lock = cuda_lock
 
-        # thread for playing audio
-        self.audio_queue = queue.Queue()
-        self.audio_thread = threading.Thread(target=self.do_audio)
+        # synthesized audio is queued in memory and played on one output stream while the next part is generated
+        self.audio_pipeline = AudioPipeline(audio_sink or PyAudioSink(),
+                                            max_chunks=max_audio_chunks,
+                                            on_start=self.start_playing,
+                                            on_stop=self.stop_playing)
 
         # thread for generating audio samples with tts model
         self.speak_thread = threading.Thread(target=self.do_speak)
         self.speak_queue = queue.Queue()
 
-        self.playing = False
         self.running = False
         self.model_loaded = False
-        self.audio_count = 0
         self.max_split_length = 80
-        self.clearing = False
-        self.clear_lock = threading.Lock()
 
-        # use pytts as a fallback
-        self.pytts = pyttsx3.init()
-        self.pytts_voices = self.pytts.getProperty('voices')
-        self.pytts.setProperty('voice', self.pytts_voices[1].id)
+        # use pytts as a fallback, started the first time it is needed
+        self.pytts = None
 
-        self.pyaudio = pyaudio.PyAudio()
         # text to speach model
         self.default_voice = default_voice
         self.tts_model = None
-        self.speaker_embedding = None
-        self.gpt_cond_latent = None
+        self.model_lock = threading.Lock()
         self.idle_func = None
 
-        self.voice_cache = {}
+        self.voice_cache = {}  # voice name -> (sample hash, latents, sample file stamp)
+        self.voice_locks = {}  # voice name -> lock held while its latents are loaded
+        self.voice_locks_lock = threading.Lock()
+        self.voice_latent_cache = VoiceLatentCache(voice_latent_path)
+        self.precompute = precompute_voices
+
+        # speech that has been synthesized before is played from disk, disabled with a budget of 0 bytes
+        self.audio_cache = AudioCache(audio_cache_path, audio_cache_max_bytes) if audio_cache_max_bytes else None
+
+        # monitoring
+        self.voice_loads = {"memory": 0, "disk": 0, "computed": 0}
+        self.voice_load_time = TimingStats()
 
     def set_voice(self, voice_sample: str = "en_sample"):
         print(f"setting default voice to {voice_sample}")
         self.default_voice = voice_sample
 
     def load_model(self):
-        config = XttsConfig()
-        config.load_json(f"{self.model_path}/config.json")
+        # called by the speak thread and by the app warm up, whichever comes first loads the model
+        with self.model_lock:
+            if self.tts_model:
+                return
+
+            from TTS.tts.configs.xtts_config import XttsConfig
+            from TTS.tts.models.xtts import Xtts
+
+            config = XttsConfig()
+            config.load_json(f"{self.model_path}/config.json")
+
+            tts_model = Xtts.init_from_config(config)
+            tts_model.load_checkpoint(config, checkpoint_dir=self.model_path, eval=True)
+            tts_model.cuda()
+            self.tts_model = tts_model
+            self.set_voice(self.default_voice)
+
+    def get_pytts(self):
+        if not self.pytts:
+            import pyttsx3
 
-        self.tts_model = Xtts.init_from_config(config)
-        self.tts_model.load_checkpoint(config, checkpoint_dir=self.model_path, eval=True)
-        self.tts_model.cuda()
-        self.set_voice(self.default_voice)
+            self.pytts = pyttsx3.init()
+            self.pytts.setProperty('voice', self.pytts.getProperty('voices')[1].id)
+        return self.pytts
 
     def clean_speach(self, text):
-        text = re.sub(r'[^a-zA-Z0-9 \'%;:,.-=]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r' ,', ',', text)
-        text = re.sub(r',$', '', text)
+        text = patterns.UNSPEAKABLE.sub(' ', text)
+        text = patterns.WHITESPACE.sub(' ', text)
+        text = patterns.SPACE_COMMA.sub(',', text)
+        text = patterns.TRAILING_COMMA.sub('', text)
         text = TextTools.separate_acronyms(text)
         return text
 
-    def generate_speech(self, prompt: str, output_file: str = "tmp/tts_output.wav"):
-        prompt = self.clean_speach(prompt)
+    @property
+    def sample_rate(self):
+        return self.tts_model.config.audio.output_sample_rate
+
+    def generate_speech(self, prompt: str, gpt_cond_latent, speaker_embedding):
+        """Synthesize a cleaned prompt and return it as 16 bit PCM bytes at sample_rate."""
         print(f">{prompt}")
 
+        # generate audio with the text to speach model
+        outputs = self.tts_model.inference(
+            prompt,
+            "en",
+            gpt_cond_latent,
+            speaker_embedding
+        )
+
+        return to_pcm16(outputs["wav"])
+
+    def synthesize(self, voice_name, part, latents):
+        """Return the PCM for one part of speech, from the audio cache if it has been spoken before."""
+        text = self.clean_speach(part)
+
+        key = None
+        cached = self.voice_cache.get(voice_name)  # gone if the voice was forgotten since it was loaded
+        if self.audio_cache and cached:
+            key = AudioCache.make_key(voice_name, cached[0], self.model_id, text)
+            pcm = self.audio_cache.get(key)
+            if pcm is not None:
+                return pcm
+
+        with self.cuda_lock:
+            pcm = self.generate_speech(text, *latents)
+
+        if key:
+            try:
+                self.audio_cache.put(key, pcm)
+            except OSError as ex:
+                print(f"audio cache put exception {ex}")
+
+        return pcm
+
+    def get_voice_hash(self, voice_name, voice_path):
+        if os.path.exists(voice_path):
+            with open(voice_path, 'rb') as f:
+                return VoiceLatentCache.hash_data(f.read())
+
+        return self.get_voice(voice_name).get_data_hash()
+
+    @staticmethod
+    def get_voice_file_stamp(voice_path):
+        """Modification time and size of a voice sample on disk, None for a voice from the database."""
         try:
-            # generate audio with the text to speach model
-            outputs = self.tts_model.inference(
-                prompt,
-                "en",
-                self.gpt_cond_latent,
-                self.speaker_embedding
-            )
-
-            # write audio to temporary file
-            sf.write(output_file, outputs["wav"], self.tts_model.config.audio.output_sample_rate)
-        except Exception as ex:
-            print(f"generate_speech {prompt} exception {ex}")
+            stat = os.stat(voice_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
 
-    def load_voice_file(self, voice_name):
-        """Load a voice file from disk or database and cache latents and embeddings."""
-        # Check if voice is already cached
-        if voice_name in self.voice_cache:
-            return self.voice_cache[voice_name]
+    def get_voice_lock(self, voice_name):
+        with self.voice_locks_lock:
+            if voice_name not in self.voice_locks:
+                self.voice_locks[voice_name] = threading.Lock()
+            return self.voice_locks[voice_name]
 
+    def forget_voice(self, voice_name):
+        """Drop a voice's latents from memory after its sample was saved or deleted."""
+        self.voice_cache.pop(voice_name, None)
+
+    def load_voice_file(self, voice_name):
+        """
+        Load the latents and embeddings of a voice from memory, the latent cache on disk or the voice sample.
+        The speak thread, the look ahead and precompute_voices all load voices, a voice is loaded by one of them
+        at a time and the others wait for its latents.
+        Latents in memory are used until forget_voice is called, or for a sample on disk until the file changes,
+        the sample is only hashed when they have to be loaded.
+        """
         voice_path = f"{self.tmp_path}/{voice_name}.wav"
+        stamp = self.get_voice_file_stamp(voice_path)
+
+        cached = self.voice_cache.get(voice_name)
+        if cached and cached[2] == stamp:
+            self.voice_loads["memory"] += 1
+            return cached[1]
+
+        with self.get_voice_lock(voice_name):
+            # loaded by another thread while we waited
+            cached = self.voice_cache.get(voice_name)
+            if cached and cached[2] == stamp:
+                self.voice_loads["memory"] += 1
+                return cached[1]
+
+            # a changed voice sample has a different hash, so stale latents are never used
+            data_hash = self.get_voice_hash(voice_name, voice_path)
+            if not data_hash:
+                raise FileNotFoundError(f"Voice '{voice_name}' not found in the database or file system.")
 
-        print(f"Voice file '{voice_path}' not found on in cache. Loading from database.")
-
-        # Check if the file exists on disk
-        if not os.path.exists(voice_path):
-            # Load from the database
-            voice_model = self.get_voice(voice_name)
-            if voice_model:
-                voice_data = voice_model.get_data()
-                if voice_data:
-                    with open(voice_path, 'wb') as f:
-                        f.write(voice_data)  # Save to disk
+            start = time.monotonic()
+            if cached and cached[0] == data_hash:
+                # the file was touched but its sample is the same
+                self.voice_loads["memory"] += 1
+                latents = cached[1]
             else:
-                raise FileNotFoundError(f"Voice '{voice_name}' not found in the database or file system.")
+                latents = self.voice_latent_cache.load(voice_name, data_hash,
+                                                       next(self.tts_model.parameters()).device)
+                if latents:
+                    self.voice_loads["disk"] += 1
+                else:
+                    print(f"Voice '{voice_name}' not found in the latent cache. Loading from database.")
+                    self.voice_loads["computed"] += 1
+                    latents = self.compute_voice_latents(voice_name, voice_path)
+
+                    try:
+                        self.voice_latent_cache.store(voice_name, data_hash, *latents)
+                    except Exception as ex:
+                        print(f"voice latent cache store {voice_name} exception {ex}")
+
+                self.voice_load_time.add(time.monotonic() - start)
+
+            # Cache the loaded latents and embeddings
+            self.voice_cache[voice_name] = (data_hash, latents, stamp)
+
+        return latents
+
+    def compute_voice_latents(self, voice_name, voice_path):
+        """Compute the latents of a voice from its sample on disk, or from the database through a temp file."""
+        if os.path.exists(voice_path):
+            with self.cuda_lock:
+                return self.tts_model.get_conditioning_latents(audio_path=voice_path)
 
-        # Now, load the conditioning latents and speaker embeddings
-        gpt_cond_latent, speaker_embedding = self.tts_model.get_conditioning_latents(audio_path=voice_path)
+        voice_data = self.get_voice(voice_name).get_data()
+        if not voice_data:
+            raise FileNotFoundError(f"Voice '{voice_name}' not found in the database or file system.")
 
-        # Cache the loaded latents and embeddings
-        self.voice_cache[voice_name] = (gpt_cond_latent, speaker_embedding)
+        # a temp file of its own rather than one named after the voice, so nothing else removes it while it is read
+        with tempfile.NamedTemporaryFile(suffix=".wav", dir=self.tmp_path, delete=False) as f:
+            f.write(voice_data)
+            temp_path = f.name
 
-        # remove temp file
-        os.remove(voice_path)
+        try:
+            with self.cuda_lock:
+                return self.tts_model.get_conditioning_latents(audio_path=temp_path)
+        finally:
+            os.remove(temp_path)
 
-        return gpt_cond_latent, speaker_embedding
+    def precompute_voices(self):
+        """Load the latents of every voice in the background so no one waits for them on their first line."""
+        for voice in self.get_voices():
+            if not self.running:
+                break
 
-    def do_speak_parts(self, voice_name, speach_parts, callback):
-        self.app.media_player().fade_out()
+            try:
+                self.load_voice_file(voice.name)
+            except Exception as ex:
+                print(f"precompute_voices {voice.name} exception {ex}")
 
-        self.gpt_cond_latent, self.speaker_embedding = self.load_voice_file(voice_name)
+    def prepare(self, voice_name, speach_text, max_bytes=None):
+        """
+        Synthesize speech ahead of time, to be played later with voice_say_prepared.
+        Parts that would take the audio past max_bytes are left to be synthesized when it is played.
+        """
+        self.wait_for_ready()
 
-        # generate audio for each of the parts of speech and queue for playback
-        with self.clear_lock:
-            with self.cuda_lock:
-                for i, part in enumerate(speach_parts):
-                    if not self.clearing:
-                        self.audio_count += 1
-                        output_file = f"{self.tmp_path}/speak_audio_{self.audio_count}.wav"
-                        try:
-                            self.generate_speech(prompt=part, output_file=output_file)
-                            self.audio_queue.put({"file": output_file})
-                        except Exception as ex:
-                            print(f"do_speak_parts exception {ex}")
-                            self.pytts.say(part)
-                            self.pytts.runAndWait()
-
-        self.audio_queue.put({"callback": callback})
-
-    def play_audio(self, file_path: str = 'tmp/tts_output.wav'):
-        # avoid feedback by pausing the microphone
-        self.app.listener().pause()
+        prepared = PreparedSpeech(voice_name, TextTools.split_speech(speach_text, max_length=self.max_split_length))
+        latents = self.load_voice_file(voice_name)
+
+        for part in prepared.parts:
+            if max_bytes is not None and prepared.bytes >= max_bytes:
+                break
+
+            pcm = self.synthesize(voice_name, part, latents)
+            if max_bytes is not None and prepared.bytes + len(pcm) > max_bytes:
+                break
+            prepared.audio.append(pcm)
+
+        return prepared
+
+    def do_speak_parts(self, voice_name, speach_parts, callback, submitted=None, started=None, audio=()):
         self.app.media_player().fade_out()
 
-        self.playing = True
         try:
-            wav = wave.open(file_path, 'rb')
-
-            stream = self.pyaudio.open(
-                format=self.pyaudio.get_format_from_width(wav.getsampwidth()),
-                channels=wav.getnchannels(),
-                rate=wav.getframerate(),
-                output=True
-            )
+            latents = self.load_voice_file(voice_name)
+        except Exception as ex:
+            # the parts fall back to pytts below, the callback still has to be queued or the show waits for it forever
+            print(f"do_speak_parts load voice {voice_name} exception {ex}")
+            latents = None
+
+        # generate audio for each of the parts of speech and queue it for playback
+        # the cuda lock is taken per part so parts can be synthesized while text is still being generated,
+        # and the next part is synthesized while the previous one plays, parts spoken before come from the audio cache
+        generation = self.audio_pipeline.generation
+        first = True
+
+        def now_speaking():
+            self.app.events().publish("speech", {"speaking": True, "voice": voice_name})
+            if started:
+                started()
+
+        on_play = now_speaking
+        for i, part in enumerate(speach_parts):
+            if generation != self.audio_pipeline.generation:
+                break  # cleared while speaking
 
             try:
-                chunk_size = 4096
-                data = wav.readframes(chunk_size)
-                while data:
-                    stream.write(data)
-                    data = wav.readframes(chunk_size)
+                if i >= len(audio) and latents is None:
+                    raise RuntimeError(f"voice {voice_name} is not loaded")
+                pcm = audio[i] if i < len(audio) else self.synthesize(voice_name, part, latents)
+                self.audio_pipeline.put_chunk(pcm, self.sample_rate, submitted=submitted,
+                                              generation=generation, first=first, on_play=on_play)
+                submitted = None  # only the first part measures time to first audio
+                on_play = None
+                first = False
             except Exception as ex:
-                print(f"play_audio exception {ex}")
-            finally:
-                stream.close()
+                print(f"do_speak_parts exception {ex}")
+                self.get_pytts().say(part)
+                self.get_pytts().runAndWait()
 
-        finally:
-            self.playing = False
+        self.audio_pipeline.put_callback(callback)
+
+    def start_playing(self):
+        # avoid feedback by pausing the microphone
+        self.app.listener().pause()
+        self.app.media_player().fade_out()
 
+    def stop_playing(self):
         self.app.listener().unpause()
+        self.app.events().publish("speech", {"speaking": False})
+        threading.Timer(2, self.check_idle).start()
 
     def check_idle(self):
         if self.is_idle() and self.idle_func:
             self.idle_func()
 
-    def do_audio(self):
-        while self.running:
-            try:
-                # Block until an audio file is available
-                audio = self.audio_queue.get()
-                if audio:
-                    if "file" in audio:
-                        if not self.clearing:
-                            self.play_audio(audio["file"])
-                        os.remove(audio["file"])
-
-                    if "callback" in audio and audio["callback"]:
-                        audio["callback"]()
-
-                    if self.is_idle():
-                        threading.Timer(2, self.check_idle).start()
-
-            except Exception as ex:
-                print(f"do_audio exception {ex}")
-            finally:
-                self.audio_queue.task_done()
-
     def is_idle(self):
-        return not self.playing and self.audio_queue.qsize() == 0 and self.speak_queue.qsize() == 0
+        return (not self.audio_pipeline.playing and self.audio_pipeline.queued() == 0 and
+                self.speak_queue.qsize() == 0)
+
+    def queued_audio_seconds(self):
+        return self.audio_pipeline.queued_seconds()
 
     def clear_audio(self):
-        self.clearing = True
-        with self.clear_lock:
-            while self.audio_queue.qsize() > 0:
-                audio = self.audio_queue.get(False)
-                if audio:
-                    if "file" in audio:
-                        print("remove " + audio["file"])
-                        os.remove(audio["file"])
-                    if "callback" in audio:
-                        audio["callback"]()
-            self.clearing = False
+        self.audio_pipeline.clear()
 
     def wait_for_ready(self):
         self.ready_gate.wait()
@@ -241,14 +360,26 @@ class TextToSpeach(SystemBase):
         self.model_loaded = True
         self.ready_gate.set()
 
+        if self.precompute:
+            threading.Thread(target=self.precompute_voices, daemon=True).start()
+
         while self.running:
             try:
                 # Block until an audio file is available
                 speach = self.speak_queue.get()
                 if speach:
                     # split the prompt into smaller parts
-                    prompt_parts = TextTools.split_speech(speach["text"], max_length=self.max_split_length)
-                    self.do_speak_parts(speach["voice"], prompt_parts, speach["callback"])
+                    if "prepared" in speach:
+                        prepared = speach["prepared"]
+                        self.do_speak_parts(prepared.voice, prepared.parts, speach["callback"], speach["submitted"],
+                                            speach["started"], prepared.audio)
+                        continue
+
+                    if "stream" in speach:
+                        prompt_parts = TextTools.split_speech_stream(speach["stream"], max_length=self.max_split_length)
+                    else:
+                        prompt_parts = TextTools.split_speech(speach["text"], max_length=self.max_split_length)
+                    self.do_speak_parts(speach["voice"], prompt_parts, speach["callback"], speach["submitted"])
             except Exception as ex:
                 print(f"Exception: {ex}")
             finally:
@@ -256,15 +387,38 @@ class TextToSpeach(SystemBase):
 
     def say(self, speach_text):
         self.start()
-        self.speak_queue.put({"voice": self.default_voice, "text": speach_text, "callback": None})
+        self.speak_queue.put({"voice": self.default_voice, "text": speach_text, "callback": None,
+                              "submitted": time.monotonic()})
 
     def voice_say(self, voice_name, speach_text):
         self.start()
-        self.speak_queue.put({"voice": voice_name, "text": speach_text, "callback": None})
+        self.speak_queue.put({"voice": voice_name, "text": speach_text, "callback": None,
+                              "submitted": time.monotonic()})
 
     def voice_say_with_callback(self, voice_name, speach_text, callback):
         self.start()
-        self.speak_queue.put({"voice": voice_name, "text": speach_text, "callback": callback})
+        self.speak_queue.put({"voice": voice_name, "text": speach_text, "callback": callback,
+                              "submitted": time.monotonic()})
+
+    def voice_say_stream(self, voice_name, text_chunks, callback=None):
+        """Speak text while it is still being generated, each sentence is synthesized as soon as it is complete."""
+        self.start()
+        self.speak_queue.put({"voice": voice_name, "stream": text_chunks, "callback": callback,
+                              "submitted": time.monotonic()})
+
+    def voice_say_prepared(self, prepared, callback=None, started=None):
+        """Play speech from prepare(), started is called when its first audio starts playing."""
+        self.start()
+        self.speak_queue.put({"prepared": prepared, "callback": callback, "started": started,
+                              "submitted": time.monotonic()})
+
+    def get_stats(self):
+        stats = self.audio_pipeline.get_stats()
+        stats["voice_loads"] = dict(self.voice_loads)
+        stats["voice_load_time"] = self.voice_load_time.to_dict()
+        if self.audio_cache:
+            stats["audio_cache"] = self.audio_cache.get_stats()
+        return stats
 
     def clear(self):
         print("clear speech")
@@ -274,18 +428,27 @@ class TextToSpeach(SystemBase):
     def stop(self):
         if self.running:
             self.running = False
-            self.clear_audio()
-            self.audio_queue.put(None)
             self.speak_queue.put(None)
-            self.audio_thread.join()
             self.speak_thread.join()
+            self.audio_pipeline.stop()
 
     def start(self):
         if not self.running:
             self.running = True
 
             # Start threads for processing speach and playing audio parts
-            self.audio_thread.start()
+            self.audio_pipeline.start()
             self.speak_thread.start()
 
             self.idle_func = self.app.media_player().fade_in
+
+
+class PreparedSpeech:
+    def __init__(self, voice, parts):
+        self.voice = voice
+        self.parts = parts
+        self.audio = []  # PCM of the leading parts that have been synthesized
+
+    @property
+    def bytes(self):
+        return sum(len(pcm) for pcm in self.audio)
@@ -1,14 +1,17 @@
 import queue
-import re
 import threading
 import time
+from collections import deque
 
 from systems.system_base import SystemBase
-from utils.html_tools import HtmlTools
+from utils import patterns
+from utils.stats_tools import TimingStats
 
 
 class TranscriptPlayer(SystemBase):
-    def __init__(self, app, check_interval=15):
+    words_per_second = 2.5  # speaking rate used to estimate the airtime of transcripts that haven't been synthesized
+
+    def __init__(self, app, check_interval=15, lookahead_depth=2, lookahead_max_bytes=64 * 1024 * 1024):
         super().__init__(app)
 
         self.running = False
@@ -17,26 +20,64 @@ class TranscriptPlayer(SystemBase):
 
         self.show_queue = queue.Queue()
         self.show_thread = None
-        self.check_interval = check_interval  # Time interval to check for new transcripts
-        self.last_checked_timestamp = None  # Timestamp to track the last checked time
+        self.check_interval = check_interval  # Seconds without a published transcript before polling the database
+        self.last_transcript_id = None  # id of the last transcript played, newer ones are played next
         self.check_thread = None
+        self.subscription = None
         self.session_id = None
+        self.preparing = None  # transcript taken from the show queue that is being synthesized
+        self.current_show = None  # transcript being spoken
+        self.current_started = None
+
+        # the next transcripts are synthesized while the current one plays, up to lookahead_depth transcripts
+        # and lookahead_max_bytes of audio, anything past that is synthesized when it is played
+        self.lookahead_depth = lookahead_depth
+        self.lookahead_max_bytes = lookahead_max_bytes
+        self.lookahead_thread = None
+        self.ready_condition = threading.Condition()
+        self.ready = deque()
+        self.ready_bytes = 0
+        self.generation = 0
+
+        # monitoring, silence between the end of one transcript and the start of the next one that was waiting
+        self.last_segment_end = None
+        self.segment_silence = TimingStats()
+        self.delivery_latency = TimingStats()  # transcript published to queued for the show
+        self.polls = 0
+        self.prepare_failures = 0  # transcripts the look ahead couldn't synthesize
 
     def clear(self):
-        self.last_checked_timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.last_transcript_id = self.get_max_transcript_id()
         self.show_queue.queue.clear()
+        with self.ready_condition:
+            self.generation += 1
+            self.ready.clear()
+            self.ready_bytes = 0
+            self.last_segment_end = None
+            self.ready_condition.notify_all()
         self.app.speech().clear()
         self.end_show()
 
     def show(self, url):
         self.app.instance.browser().show(url)
 
-    def say(self, voice, text):
-        self.app.instance.speech().voice_say_with_callback(voice, text, self.done_speaking)
+    def say(self, voice, text, prepared=None):
+        if prepared:
+            self.app.instance.speech().voice_say_prepared(prepared, self.done_speaking, self.started_speaking)
+        else:
+            self.app.instance.speech().voice_say_with_callback(voice, text, self.done_speaking)
         self.app.instance.speech().start()
 
+    def started_speaking(self):
+        with self.ready_condition:
+            if self.last_segment_end is not None:
+                self.segment_silence.add(time.monotonic() - self.last_segment_end)
+                self.last_segment_end = None
+
     def done_speaking(self):
         print("done speaking")
+        with self.ready_condition:
+            self.last_segment_end = time.monotonic()
         self.end_show()
 
     def wait_on_show(self):
@@ -55,33 +96,141 @@ class TranscriptPlayer(SystemBase):
                 self.showing = False
                 self.show_condition.notify_all()  # Notify all waiting threads to proceed
 
-    def show_and_say(self, url, voice, text):
-        self.show_queue.put({"url": url, "voice": voice, "text": text})
+    @staticmethod
+    def speakable_text(text):
+        """Remove urls and *actions* from a transcript."""
+        text = patterns.URL.sub('', text).strip()
+        return patterns.ACTION.sub('', text)
+
+    def show_and_say(self, url, voice, text, session_id=None):
+        self.show_queue.put({"url": url, "voice": voice, "text": self.speakable_text(text), "session_id": session_id})
         print(f"show_and_say - show queue size {self.show_queue.qsize()}")
         if not self.running:
             self.start()
 
-    def do_show(self):
+    def do_lookahead(self):
         while self.running:
+            # wait for room in the look-ahead buffer before taking the next transcript
+            with self.ready_condition:
+                while self.running and len(self.ready) >= max(1, self.lookahead_depth):
+                    self.ready_condition.wait()
+
             next_show = self.show_queue.get()
+            if not next_show or not self.running:
+                continue
+
+            generation = self.generation
+            self.preparing = next_show
             try:
-                print(f"do_show {next_show} - show queue {self.show_queue}")
+                speech = self.app.instance.speech()
+                speech.start()
+                max_bytes = max(0, self.lookahead_max_bytes - self.ready_bytes) if self.lookahead_depth else 0
+                next_show["prepared"] = speech.prepare(next_show["voice"], next_show["text"], max_bytes)
+            except Exception as ex:
+                # still queued without audio, it is synthesized when it plays and falls back to pytts from there
+                print(f"do_lookahead prepare {next_show['url']} with voice {next_show['voice']} exception {ex}, "
+                      f"it will be synthesized when it plays")
+                with self.ready_condition:
+                    self.prepare_failures += 1
+
+            with self.ready_condition:
+                # skip transcripts that were cleared while they were being synthesized
+                if generation == self.generation:
+                    self.ready.append(next_show)
+                    self.ready_bytes += next_show["prepared"].bytes if next_show.get("prepared") else 0
+                    self.ready_condition.notify_all()
+                self.preparing = None
+
+    def next_ready(self):
+        with self.ready_condition:
+            if not self.ready:
+                # nothing was waiting, so the silence before the next transcript isn't a handoff delay
+                self.last_segment_end = None
+
+            while self.running and not self.ready:
+                self.ready_condition.wait()
+
+            if not self.running:
+                return None
+
+            next_show = self.ready.popleft()
+            self.ready_bytes -= next_show["prepared"].bytes if next_show.get("prepared") else 0
+            self.ready_condition.notify_all()
+            return next_show
+
+    def do_show(self):
+        while self.running:
+            next_show = self.next_ready()
+            try:
+                print(f"do_show {next_show} - show queue {self.show_queue.qsize()}, ready {len(self.ready)}")
                 if next_show and self.running:
+                    self.current_show = next_show
+                    self.current_started = time.monotonic()
                     self.start_show()
-                    self.say(next_show["voice"], next_show["text"])
+                    self.say(next_show["voice"], next_show["text"], next_show.get("prepared"))
                     self.show(next_show["url"])
                     self.wait_on_show()
             except Exception as ex:
                 print(f"do_show exception {ex}")
+            finally:
+                self.current_show = None
+
+    def estimate_seconds(self, text):
+        return len(text.split()) / self.words_per_second if text else 0.0
+
+    def get_buffer(self, session_id=None):
+        """
+        Transcripts waiting to air and an estimate of their airtime in seconds, for one session or all of them.
+        The transcript being spoken counts for the larger of its synthesized audio still queued and the
+        estimated time it has left.
+        """
+        with self.show_queue.mutex:
+            waiting = list(self.show_queue.queue)
+        with self.ready_condition:
+            waiting += list(self.ready)
+        waiting.append(self.preparing)
+
+        waiting = [show for show in waiting
+                   if show and (session_id is None or str(show.get("session_id")) == str(session_id))]
+        seconds = sum(self.estimate_seconds(show["text"]) for show in waiting)
+
+        current, started = self.current_show, self.current_started
+        if current and (session_id is None or str(current.get("session_id")) == str(session_id)):
+            remaining = self.estimate_seconds(current["text"]) - (time.monotonic() - started)
+            speech = self.app.speech_system
+            audio = speech.queued_audio_seconds() if speech else 0.0
+            seconds += max(remaining, audio, 0.0)
+            waiting.append(current)
+
+        return {"transcripts": len(waiting), "seconds": round(seconds, 1)}
+
+    def get_stats(self):
+        buffer = self.get_buffer()
+        with self.ready_condition:
+            return {
+                "queued": self.show_queue.qsize(),
+                "ready": len(self.ready),
+                "ready_bytes": self.ready_bytes,
+                "buffer": buffer,
+                "segment_silence": self.segment_silence.to_dict(),
+                "delivery_latency": self.delivery_latency.to_dict(),
+                "polls": self.polls,
+                "prepare_failures": self.prepare_failures
+            }
 
     def stop(self):
         if self.running:
             self.running = False
             self.show_queue.put(None)
+            self.subscription.put(None)
+            with self.ready_condition:
+                self.ready_condition.notify_all()
             self.end_show()
             self.session_id = None
             if self.show_thread:
                 self.show_thread.join()
+            if self.lookahead_thread:
+                self.lookahead_thread.join()
             if self.check_thread:
                 self.check_thread.join()
 
@@ -90,39 +239,47 @@ class TranscriptPlayer(SystemBase):
             self.running = True
             self.show_thread = threading.Thread(target=self.do_show)
             self.show_thread.start()
+            self.lookahead_thread = threading.Thread(target=self.do_lookahead)
+            self.lookahead_thread.start()
+            # subscribe before the thread starts so nothing published in between is missed
+            self.subscription = self.app.instance.events().subscribe("transcript")
             self.check_thread = threading.Thread(target=self.check_for_new_transcripts)
             self.check_thread.start()
 
     def check_for_new_transcripts(self):
-        while self.running:
-            try:
-                if self.show_queue.qsize() == 0:
-                    new_transcripts = self.query_new_transcripts()
-                    for transcript in new_transcripts:
-                        # Assuming 'voice' and 'text' are derived from transcript data
-                        agent = self.get_agent(transcript.agent)
-                        text = re.sub(HtmlTools.url_pattern, '', transcript.content, flags=re.IGNORECASE).strip()
-                        text = re.sub(r'\*\s*[^*]+\s*\*', '', text)
-                        self.show_and_say(transcript.url, agent.voice, text)
-            except Exception as ex:
-                print(f"check_for_new_transcripts exception: {ex}")
-            time.sleep(self.check_interval)
+        """Play transcripts as they are published, polling the database only if none arrive for a while."""
+        try:
+            if self.last_transcript_id is None:
+                self.last_transcript_id = self.get_max_transcript_id()
 
-    def query_new_transcripts(self):
-        """Query new transcripts since the last check timestamp."""
-        if self.last_checked_timestamp is None:
-            # Initialize to the current time if no previous timestamp is set
-            self.last_checked_timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+            while self.running:
+                try:
+                    event = self.subscription.get(timeout=self.check_interval)
+                    if event:
+                        self.play_new_transcript(event.data, event.published)
+                    elif self.running:
+                        for transcript in self.query_new_transcripts():
+                            self.play_new_transcript(transcript)
+                except Exception as ex:
+                    print(f"check_for_new_transcripts exception: {ex}")
+        finally:
+            self.subscription.close()
 
-        print(self.last_checked_timestamp)
+    def play_new_transcript(self, transcript, published=None):
+        # the id cursor skips transcripts that were already seen through the other path or from another session
+        if transcript.id <= self.last_transcript_id:
+            return
+        if self.session_id and str(transcript.session_id) != str(self.session_id):
+            return
 
-        if self.session_id:
-            new_transcripts = self.get_session_transcripts_since(self.session_id, self.last_checked_timestamp)
-        else:
-            new_transcripts = self.get_transcripts_since(self.last_checked_timestamp)
+        self.last_transcript_id = transcript.id
+        if published:
+            self.delivery_latency.add(time.monotonic() - published)
 
-        # Update the timestamp to the latest transcript time if available
-        if new_transcripts and len(new_transcripts) > 0:
-            self.last_checked_timestamp = new_transcripts[-1].timestamp
+        agent = self.get_agent(transcript.agent)
+        self.show_and_say(transcript.url, agent.voice, transcript.content, transcript.session_id)
 
-        return new_transcripts
+    def query_new_transcripts(self):
+        """Query transcripts added after the last one that was played."""
+        self.polls += 1
+        return self.get_transcripts_after_id(self.last_transcript_id, self.session_id)
@@ -0,0 +1,119 @@
+import json
+import threading
+
+from systems.database import Database
+
+
+class TurnContext:
+    """
+    Snapshot of the data used to fill prompt placeholders during one turn.
+    Each placeholder is loaded the first time a prompt asks for it and reused by the speaker, the judge and
+    the page summarizer until the turn ends or a command changes the data behind it.
+    """
+
+    def __init__(self, game_moves):
+        self.game_moves = game_moves
+        self.lock = threading.RLock()
+
+        self.values = {}
+        self.agents = {}
+        self.game = None
+
+        self.loads = 0
+        self.hits = 0
+        self.start_queries = Database.get_thread_query_count()
+
+        self.loaders = {
+            "%PAGES%": self.load_pages,
+            "%CURRENT_PAGE%": self.load_current_page,
+            "%CURRENT_USER_PAGE%": self.load_current_user_page,
+            "%SEARCHES%": self.load_searches,
+            "%SETTINGS%": self.load_settings,
+            "%LINKS%": self.load_links,
+            "%AGENTS%": self.load_agents
+        }
+
+    @property
+    def placeholders(self):
+        return self.loaders.keys()
+
+    def get(self, placeholder):
+        with self.lock:
+            if placeholder in self.values:
+                self.hits += 1
+            else:
+                self.loads += 1
+                self.values[placeholder] = json.dumps(self.loaders[placeholder](), indent=2)
+
+            return self.values[placeholder]
+
+    def invalidate(self, *placeholders):
+        with self.lock:
+            for placeholder in placeholders:
+                self.values.pop(placeholder, None)
+
+    def get_agent(self, agent_name):
+        with self.lock:
+            if agent_name in self.agents:
+                self.hits += 1
+            else:
+                self.loads += 1
+                self.agents[agent_name] = self.game_moves.get_agent(agent_name)
+
+            return self.agents[agent_name]
+
+    def get_game(self):
+        with self.lock:
+            if self.game:
+                self.hits += 1
+            else:
+                self.loads += 1
+                self.game = self.game_moves.get_game(self.game_moves.session.game)
+
+            return self.game
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "queries": Database.get_thread_query_count() - self.start_queries,
+                "loads": self.loads,
+                "cache_hits": self.hits
+            }
+
+    @staticmethod
+    def page_summaries(pages):
+        return [{"title": page.title, "url": page.url, "summary": page.summary} for page in pages]
+
+    def load_pages(self):
+        moves = self.game_moves
+        return self.page_summaries(moves.get_pages(moves.session.id, moves.max_page_history))
+
+    def load_current_page(self):
+        moves = self.game_moves
+        return self.page_summaries(moves.get_discovered_pages(moves.session.id, 1))
+
+    def load_current_user_page(self):
+        moves = self.game_moves
+        return self.page_summaries(moves.get_user_pages(moves.session.id, 1))
+
+    def load_searches(self):
+        moves = self.game_moves
+        return [
+            {"search": page.search_term, "rank": page.search_rank, "title": page.title, "url": page.url}
+            for page in moves.get_search_pages(moves.session.id, moves.max_search_history)
+        ]
+
+    def load_settings(self):
+        moves = self.game_moves
+        return moves.get_session_settings_limited(moves.session.id, moves.max_settings)
+
+    def load_links(self):
+        moves = self.game_moves
+        return [
+            {"title": page.title, "url": page.url}
+            for page in moves.get_unloaded_pages(moves.session.id, moves.max_link_history)
+        ]
+
+    def load_agents(self):
+        moves = self.game_moves
+        return moves.get_agents_from_history(moves.session.id, moves.max_agent_history)
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import deque
+
+from utils.stats_tools import TimingStats
+
+
+class TurnPacer:
+    """
+    Paces game turns against the airtime that is already queued, so the model doesn't race ahead of the show.
+    Before each turn a session waits while the transcripts queued ahead of its next segment hold more than its
+    target buffer of airtime, or while too many of its pages are waiting to be summarized. Once paused it
+    resumes when the buffer has drained to resume_fraction of the target. Below the target it waits longer
+    the fuller the buffer is, up to max_delay, and not at all when the buffer is empty.
+    A session's target_buffer overrides the default target, a target of 0 turns pacing off for the session.
+    Sessions that aren't being played by the transcript player are not paced on airtime.
+    """
+
+    def __init__(self, app, target_buffer=60, resume_fraction=0.75, max_delay=10, max_pending_summaries=3,
+                 check_interval=0.5, sample_interval=5, history_size=360):
+        self.app = app
+        self.target_buffer = target_buffer
+        self.resume_fraction = resume_fraction
+        self.max_delay = max_delay
+        self.max_pending_summaries = max_pending_summaries
+        self.check_interval = check_interval
+        self.sample_interval = sample_interval
+        self.history_size = history_size
+
+        # monitoring
+        self.lock = threading.Lock()
+        self.sessions = {}  # session id -> SessionPacing
+
+    def get_target(self, session):
+        target = getattr(session, "target_buffer", None)
+        return self.target_buffer if target is None else target
+
+    def measure(self, session_id):
+        """Airtime queued ahead of the session's next segment and the session's pages waiting for a summary."""
+        level = {"seconds": 0.0, "transcripts": 0, "summaries": 0}
+
+        player = self.app.transcript_player
+        if player and player.running and (not player.session_id or str(player.session_id) == str(session_id)):
+            level.update(player.get_buffer())
+
+        if self.app.summary_worker:
+            level["summaries"] = self.app.summary_worker.queued(session_id)
+
+        return level
+
+    def get_pacing(self, session_id):
+        with self.lock:
+            if session_id not in self.sessions:
+                self.sessions[session_id] = SessionPacing(self.history_size)
+            return self.sessions[session_id]
+
+    def pace(self, session, stopping):
+        """Block until the session may play its next turn or stopping is set, returns the seconds waited."""
+        pacing = self.get_pacing(session.id)
+        target = self.get_target(session)
+        start = time.monotonic()
+        paused = False
+
+        while not stopping.is_set():
+            level = self.measure(session.id)
+            pacing.update(level, target, paused, self.sample_interval)
+
+            if not target:
+                break
+
+            limit = target * self.resume_fraction if paused else target
+            if level["seconds"] >= limit or level["summaries"] > self.max_pending_summaries:
+                if not paused:
+                    paused = True
+                    pacing.pause()
+                stopping.wait(self.check_interval)
+                continue
+
+            stopping.wait(self.max_delay * level["seconds"] / target)
+            break
+
+        waited = time.monotonic() - start
+        pacing.resume(waited)
+        return waited
+
+    def forget(self, session_id):
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+    def get_session_stats(self, session_id):
+        with self.lock:
+            pacing = self.sessions.get(session_id)
+        return pacing.to_dict() if pacing else None
+
+    def get_stats(self):
+        with self.lock:
+            sessions = dict(self.sessions)
+        return {str(session_id): pacing.to_dict() for session_id, pacing in sessions.items()}
+
+
+class SessionPacing:
+    """One session's buffer level, sampled over time, and how often and how long it was held back."""
+
+    def __init__(self, history_size):
+        self.lock = threading.Lock()
+        self.level = {"seconds": 0.0, "transcripts": 0, "summaries": 0}
+        self.target = 0
+        self.paused = False
+        self.pauses = 0
+        self.wait_time = TimingStats()
+        self.history = deque(maxlen=history_size)  # (time, seconds, transcripts, summaries)
+        self.last_sample = None
+
+    def update(self, level, target, paused, sample_interval):
+        now = time.monotonic()
+        with self.lock:
+            self.level = level
+            self.target = target
+            self.paused = paused
+            if self.last_sample is None or now - self.last_sample >= sample_interval:
+                self.last_sample = now
+                self.history.append((now, level["seconds"], level["transcripts"], level["summaries"]))
+
+    def pause(self):
+        with self.lock:
+            self.paused = True
+            self.pauses += 1
+
+    def resume(self, waited):
+        self.wait_time.add(waited)
+        with self.lock:
+            self.paused = False
+
+    def to_dict(self):
+        now = time.monotonic()
+        with self.lock:
+            return {
+                "target": self.target,
+                "level": dict(self.level),
+                "paused": self.paused,
+                "pauses": self.pauses,
+                "wait_time": self.wait_time.to_dict(),
+                "history": [{"ago": round(now - sampled, 1), "seconds": seconds, "transcripts": transcripts,
+                             "summaries": summaries}
+                            for sampled, seconds, transcripts, summaries in self.history]
+            }
@@ -0,0 +1,64 @@
+import glob
+import hashlib
+import os
+import re
+
+
+class VoiceLatentCache:
+    """
+    Conditioning latents and speaker embeddings of the tts model saved to disk, one file per voice.
+    Files are named after the voice and a hash of its WAV sample, so a changed sample is a cache miss and the
+    old file is removed when the new latents are stored.
+    """
+
+    def __init__(self, path="voice_latents"):
+        self.path = path
+
+    @staticmethod
+    def hash_data(data):
+        # same value as SHA2(data, 256) in mysql
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def safe_name(voice_name):
+        return re.sub(r'[^A-Za-z0-9_-]', '_', voice_name)
+
+    def file_path(self, voice_name, data_hash):
+        return os.path.join(self.path, f"{self.safe_name(voice_name)}.{data_hash[:16]}.pt")
+
+    def load(self, voice_name, data_hash, device=None):
+        """Return (gpt_cond_latent, speaker_embedding) or None when the voice is not cached."""
+        import torch
+
+        file_path = self.file_path(voice_name, data_hash)
+        if not os.path.exists(file_path):
+            return None
+
+        try:
+            latents = torch.load(file_path, map_location=device, weights_only=True)
+            return latents["gpt_cond_latent"], latents["speaker_embedding"]
+        except Exception as ex:
+            print(f"voice latent cache load {file_path} exception {ex}")
+            return None
+
+    def store(self, voice_name, data_hash, gpt_cond_latent, speaker_embedding):
+        import torch
+
+        os.makedirs(self.path, exist_ok=True)
+        file_path = self.file_path(voice_name, data_hash)
+
+        # write to a temporary file first so a crash never leaves a partial cache file behind
+        tmp_path = f"{file_path}.tmp"
+        torch.save({
+            "gpt_cond_latent": gpt_cond_latent.detach().cpu(),
+            "speaker_embedding": speaker_embedding.detach().cpu()
+        }, tmp_path)
+        os.replace(tmp_path, file_path)
+
+        self.remove(voice_name, keep=file_path)
+
+    def remove(self, voice_name, keep=None):
+        """Remove the cached files of a voice, except keep."""
+        for file_path in glob.glob(os.path.join(self.path, f"{self.safe_name(voice_name)}.*.pt")):
+            if file_path != keep:
+                os.remove(file_path)
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from systems.app import App
+from utils.stats_tools import StartupTimer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["systems.text_generator", "systems.text_to_speach", "systems.speach_listener",
+                 "systems.browser", "systems.media_player"]
+
+
+class TestAppStartup(unittest.TestCase):
+
+    def test_heavy_systems_are_not_imported_with_the_app(self):
+        script = ("import sys, systems.app; "
+                  f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True,
+                                env=os.environ.copy())
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_system_is_created_once(self):
+        os.chdir(ROOT)
+        app = App()
+        app.test_system = None
+        created = []
+
+        def create(module):
+            time.sleep(0.05)
+            created.append(module.__name__)
+            return object()
+
+        systems = []
+        threads = [threading.Thread(target=lambda: systems.append(app.get_system("test_system", "json", create)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(created, ["json"])
+        self.assertEqual(len({id(system) for system in systems}), 1)
+        self.assertIn("test_system", app.startup.to_dict()["systems"])
+
+    def test_startup_timer_records_first_import_only(self):
+        timer = StartupTimer()
+        sys.modules.pop("colorsys", None)
+
+        timer.import_module("colorsys")
+        timer.import_module("colorsys")
+        timer.time("models", "model", lambda: time.sleep(0.01))
+
+        stats = timer.to_dict()
+        self.assertEqual(list(stats["imports"]), ["colorsys"])
+        self.assertGreaterEqual(stats["models"]["model"], 0.01)
+        self.assertIn("model", stats["ready"])
+        self.assertIn("colorsys", timer.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
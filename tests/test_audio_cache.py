@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from systems.audio_cache import AudioCache
+
+
+class TestAudioCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key_depends_on_voice_sample_model_and_text(self):
+        key = AudioCache.make_key("host", "abc", "XTTS-v2", "hello there.")
+
+        self.assertEqual(key, AudioCache.make_key("host", "abc", "XTTS-v2", "hello there."))
+        self.assertNotEqual(key, AudioCache.make_key("judge", "abc", "XTTS-v2", "hello there."))
+        self.assertNotEqual(key, AudioCache.make_key("host", "def", "XTTS-v2", "hello there."))
+        self.assertNotEqual(key, AudioCache.make_key("host", "abc", "XTTS-v1", "hello there."))
+        self.assertNotEqual(key, AudioCache.make_key("host", "abc", "XTTS-v2", "hello there!"))
+
+    def test_hits_and_misses(self):
+        cache = AudioCache(self.tmp_dir.name, max_bytes=1000)
+
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", b"\1" * 100)
+
+        self.assertEqual(cache.get("a"), b"\1" * 100)
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["bytes"]), (1, 1, 100))
+
+    def test_least_recently_used_is_evicted_over_budget(self):
+        cache = AudioCache(self.tmp_dir.name, max_bytes=250)
+        cache.put("a", b"\0" * 100)
+        cache.put("b", b"\0" * 100)
+        cache.get("a")
+        cache.put("c", b"\0" * 100)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["a.pcm", "c.pcm"])
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_index_is_rebuilt_from_disk(self):
+        cache = AudioCache(self.tmp_dir.name, max_bytes=1000)
+        cache.put("a", b"\0" * 100)
+
+        reopened = AudioCache(self.tmp_dir.name, max_bytes=1000)
+
+        self.assertEqual(reopened.get("a"), b"\0" * 100)
+        self.assertEqual(reopened.get_stats()["bytes"], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
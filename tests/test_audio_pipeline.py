@@ -0,0 +1,117 @@
+import threading
+import time
+import unittest
+
+from systems.audio_pipeline import AudioPipeline, NullAudioSink, SAMPLE_WIDTH
+
+SAMPLE_RATE = 8000
+
+
+def stub_synthesize(part, seconds=0.1, synth_time=0.05):
+    """Stand-in for the tts model: takes synth_time to produce seconds of silence."""
+    time.sleep(synth_time)
+    return bytes(int(SAMPLE_RATE * seconds) * SAMPLE_WIDTH)
+
+
+class TestAudioPipeline(unittest.TestCase):
+
+    def speak(self, pipeline, parts, callback=None, seconds=0.1, synth_time=0.05):
+        generation = pipeline.generation
+        for i, part in enumerate(parts):
+            pipeline.put_chunk(stub_synthesize(part, seconds, synth_time), SAMPLE_RATE, generation=generation,
+                               first=i == 0)
+        pipeline.put_callback(callback)
+
+    def test_synthesis_overlaps_playback(self):
+        sink = NullAudioSink(realtime=True)
+        pipeline = AudioPipeline(sink, max_chunks=4)
+        pipeline.start()
+        try:
+            start = time.monotonic()
+            self.speak(pipeline, ["one", "two", "three", "four", "five"], seconds=0.1, synth_time=0.1)
+            pipeline.wait()
+            elapsed = time.monotonic() - start
+        finally:
+            pipeline.stop()
+
+        # played one after the other this takes 5 * (0.1 + 0.1) seconds, overlapped about 0.1 + 5 * 0.1,
+        # the bounds leave room for a loaded machine
+        self.assertEqual(len(sink.chunks), 5)
+        self.assertLess(elapsed, 5 * (0.1 + 0.1) * 0.8)
+
+        # without the overlap every gap would be the synthesis time of the next part
+        stats = pipeline.get_stats()
+        self.assertEqual(stats["chunks_played"], 5)
+        self.assertEqual(stats["chunk_gap"]["count"], 4)
+        self.assertLess(stats["chunk_gap"]["avg"], 0.1)
+
+    def test_start_and_stop_hooks_are_balanced(self):
+        events = []
+        done = threading.Event()
+        pipeline = AudioPipeline(NullAudioSink(), on_start=lambda: events.append("start"),
+                                 on_stop=lambda: events.append("stop"))
+        pipeline.start()
+        try:
+            self.speak(pipeline, ["one", "two"], callback=done.set)
+            self.assertTrue(done.wait(5))
+            pipeline.wait()
+        finally:
+            pipeline.stop()
+
+        self.assertEqual(events[0], "start")
+        self.assertEqual(events.count("start"), events.count("stop"))
+
+    def test_queued_seconds(self):
+        pipeline = AudioPipeline(NullAudioSink(), max_chunks=8)
+        pipeline.put_chunk(bytes(SAMPLE_RATE * SAMPLE_WIDTH), SAMPLE_RATE)
+        pipeline.put_chunk(bytes(SAMPLE_RATE * SAMPLE_WIDTH // 2), SAMPLE_RATE)
+
+        self.assertAlmostEqual(pipeline.queued_seconds(), 1.5)
+
+        pipeline.start()
+        try:
+            pipeline.wait()
+        finally:
+            pipeline.stop()
+
+        self.assertEqual(pipeline.queued_seconds(), 0.0)
+
+    def test_clear_drops_queued_audio_and_runs_callbacks(self):
+        sink = NullAudioSink()
+        pipeline = AudioPipeline(sink, max_chunks=8)
+        called = []
+
+        generation = pipeline.generation
+        pipeline.put_chunk(b"\0\0", SAMPLE_RATE, generation=generation)
+        pipeline.put_callback(lambda: called.append(True))
+        pipeline.clear()
+
+        # a producer that started before the clear is ignored
+        pipeline.put_chunk(b"\0\0", SAMPLE_RATE, generation=generation)
+        pipeline.start()
+        try:
+            pipeline.wait()
+        finally:
+            pipeline.stop()
+
+        self.assertEqual(called, [True])
+        self.assertEqual(sink.chunks, [])
+
+    def test_put_blocks_when_queue_is_full(self):
+        pipeline = AudioPipeline(NullAudioSink(), max_chunks=1)
+        pipeline.put_chunk(b"\0\0", SAMPLE_RATE)
+
+        producer = threading.Thread(target=pipeline.put_chunk, args=(b"\0\0", SAMPLE_RATE))
+        producer.start()
+        producer.join(0.1)
+        self.assertTrue(producer.is_alive())
+
+        pipeline.start()
+        producer.join(5)
+        pipeline.wait()
+        pipeline.stop()
+        self.assertFalse(producer.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import threading
+import unittest
+
+from systems.batch_scheduler import BatchScheduler
+
+
+class RecordingModel:
+    def __init__(self):
+        self.batches = []
+
+    def run_batch(self, requests):
+        self.batches.append(len(requests))
+        return [f"reply to {request.records[-1]['content']}" for request in requests]
+
+
+class TestBatchScheduler(unittest.TestCase):
+
+    def submit_together(self, scheduler, count):
+        futures = [None] * count
+
+        def submit(index):
+            futures[index] = scheduler.submit([{"role": "user", "content": str(index)}], 16)
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return [future.result(timeout=5) for future in futures]
+
+    def test_requests_in_window_share_a_batch(self):
+        model = RecordingModel()
+        scheduler = BatchScheduler(model.run_batch, max_batch_size=4, batch_window=0.5)
+        scheduler.start()
+        try:
+            results = self.submit_together(scheduler, 3)
+        finally:
+            scheduler.stop()
+
+        self.assertEqual(sorted(results), ["reply to 0", "reply to 1", "reply to 2"])
+        self.assertEqual(model.batches, [3])
+        self.assertEqual(scheduler.get_stats()["batch_sizes"], {"3": 1})
+
+    def test_max_padded_tokens_splits_batches(self):
+        model = RecordingModel()
+        scheduler = BatchScheduler(model.run_batch, max_batch_size=4, batch_window=0.5,
+                                   max_padded_tokens=40, count_tokens=lambda records: 4)
+        scheduler.start()
+        try:
+            self.submit_together(scheduler, 3)
+        finally:
+            scheduler.stop()
+
+        # each request pads to 4 + 16 tokens so only two fit in a batch
+        self.assertEqual(sorted(model.batches), [1, 2])
+
+    def test_owners_take_turns(self):
+        model = RecordingModel()
+        scheduler = BatchScheduler(model.run_batch, max_batch_size=2, batch_window=0)
+
+        # a busy owner queues four prompts before a quiet owner queues one
+        scheduler.running = True
+        futures = [scheduler.submit([{"role": "user", "content": f"busy {i}"}], 16, owner="busy") for i in range(4)]
+        futures.append(scheduler.submit([{"role": "user", "content": "quiet"}], 16, owner="quiet"))
+
+        first = [request.owner for request in scheduler.next_batch()]
+        second = [request.owner for request in scheduler.next_batch()]
+
+        self.assertEqual(first, ["busy", "quiet"])
+        self.assertEqual(second, ["busy", "busy"])
+        self.assertEqual([request.records[-1]["content"] for request in scheduler.pending], ["busy 3"])
+
+    def test_least_recently_served_owner_goes_first(self):
+        model = RecordingModel()
+        scheduler = BatchScheduler(model.run_batch, max_batch_size=1, batch_window=0)
+        scheduler.running = True
+
+        for owner in ("a", "a", "b", "a"):
+            scheduler.submit([{"role": "user", "content": owner}], 16, owner=owner)
+
+        order = [scheduler.next_batch()[0].owner for _ in range(4)]
+
+        self.assertEqual(order, ["a", "b", "a", "a"])
+
+    def test_owner_stats(self):
+        model = RecordingModel()
+        scheduler = BatchScheduler(model.run_batch, batch_window=0)
+        scheduler.start()
+        try:
+            scheduler.submit([{"role": "user", "content": "hi"}], 16, owner=7).result(timeout=5)
+        finally:
+            scheduler.stop()
+
+        self.assertEqual(scheduler.get_owner_stats(7)["served"], 1)
+        self.assertEqual(scheduler.get_stats()["owners"]["7"]["queue_wait"]["count"], 1)
+        self.assertEqual(scheduler.get_owner_stats(8)["served"], 0)
+
+    def test_errors_reach_every_caller(self):
+        def fail(requests):
+            raise ValueError("out of memory")
+
+        scheduler = BatchScheduler(fail, batch_window=0)
+        scheduler.start()
+        try:
+            future = scheduler.submit([{"role": "user", "content": "hi"}], 16)
+            with self.assertRaises(ValueError):
+                future.result(timeout=5)
+        finally:
+            scheduler.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import threading
+import unittest
+
+from mysql.connector import Error
+
+from systems.database import ConnectionPool, Database, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+
+    def is_connected(self):
+        return self.connected
+
+    def close(self):
+        self.closed = True
+
+    def rollback(self):
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def test_reuses_connections(self):
+        pool = ConnectionPool(FakeConnection, size=2, timeout=1)
+        first = pool.checkout()
+        pool.checkin(first)
+        self.assertIs(pool.checkout(), first)
+        self.assertEqual(pool.get_stats()["open"], 1)
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool = ConnectionPool(FakeConnection, size=1, timeout=0.1)
+        pool.checkout()
+        with self.assertRaises(PoolTimeoutError):
+            pool.checkout()
+        self.assertEqual(pool.get_stats()["timeouts"], 1)
+
+    def test_waiter_gets_returned_connection(self):
+        pool = ConnectionPool(FakeConnection, size=1, timeout=2)
+        connection = pool.checkout()
+        received = []
+
+        waiter = threading.Thread(target=lambda: received.append(pool.checkout()))
+        waiter.start()
+        pool.checkin(connection)
+        waiter.join()
+
+        self.assertIs(received[0], connection)
+
+    def test_stale_connection_is_replaced(self):
+        pool = ConnectionPool(FakeConnection, size=1, timeout=1, health_check_interval=0)
+        connection = pool.checkout()
+        connection.connected = False
+        pool.checkin(connection)
+
+        replacement = pool.checkout()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.get_stats()["discarded"], 1)
+
+
+class TestDatabaseRun(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = Database._pool
+        Database._pool = ConnectionPool(FakeConnection, size=2, timeout=1)
+
+    def tearDown(self):
+        Database._pool = self.pool
+
+    def drop_connection_once(self, calls):
+        def operation(connection):
+            calls.append(connection)
+            if len(calls) == 1:
+                # the commit may have reached the server before the connection dropped
+                connection.connected = False
+                raise Error("Lost connection to MySQL server during query")
+            return "done"
+
+        return operation
+
+    def test_writes_are_not_retried(self):
+        calls = []
+        with self.assertRaises(Error):
+            Database.run(self.drop_connection_once(calls))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(Database._pool.get_stats()["discarded"], 1)
+
+    def test_reads_are_retried_on_a_new_connection(self):
+        calls = []
+        self.assertEqual(Database.run(self.drop_connection_once(calls), retry=True), "done")
+        self.assertEqual(len(calls), 2)
+        self.assertIsNot(calls[0], calls[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import threading
+import unittest
+
+from systems.event_bus import EventBus
+
+
+class TestEventBus(unittest.TestCase):
+
+    def test_subscribers_only_get_their_topics(self):
+        bus = EventBus()
+        transcripts = bus.subscribe("transcript")
+        everything = bus.subscribe("transcript", "history")
+
+        bus.publish("history", {"role": "host"})
+        bus.publish("transcript", "segment")
+
+        self.assertEqual(transcripts.get(0).data, "segment")
+        self.assertIsNone(transcripts.get(0))
+        self.assertEqual([everything.get(0).topic, everything.get(0).topic], ["history", "transcript"])
+
+    def test_get_wakes_on_publish(self):
+        bus = EventBus()
+        subscription = bus.subscribe("transcript")
+
+        threading.Timer(0.05, bus.publish, args=("transcript", 1)).start()
+
+        event = subscription.get(timeout=5)
+        self.assertEqual(event.data, 1)
+
+    def test_slow_subscriber_drops_oldest(self):
+        bus = EventBus()
+        subscription = bus.subscribe("transcript", max_events=2)
+
+        for i in range(5):
+            bus.publish("transcript", i)
+
+        self.assertEqual([subscription.get(0).data, subscription.get(0).data], [3, 4])
+        self.assertEqual(bus.get_stats()["dropped"], 3)
+
+    def test_closed_subscription_gets_nothing(self):
+        bus = EventBus()
+        subscription = bus.subscribe("transcript")
+        subscription.close()
+
+        bus.publish("transcript", 1)
+
+        self.assertIsNone(subscription.get(0))
+        self.assertEqual(bus.get_stats()["subscribers"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+from collections import Counter
+
+from systems.fetch_pool import FetchPool
+
+
+class SlowSite:
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = Counter()
+        self.max_active = Counter()
+        self.max_total = 0
+        self.fetches = []
+
+    def fetch(self, session_id, url):
+        domain = FetchPool.get_domain(url)
+        with self.lock:
+            self.fetches.append(url)
+            self.active[domain] += 1
+            self.max_active[domain] = max(self.max_active[domain], self.active[domain])
+            self.max_total = max(self.max_total, sum(self.active.values()))
+
+        time.sleep(self.delay)
+
+        with self.lock:
+            self.active[domain] -= 1
+        return f"page {url}"
+
+
+class TestFetchPool(unittest.TestCase):
+
+    def test_pages_are_fetched_in_parallel(self):
+        site = SlowSite()
+        pool = FetchPool(site.fetch, max_workers=4, max_per_domain=2)
+        try:
+            start = time.monotonic()
+            futures = pool.fetch_all(1, [f"https://site{i}.com/a" for i in range(4)])
+            pages = [future.result(timeout=5) for future in futures]
+            elapsed = time.monotonic() - start
+        finally:
+            pool.stop()
+
+        self.assertEqual(pages, [f"page https://site{i}.com/a" for i in range(4)])
+        self.assertLess(elapsed, 0.3)
+
+    def test_per_domain_and_global_limits(self):
+        site = SlowSite(delay=0.05)
+        pool = FetchPool(site.fetch, max_workers=3, max_per_domain=1)
+        try:
+            urls = [f"https://www.example.com/{i}" for i in range(4)] + [f"https://other{i}.com/" for i in range(4)]
+            for future in pool.fetch_all(1, urls):
+                future.result(timeout=5)
+        finally:
+            pool.stop()
+
+        self.assertEqual(site.max_active["example.com"], 1)
+        self.assertLessEqual(site.max_total, 3)
+        self.assertEqual(len(site.fetches), 8)
+
+    def test_duplicate_urls_share_a_fetch(self):
+        site = SlowSite()
+        pool = FetchPool(site.fetch, max_workers=2)
+        try:
+            first, second = pool.fetch_all(1, ["https://example.com/a", "https://example.com/a"])
+            self.assertIs(first, second)
+            first.result(timeout=5)
+        finally:
+            pool.stop()
+
+        self.assertEqual(site.fetches, ["https://example.com/a"])
+
+    def test_errors_are_returned_through_the_future(self):
+        def fail(session_id, url):
+            raise ValueError(url)
+
+        pool = FetchPool(fail, max_workers=1)
+        try:
+            future = pool.submit(1, "https://example.com/")
+            with self.assertRaises(ValueError):
+                future.result(timeout=5)
+        finally:
+            pool.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
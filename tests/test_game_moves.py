@@ -0,0 +1,73 @@
+import unittest
+
+from systems.game_moves import GameMoves
+
+
+class FakeSession:
+    id = 1
+    game = "explore"
+    summary = "summarizer"
+
+
+class FakePage:
+    def __init__(self, body, summary=None):
+        self.url = "https://example.com/a"
+        self.title = "A"
+        self.body = body
+        self.summary = summary
+        self.saves = 0
+
+    def save(self):
+        self.saves += 1
+
+
+class FakeAgent:
+    name = "summarizer"
+    prompt = "summarize the page"
+
+
+class FakeGenerator:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_response(self, prompt="", input="", history=None, cache_key=None, owner=None):
+        self.prompts.append(input)
+        return "new summary"
+
+
+class FakeApp:
+    def __init__(self):
+        self.generator = FakeGenerator()
+
+    def text_generator(self):
+        return self.generator
+
+
+class TestSummarizePage(unittest.TestCase):
+
+    def setUp(self):
+        self.app = FakeApp()
+        self.moves = GameMoves(self.app, FakeSession())
+        self.moves.get_agent = lambda name: FakeAgent()
+        self.shared = {}
+        self.moves.get_content_summary = lambda body: self.shared.get(body)
+
+    def test_shared_summary_is_reused_without_the_model(self):
+        # saved before another session's page with the same content was summarized
+        self.shared["the body"] = "shared summary"
+        page = FakePage("the body")
+
+        self.assertEqual(self.moves.summarize_page(page), "shared summary")
+        self.assertEqual(page.saves, 1)
+        self.assertEqual(self.app.generator.prompts, [])
+
+    def test_new_content_is_summarized(self):
+        page = FakePage("the body")
+
+        self.assertEqual(self.moves.summarize_page(page), "new summary")
+        self.assertEqual(page.saves, 1)
+        self.assertEqual(len(self.app.generator.prompts), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import time
+import unittest
+from unittest import mock
+
+from systems.game_system import GameSystem
+from systems.turn_pacer import TurnPacer
+
+
+class FakeSession:
+    def __init__(self, id):
+        self.id = id
+        self.name = f"session {id}"
+
+
+class FakePage:
+    def __init__(self, session_id, url):
+        self.session_id = session_id
+        self.url = url
+
+
+class FakeGameMoves:
+    """Plays a turn every few milliseconds and records what it was sent."""
+
+    def __init__(self, app, session):
+        self.session = session
+        self.last_turn_stats = {}
+        self.turns = 0
+        self.pages = []
+        self.inputs = []
+        self.fail = False
+
+    def next_turn(self, previous_response):
+        time.sleep(0.005)
+        if self.fail:
+            raise RuntimeError("no database")
+        self.turns += 1
+        return f"turn {self.turns}"
+
+    def summarize_page(self, page):
+        return ""
+
+    def on_page_load(self, page):
+        self.pages.append(page.url)
+
+    def on_user_input(self, user_input):
+        self.inputs.append(user_input)
+
+
+class FakeSummaries:
+    def __init__(self):
+        self.sessions = set()
+
+    def register(self, session_id, summarize):
+        self.sessions.add(session_id)
+
+    def unregister(self, session_id):
+        self.sessions.discard(session_id)
+
+    def queued(self, session_id):
+        return 0
+
+
+class FakeApp:
+    def __init__(self):
+        self.summary_worker = FakeSummaries()
+        self.turn_pacer = TurnPacer(self)
+        self.transcript_player = None
+        self.text_generator_system = None
+        self.browser_system = None
+
+    def summaries(self):
+        return self.summary_worker
+
+    def pacer(self):
+        return self.turn_pacer
+
+
+class TestGameSystem(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("systems.game_runner.GameMoves", FakeGameMoves)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.app = FakeApp()
+        self.game_system = GameSystem(self.app)
+        self.addCleanup(self.game_system.stop)
+
+    def wait_for_turns(self, session_id, turns):
+        deadline = time.monotonic() + 5
+        while self.game_system.get_runner(session_id).get_stats()["turns"] < turns:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_sessions_play_at_the_same_time(self):
+        self.game_system.start_playing(FakeSession(1))
+        self.game_system.start_playing(FakeSession(2))
+
+        self.wait_for_turns(1, 3)
+        self.wait_for_turns(2, 3)
+
+        self.assertTrue(self.game_system.is_playing(1))
+        self.assertTrue(self.game_system.is_playing(2))
+        self.assertEqual(self.app.summary_worker.sessions, {1, 2})
+        self.assertEqual(self.game_system.current_session_id, 2)
+
+        stats = self.game_system.get_stats()
+        self.assertEqual(set(stats), {"1", "2"})
+        self.assertGreater(stats["1"]["turns_per_minute"], 0)
+        self.assertGreater(stats["2"]["turn_time"]["count"], 0)
+        self.assertEqual(stats["1"]["buffer"]["level"]["seconds"], 0.0)
+
+    def test_starting_a_playing_session_keeps_its_runner(self):
+        first = self.game_system.start_playing(FakeSession(1))
+        second = self.game_system.start_playing(FakeSession(1))
+
+        self.assertIs(first, second)
+
+    def test_stop_one_session(self):
+        self.game_system.start_playing(FakeSession(1))
+        self.game_system.start_playing(FakeSession(2))
+
+        self.game_system.stop(2)
+
+        self.assertTrue(self.game_system.is_playing(1))
+        self.assertFalse(self.game_system.is_playing(2))
+        self.assertEqual(self.app.summary_worker.sessions, {1})
+        # the current session falls back to one that's still playing
+        self.assertEqual(self.game_system.current_session_id, 1)
+
+        self.game_system.stop()
+
+        self.assertFalse(self.game_system.running)
+        self.assertIsNone(self.game_system.current_game)
+        self.assertEqual(self.app.summary_worker.sessions, set())
+
+    def test_pages_and_input_go_to_their_session(self):
+        self.game_system.start_playing(FakeSession(1))
+        self.game_system.start_playing(FakeSession(2))
+
+        self.game_system.on_page_load(FakePage(1, "https://example.com/one"))
+        self.game_system.on_user_input("hello")
+        self.game_system.focus(1)
+        self.game_system.on_user_input("hi one")
+
+        self.assertEqual(self.game_system.get_runner(1).game.pages, ["https://example.com/one"])
+        self.assertEqual(self.game_system.get_runner(2).game.pages, [])
+        self.assertEqual(self.game_system.get_runner(2).game.inputs, ["hello"])
+        self.assertEqual(self.game_system.get_runner(1).game.inputs, ["hi one"])
+
+    def test_failing_turns_are_counted_and_retried(self):
+        runner = self.game_system.start_playing(FakeSession(1))
+        runner.error_delay = 0.01
+        runner.game.fail = True
+
+        deadline = time.monotonic() + 5
+        while runner.get_stats()["errors"] < 2:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        runner.game.fail = False
+        self.wait_for_turns(1, runner.get_stats()["turns"] + 1)
+        self.assertTrue(runner.running)
+
+
+if __name__ == '__main__':
+    unittest.main()
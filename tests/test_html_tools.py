@@ -11,5 +11,29 @@ class TestHtmlTools(unittest.TestCase):
         self.assertEqual(HtmlTools.strip_string("stepladder"), "ladder")
         self.assertEqual(HtmlTools.strip_string("NASA https://en.wikipedia.org/wiki/List_of_NASA_robots Robots"), "NASA Robots")
 
+    page = """<html><head><title>Robots website</title><style>p {}</style></head><body>
+        <nav><a href="/home">Home</a></nav>
+        <div class="ads">Buy now</div>
+        <p style="color: red">Robots explore <a href="/mars">Mars</a> and the moon.</p>
+        <p style="display:none">hidden text</p>
+        <!-- a comment -->
+        <div><span></span></div>
+        <p>Copyright 2024</p>
+        </body></html>"""
+
+    def test_extract(self):
+        extracted = HtmlTools.extract(self.page)
+
+        self.assertEqual(extracted.title, "Robots website")
+        self.assertEqual(extracted.body, "Robots explore Mars and the moon.")
+        self.assertEqual(extracted.links, [{"text": "Mars", "href": "/mars"}])
+
+    def test_extract_matches_separate_calls(self):
+        extracted = HtmlTools.extract(self.page, parser="html.parser")
+
+        self.assertEqual(extracted.title, HtmlTools.get_title(self.page))
+        self.assertEqual(extracted.body, HtmlTools.get_page_content(HtmlTools.strip_string(self.page)))
+        self.assertEqual(extracted.links, HtmlTools.get_page_links(self.page))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
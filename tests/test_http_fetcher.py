@@ -0,0 +1,94 @@
+import gzip
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from systems.http_fetcher import HttpFetcher
+
+ARTICLE = ("<html><head><title>An Article</title></head><body><article>"
+           + "<p>Octopuses have three hearts and blue blood, which helps them live in cold water.</p>" * 20
+           + "<a href='/next'>Next story</a></article></body></html>")
+
+JS_SHELL = ("<html><head><title>App</title></head><body><div id='root'></div>"
+            "<noscript>You need to enable JavaScript to run this app.</noscript>"
+            "<script src='/static/app.js'></script></body></html>")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/article":
+            self.send_page(ARTICLE.encode())
+        elif self.path == "/gzip":
+            self.send_page(gzip.compress(ARTICLE.encode()), {"Content-Encoding": "gzip"})
+        elif self.path == "/app":
+            self.send_page(JS_SHELL.encode())
+        elif self.path == "/large":
+            self.send_page(ARTICLE.encode() * 100)
+        elif self.path == "/image":
+            self.send_page(b"\x89PNG", {"Content-Type": "image/png"})
+        else:
+            self.send_error(404)
+
+    def send_page(self, data, headers=None):
+        headers = {"Content-Type": "text/html; charset=utf-8", **(headers or {})}
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpFetcher(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.fetcher = HttpFetcher(max_bytes=64 * 1024)
+
+    def tearDown(self):
+        self.fetcher.close()
+
+    def test_static_page_is_fetched_without_a_browser(self):
+        result = self.fetcher.fetch(f"{self.base_url}/article")
+
+        self.assertEqual(result.title, "An Article")
+        self.assertIn("three hearts", result.body)
+        self.assertIn("/next", result.html)
+
+    def test_gzip_is_decoded(self):
+        result = self.fetcher.fetch(f"{self.base_url}/gzip")
+
+        self.assertIn("three hearts", result.body)
+
+    def test_unusable_pages_fall_back_to_the_browser(self):
+        for path in ["/app", "/large", "/image", "/missing"]:
+            self.assertIsNone(self.fetcher.fetch(f"{self.base_url}{path}"), path)
+
+        fallbacks = self.fetcher.get_stats()["fallbacks"]
+        self.assertEqual(fallbacks, {"too short": 1, "too large": 1, "not html": 1, "status 404": 1})
+
+    def test_stats_report_hit_rate(self):
+        self.fetcher.fetch(f"{self.base_url}/article")
+        self.fetcher.fetch(f"{self.base_url}/app")
+
+        stats = self.fetcher.get_stats()
+        self.assertEqual((stats["attempts"], stats["hits"], stats["hit_rate"]), (2, 1, 0.5))
+        self.assertEqual(stats["hit_time"]["count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import unittest
+
+from flask import Flask
+
+from pages.index_page import IndexPage
+from systems.event_bus import EventBus
+
+
+class FakeHistory:
+    def __init__(self, content):
+        self.content = content
+
+    def to_dict(self):
+        return {"id": 7, "role": "agent-host", "content": self.content}
+
+
+class FakeApp:
+    def __init__(self):
+        self.event_bus = EventBus()
+
+    def events(self):
+        return self.event_bus
+
+
+class TestIndexEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.app = FakeApp()
+        self.page = IndexPage(self.app)
+        self.page.keep_alive_interval = 0.05
+
+        flask_app = Flask(__name__)
+        flask_app.register_blueprint(self.page.blueprint)
+        self.client = flask_app.test_client()
+
+    def read_message(self, chunks):
+        # skip keep-alive comments and the retry hint
+        while True:
+            chunk = next(chunks)
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if chunk.startswith("id:"):
+                return dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+
+    def test_events_are_streamed_as_json(self):
+        response = self.client.get('/events')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        chunks = iter(response.response)
+
+        self.app.events().publish("history", FakeHistory("x" * 5000))
+        self.app.events().publish("speech", {"speaking": True, "voice": "host"})
+        self.app.events().publish("unrelated", {"ignored": True})
+
+        history = self.read_message(chunks)
+        self.assertEqual(history["event"], "history")
+        data = json.loads(history["data"])
+        self.assertEqual(data["role"], "agent-host")
+        self.assertEqual(len(data["content"]), IndexPage.max_event_content + 3)
+
+        speech = self.read_message(chunks)
+        self.assertEqual(speech["event"], "speech")
+        self.assertEqual(json.loads(speech["data"]), {"speaking": True, "voice": "host"})
+
+        response.close()
+        self.assertEqual(self.app.events().get_stats()["subscribers"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
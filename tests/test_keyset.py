@@ -0,0 +1,135 @@
+import sqlite3
+import unittest
+from datetime import datetime, timedelta
+
+from models.keyset import Keyset
+from models.page_model import PageModel
+from models.session_history_model import SessionHistoryModel
+from models.session_transcript_model import SessionTranscriptModel
+
+
+class SqliteDatabase:
+    """Runs the models' MySQL queries against sqlite, which only differs in its parameter style."""
+
+    def __init__(self):
+        self.connection = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+        self.queries = []
+
+    def execute_many(self, query, seq_params):
+        self.connection.executemany(query.replace("%s", "?"), seq_params)
+
+    def fetch_results(self, query, params=None, binary=False):
+        self.queries.append(query)
+        return self.connection.execute(query.replace("%s", "?"), tuple(params or ())).fetchall()
+
+
+class TestKeyset(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SqliteDatabase()
+        self.db.connection.execute("CREATE TABLE session_history "
+                                   "(id INTEGER PRIMARY KEY, session_id INT, role TEXT, content TEXT, timestamp TIMESTAMP)")
+        self.db.connection.execute("CREATE TABLE transcripts (id INTEGER PRIMARY KEY, session_id INT, agent TEXT, "
+                                   "url TEXT, content TEXT, timestamp TIMESTAMP)")
+
+        # three entries a second so pages have to break ties on the id
+        start = datetime(2024, 1, 1, 12, 0, 0)
+        rows = [(id, 1 if id % 5 else 2, "user" if id % 2 else "agent-host", f"entry {id}",
+                 start + timedelta(seconds=id // 3))
+                for id in range(1, 61)]
+        self.db.execute_many("INSERT INTO session_history VALUES (%s, %s, %s, %s, %s)", rows)
+        self.db.execute_many("INSERT INTO transcripts VALUES (%s, %s, 'host', 'https://example.com', %s, %s)",
+                             [(id, session_id, content, timestamp) for id, session_id, _, content, timestamp in rows])
+
+        self.expected = [row[0] for row in sorted(rows, key=lambda row: (row[4], row[0]), reverse=True)
+                         if row[1] == 1]
+
+    def read_all(self, get_page):
+        pages = [get_page(None, None)]
+        while pages[-1].next_cursor:
+            pages.append(get_page(pages[-1].next_cursor, None))
+        return pages
+
+    def test_pages_follow_each_other(self):
+        pages = self.read_all(lambda after, before: SessionHistoryModel.get_page_by_session_id(
+            self.db, 1, 10, after=after, before=before))
+
+        self.assertEqual([entry.id for page in pages for entry in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [10, 10, 10, 10, 8])
+        self.assertIsNone(pages[0].prev_cursor)
+        self.assertIsNone(pages[-1].next_cursor)
+
+    def test_newer_pages_go_back(self):
+        pages = self.read_all(lambda after, before: SessionHistoryModel.get_page_by_session_id(
+            self.db, 1, 10, after=after, before=before))
+
+        # from the last page back to the first with the prev cursors
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = SessionHistoryModel.get_page_by_session_id(self.db, 1, 10, before=page.prev_cursor)
+            self.assertEqual([entry.id for entry in page], [entry.id for entry in expected])
+
+        self.assertIsNone(page.prev_cursor)
+        self.assertIsNotNone(page.next_cursor)
+
+    def test_role_filter(self):
+        page = SessionHistoryModel.get_page_by_session_id(self.db, 1, 100, role="user")
+
+        self.assertTrue(page.items)
+        self.assertTrue(all(entry.role == "user" for entry in page))
+        self.assertIn("role = %s", self.db.queries[-1])
+
+    def test_transcripts_across_sessions(self):
+        pages = self.read_all(lambda after, before: SessionTranscriptModel.get_page(self.db, 25, after, before))
+
+        self.assertEqual(sum(len(page) for page in pages), 60)
+        self.assertEqual(len({transcript.id for page in pages for transcript in page}), 60)
+
+        session = SessionTranscriptModel.get_page(self.db, 100, session_id=1)
+        self.assertEqual([transcript.id for transcript in session], self.expected)
+
+    def test_queries_have_no_offset(self):
+        page = SessionHistoryModel.get_page_by_session_id(self.db, 1, 10)
+        SessionHistoryModel.get_page_by_session_id(self.db, 1, 10, after=page.next_cursor)
+
+        self.assertNotIn("OFFSET", self.db.queries[-1])
+        self.assertIn("timestamp < %s OR (timestamp = %s AND id < %s)", self.db.queries[-1])
+
+    def test_cursor_round_trip(self):
+        keyset = Keyset("created_at", "url_hash")
+        cursor = keyset.encode_cursor(datetime(2024, 5, 6, 7, 8, 9), "ab~cd")
+
+        self.assertEqual(keyset.decode_cursor(cursor), (datetime(2024, 5, 6, 7, 8, 9), "ab~cd"))
+        with self.assertRaises(ValueError):
+            keyset.decode_cursor("not a cursor")
+
+    def test_page_model_cursor_uses_the_url_hash(self):
+        class RecordingDatabase:
+            def __init__(self, rows):
+                self.rows = rows
+                self.params = None
+
+            def fetch_results(self, query, params=None, binary=False):
+                self.query = query
+                self.params = params
+                return self.rows
+
+        created = datetime(2024, 1, 1)
+        columns = ("session_id", "url", "title", "created_at")
+        rows = [(1, f"https://example.com/{i}", None, created) for i in range(3)]
+        db = RecordingDatabase(rows)
+
+        page = PageModel.get_page(db, 1, 2, columns=columns, summarized=True)
+
+        self.assertEqual([item.url for item in page], ["https://example.com/0", "https://example.com/1"])
+        self.assertEqual(page.next_cursor,
+                         Keyset("", "").encode_cursor(created, PageModel.get_url_hash("https://example.com/1")))
+        self.assertIn("NOT pages.is_summary_null", db.query)
+
+        PageModel.get_page(db, 1, 2, columns=columns, after=page.next_cursor)
+        self.assertIn("pages.created_at < %s", db.query)
+        self.assertEqual(db.params[-2:], (PageModel.get_url_hash("https://example.com/1"), 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+
+from mysql.connector import Error, errorcode
+
+from systems.migrations import Migrations
+
+
+class RecordingDatabase:
+    """Database, connection and cursor in one, records the migration statements it runs."""
+
+    def __init__(self, applied=(), failures=None):
+        self.applied = list(applied)
+        self.failures = failures or {}  # statement -> errno it fails with
+        self.statements = []
+        self.locks = []
+        self.rows = []
+
+    def run(self, operation, retry=False):
+        return operation(self)
+
+    # connection and cursor
+    def cursor(self):
+        return self
+
+    def execute(self, statement, params=()):
+        self.rows = []
+        if statement.startswith("SELECT GET_LOCK"):
+            self.locks.append("get")
+            self.rows = [(1,)]
+        elif statement.startswith("SELECT RELEASE_LOCK"):
+            self.locks.append("release")
+            self.rows = [(1,)]
+        elif statement.startswith("SELECT version"):
+            self.rows = [(version,) for version in self.applied]
+        elif statement.startswith("INSERT INTO schema_migrations"):
+            self.applied.append(params[0])
+        elif statement in self.failures:
+            raise Error(msg=f"{statement} failed", errno=self.failures[statement])
+        else:
+            self.statements.append(statement)
+
+    @property
+    def with_rows(self):
+        return bool(self.rows)
+
+    def fetchall(self):
+        return self.rows
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestMigrations(unittest.TestCase):
+
+    def test_split_statements(self):
+        sql = """
+            -- a comment; with a semicolon
+            CREATE TABLE t (a INT);
+
+            UPDATE t SET a = 1
+            WHERE a = 2;
+        """
+        self.assertEqual(Migrations.split_statements(sql),
+                         ["CREATE TABLE t (a INT)", "UPDATE t SET a = 1\n            WHERE a = 2"])
+
+    def test_pending_migrations_are_applied_in_order(self):
+        with tempfile.TemporaryDirectory() as path:
+            for name, sql in [("2_second.sql", "SELECT 2;"), ("10_third.sql", "SELECT 10;"),
+                              ("1_first.sql", "SELECT 1;"), ("notes.txt", "SELECT 0;")]:
+                with open(os.path.join(path, name), "w") as file:
+                    file.write(sql)
+
+            db = RecordingDatabase(applied=[1])
+            done = Migrations(db, path).apply()
+
+            self.assertEqual(done, ["2_second.sql", "10_third.sql"])
+            self.assertEqual(db.statements[-2:], ["SELECT 2", "SELECT 10"])
+            self.assertEqual(db.applied, [1, 2, 10])
+
+            # nothing left to apply
+            self.assertEqual(Migrations(db, path).apply(), [])
+            self.assertEqual(db.locks, ["get", "release", "get", "release"])
+
+    def test_interrupted_migration_is_rerun(self):
+        with tempfile.TemporaryDirectory() as path:
+            with open(os.path.join(path, "1_first.sql"), "w") as file:
+                file.write("ALTER TABLE t ADD COLUMN a INT;\nCREATE INDEX idx_a ON t(a);\nUPDATE t SET a = 1;")
+
+            # the column was added before the last run was interrupted
+            db = RecordingDatabase(failures={"ALTER TABLE t ADD COLUMN a INT": errorcode.ER_DUP_FIELDNAME})
+            self.assertEqual(Migrations(db, path).apply(), ["1_first.sql"])
+            self.assertEqual(db.statements[-2:], ["CREATE INDEX idx_a ON t(a)", "UPDATE t SET a = 1"])
+
+    def test_failed_migration_is_not_recorded(self):
+        with tempfile.TemporaryDirectory() as path:
+            with open(os.path.join(path, "1_first.sql"), "w") as file:
+                file.write("UPDATE t SET a = 1;")
+
+            db = RecordingDatabase(failures={"UPDATE t SET a = 1": errorcode.ER_BAD_FIELD_ERROR})
+            with self.assertRaises(Error):
+                Migrations(db, path).apply()
+            self.assertEqual(db.applied, [])
+            self.assertEqual(db.locks, ["get", "release"])
+
+    def test_shipped_migrations_are_numbered(self):
+        migrations = Migrations(RecordingDatabase()).get_migrations()
+        self.assertEqual(migrations[0], (1, "001_page_contents.sql"))
+        self.assertEqual(len({version for version, _ in migrations}), len(migrations))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import sqlite3
+import unittest
+from unittest.mock import patch
+
+from models.agent_model import AgentModel
+from models.game_model import GameModel
+from models.model_cache import ModelCache, model_cache
+from models.session_player_model import SessionPlayerModel
+
+
+class SqliteDatabase:
+    """Runs the models' MySQL queries against sqlite, upserts become INSERT OR REPLACE."""
+
+    def __init__(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.queries = []
+
+    def translate(self, query):
+        query = query.replace("%s", "?")
+        if "ON DUPLICATE KEY UPDATE" in query:
+            query = query.split("ON DUPLICATE KEY UPDATE")[0].replace("INSERT INTO", "INSERT OR REPLACE INTO")
+        return query
+
+    def execute_query(self, query, params=None, return_last_insert_id=False):
+        self.connection.execute(self.translate(query), tuple(params or ()))
+
+    def fetch_results(self, query, params=None, binary=False):
+        self.queries.append(query)
+        return self.connection.execute(self.translate(query), tuple(params or ())).fetchall()
+
+
+class TestModelCache(unittest.TestCase):
+
+    def test_hit_and_miss(self):
+        cache = ModelCache(ttl=60)
+        loads = []
+
+        def load():
+            loads.append(1)
+            return [("row",)]
+
+        self.assertEqual(cache.get("agents", "host", load), [("row",)])
+        self.assertEqual(cache.get("agents", "host", load), [("row",)])
+        self.assertEqual(len(loads), 1)
+
+        stats = cache.get_stats()["namespaces"]["agents"]
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_expires_after_ttl(self):
+        cache = ModelCache(ttl=60)
+        loads = []
+
+        def load():
+            loads.append(1)
+            return [("row",)]
+
+        with patch("models.model_cache.time.monotonic", return_value=100.0):
+            cache.get("agents", None, load)
+        with patch("models.model_cache.time.monotonic", return_value=159.0):
+            cache.get("agents", None, load)
+        self.assertEqual(len(loads), 1)
+
+        with patch("models.model_cache.time.monotonic", return_value=161.0):
+            cache.get("agents", None, load)
+        self.assertEqual(len(loads), 2)
+
+    def test_empty_results_are_not_cached(self):
+        cache = ModelCache()
+        # fetch_results returns [] when the query fails, e.g. the pool timed out
+        self.assertEqual(cache.get("agents", None, lambda: []), [])
+        self.assertEqual(cache.get("agents", None, lambda: [("host",)]), [("host",)])
+        self.assertEqual(cache.get("agents", None, lambda: []), [("host",)])
+
+    def test_ttl_zero_turns_caching_off(self):
+        cache = ModelCache(ttl=0)
+        loads = []
+        cache.get("agents", None, lambda: loads.append(1) or [("row",)])
+        cache.get("agents", None, lambda: loads.append(1) or [("row",)])
+        self.assertEqual(len(loads), 2)
+        self.assertEqual(cache.get_stats()["entries"], 0)
+
+    def test_invalidate_namespace(self):
+        cache = ModelCache()
+        cache.get("agents", "host", lambda: [1])
+        cache.get("agents", "judge", lambda: [2])
+        cache.get("games", None, lambda: [3])
+
+        cache.invalidate("agents")
+
+        self.assertEqual(cache.get("agents", "host", lambda: [4]), [4])
+        self.assertEqual(cache.get("games", None, lambda: [5]), [3])
+        self.assertEqual(cache.get_stats()["namespaces"]["agents"]["invalidations"], 1)
+
+    def test_load_racing_an_invalidation_is_not_stored(self):
+        cache = ModelCache()
+
+        def load():
+            # another thread saves the agent while the old rows are being read
+            cache.invalidate("agents")
+            return ["stale"]
+
+        self.assertEqual(cache.get("agents", None, load), ["stale"])
+        self.assertEqual(cache.get("agents", None, lambda: ["fresh"]), ["fresh"])
+
+
+class TestCachedModels(unittest.TestCase):
+
+    def setUp(self):
+        model_cache.clear()
+        self.db = SqliteDatabase()
+        self.db.connection.execute("CREATE TABLE agents (name TEXT PRIMARY KEY, prompt TEXT, voice TEXT, role TEXT)")
+        self.db.connection.execute("CREATE TABLE games (name TEXT PRIMARY KEY, rules TEXT)")
+        self.db.connection.execute("CREATE TABLE game_variables "
+                                   "(game_name TEXT, name TEXT, value TEXT, PRIMARY KEY (game_name, name))")
+        self.db.connection.execute("CREATE TABLE session_players "
+                                   "(session_id INT, turn_order INT, player TEXT, voice TEXT, "
+                                   "PRIMARY KEY (session_id, turn_order))")
+
+    def tearDown(self):
+        model_cache.clear()
+
+    def test_game_get_all_is_one_query(self):
+        GameModel(self.db, "chess", "chess rules", {"board": "8x8", "clock": "5m"}).save()
+        GameModel(self.db, "debate", "debate rules", {}).save()
+        self.db.queries.clear()
+
+        games = GameModel.get_all(self.db)
+
+        self.assertEqual(len(self.db.queries), 1)
+        self.assertEqual([game.name for game in games], ["chess", "debate"])
+        self.assertEqual(games[0].variables, {"board": "8x8", "clock": "5m"})
+        self.assertEqual(games[1].variables, {})
+
+    def test_game_get(self):
+        GameModel(self.db, "chess", "chess rules", {"board": "8x8"}).save()
+
+        game = GameModel.get(self.db, "chess")
+        self.assertEqual(game.rules, "chess rules")
+        self.assertEqual(game.variables, {"board": "8x8"})
+        self.assertIsNone(GameModel.get(self.db, "go"))
+
+    def test_game_save_invalidates(self):
+        game = GameModel(self.db, "chess", "chess rules", {"board": "8x8"})
+        game.save()
+        GameModel.get_all(self.db)
+        GameModel.get_all(self.db)
+        self.assertEqual(len(self.db.queries), 1)
+
+        game.variables["board"] = "10x10"
+        game.save()
+        self.assertEqual(GameModel.get_all(self.db)[0].variables, {"board": "10x10"})
+
+        game.delete()
+        self.assertEqual(GameModel.get_all(self.db), [])
+
+    def test_agent_save_and_delete_invalidate(self):
+        AgentModel(self.db, "host", "be a host", "alice", "host").save()
+        self.assertEqual(AgentModel.get(self.db, "host").prompt, "be a host")
+
+        AgentModel(self.db, "host", "be a better host", "alice", "host").save()
+        self.assertEqual(AgentModel.get(self.db, "host").prompt, "be a better host")
+
+        AgentModel.get(self.db, "host").delete()
+        self.assertIsNone(AgentModel.get(self.db, "host"))
+        self.assertEqual(AgentModel.get_all(self.db), [])
+
+    def test_cached_models_are_copies(self):
+        AgentModel(self.db, "host", "be a host", "alice", "host").save()
+        AgentModel.get(self.db, "host").prompt = "changed without saving"
+        self.assertEqual(AgentModel.get(self.db, "host").prompt, "be a host")
+
+    def test_session_players_by_session_id(self):
+        SessionPlayerModel(self.db, 1, 0, "host", "alice").save()
+        self.assertEqual([player.player for player in SessionPlayerModel.get_by_session_id(self.db, 1)], ["host"])
+        # ids from urls are strings, they share the entry
+        SessionPlayerModel.get_by_session_id(self.db, "1")
+        self.assertEqual(len([query for query in self.db.queries if "session_players" in query]), 1)
+
+        SessionPlayerModel(self.db, 1, 1, "judge", None).save()
+        self.assertEqual(len(SessionPlayerModel.get_by_session_id(self.db, 1)), 2)
+
+        SessionPlayerModel.delete_by_session_id(self.db, 1)
+        self.assertEqual(SessionPlayerModel.get_by_session_id(self.db, 1), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+
+from models.page_content_model import PageContentModel
+from models.page_model import PageModel
+
+
+class RecordingDatabase:
+    def __init__(self, results=None):
+        self.batches = []
+        self.queries = []
+        self.executed = []
+        self.results = results or []
+
+    def fetch_results(self, query, params=None, binary=False):
+        self.queries.append(query)
+        return self.results
+
+    def execute_many(self, query, seq_params):
+        self.batches.append((query, list(seq_params)))
+
+    def execute_query(self, query, params=None, return_last_insert_id=False):
+        self.executed.append((query, params))
+
+
+class TestPageModel(unittest.TestCase):
+
+    def test_bulk_upsert_links_dedupes_in_one_batch(self):
+        db = RecordingDatabase()
+        links = [
+            {"href": "https://example.com/a", "text": ""},
+            {"href": "https://example.com/b", "text": "B"},
+            {"href": "https://example.com/a", "text": "A"},
+            {"href": "https://example.com/b", "text": "B again"},
+        ]
+
+        count = PageModel.bulk_upsert_links(db, 1, "https://example.com/", links)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(len(db.batches), 1)
+        rows = {row[2]: row for row in db.batches[0][1]}
+        self.assertEqual(rows["https://example.com/a"][3], "A")
+        self.assertEqual(rows["https://example.com/b"][3], "B")
+        self.assertEqual(rows["https://example.com/a"][4], PageModel.get_url_hash("https://example.com/"))
+
+    def test_bulk_upsert_links_skips_oversized_urls(self):
+        db = RecordingDatabase()
+        links = [{"href": "https://example.com/" + "x" * 3000, "text": "long"}]
+
+        self.assertEqual(PageModel.bulk_upsert_links(db, 1, "https://example.com/", links), 0)
+
+    def test_lite_columns_load_body_on_first_access(self):
+        db = RecordingDatabase(results=[("the body",)])
+        row = (1, "https://example.com/a", "A", None, None, None, None, None, None, None)
+        page = PageModel.from_rows(db, PageModel.lite_columns, [row])[0]
+
+        self.assertEqual(page.title, "A")
+        self.assertEqual(db.queries, [])
+        self.assertEqual(page.body, "the body")
+        self.assertEqual(page.body, "the body")
+        self.assertEqual(len(db.queries), 1)
+
+    def test_projected_page_cannot_be_saved(self):
+        db = RecordingDatabase()
+        page = PageModel.from_rows(db, PageModel.link_columns, [(1, "https://example.com/a", "A")])[0]
+
+        with self.assertRaises(ValueError):
+            page.save()
+
+
+    def test_body_is_stored_once_by_content_hash(self):
+        db = RecordingDatabase()
+        page = PageModel(db, 1, "https://example.com/a", title="A", body="the body")
+
+        page.save()
+
+        content_hash = PageContentModel.get_content_hash("the body")
+        self.assertEqual(page.content_hash, content_hash)
+        contents, pages = db.executed
+        self.assertIn("INSERT INTO page_contents", contents[0])
+        self.assertEqual(contents[1], (content_hash, "the body", None))
+        self.assertIn("INSERT INTO pages", pages[0])
+        self.assertIsNone(pages[1][4])  # no body of its own
+        self.assertEqual(pages[1][6], content_hash)
+
+    def test_summary_is_reused_from_shared_content(self):
+        db = RecordingDatabase(results=[("shared summary",)])
+        page = PageModel(db, 2, "https://mirror.example.com/a", title="A", body="the body")
+
+        page.save()
+
+        self.assertEqual(page.summary, "shared summary")
+        self.assertEqual(db.executed[-1][1][5], "shared summary")
+
+    def test_unchanged_content_is_not_stored_again(self):
+        db = RecordingDatabase()
+        content_hash = PageContentModel.get_content_hash("the body")
+        page = PageModel(db, 1, "https://example.com/a", title="A", body="the body", summary="summary",
+                         content_hash=content_hash)
+
+        page.save()
+
+        queries = [query for query, _ in db.executed]
+        self.assertIn("UPDATE page_contents SET summary", queries[0])
+        self.assertFalse(any("INSERT INTO page_contents" in query for query in queries))
+
+    def test_error_page_keeps_its_empty_body(self):
+        db = RecordingDatabase()
+        page = PageModel(db, 1, "https://example.com/missing", title="", body="")
+
+        page.save()
+
+        self.assertEqual(len(db.executed), 1)
+        self.assertEqual(db.executed[0][1][4], "")
+        self.assertIsNone(page.content_hash)
+
+    def test_body_is_selected_from_shared_content(self):
+        query = PageModel.select(PageModel.columns)
+        self.assertIn("IFNULL(page_contents.body, pages.body)", query)
+        self.assertIn("LEFT JOIN page_contents", query)
+        self.assertNotIn("page_contents", PageModel.select(PageModel.lite_columns))
+
+
+if __name__ == '__main__':
+    unittest.main()
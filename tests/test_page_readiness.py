@@ -0,0 +1,55 @@
+import time
+import unittest
+
+from systems.page_readiness import PageReadiness
+
+
+class FakeBrowser:
+    """readyState completes after load_time and the DOM keeps growing until render_time."""
+
+    def __init__(self, load_time=0.1, render_time=0.3):
+        self.start = time.monotonic()
+        self.load_time = load_time
+        self.render_time = render_time
+
+    def execute_script(self, script):
+        elapsed = time.monotonic() - self.start
+        if script == PageReadiness.ready_state_script:
+            return "complete" if elapsed >= self.load_time else "loading"
+        return int(min(elapsed, self.render_time) * 1000)
+
+
+class TestPageReadiness(unittest.TestCase):
+
+    def test_waits_for_load_and_stable_dom(self):
+        readiness = PageReadiness(timeout=5, stable_interval=0.2, poll_interval=0.02)
+        browser = FakeBrowser(load_time=0.1, render_time=0.3)
+
+        waited = readiness.wait(browser)
+
+        # ready once rendering stopped and the DOM stayed the same for stable_interval, well before the timeout
+        self.assertGreaterEqual(waited, 0.5)
+        self.assertLess(waited, 5)
+        self.assertEqual(readiness.get_stats()["timeouts"], {})
+
+    def test_network_idle_is_checked(self):
+        readiness = PageReadiness(timeout=5, stable_interval=0.05, poll_interval=0.02)
+        idle_at = time.monotonic() + 0.3
+
+        waited = readiness.wait(FakeBrowser(0, 0), network_idle=lambda: time.monotonic() >= idle_at)
+
+        self.assertGreaterEqual(waited, 0.3)
+        self.assertEqual(readiness.get_stats()["network_idle"]["count"], 1)
+
+    def test_stops_at_timeout(self):
+        readiness = PageReadiness(timeout=0.3, stable_interval=0.1, poll_interval=0.02)
+
+        waited = readiness.wait(FakeBrowser(load_time=10, render_time=10))
+
+        # not waiting on each check in turn for the whole timeout
+        self.assertLess(waited, 3)
+        self.assertEqual(readiness.get_stats()["timeouts"], {"ready_state": 1, "dom_stable": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from utils import patterns
+from utils.html_tools import HtmlTools
+from utils.patterns import SubstringMatcher
+
+
+class TestSubstringMatcher(unittest.TestCase):
+
+    def check_matcher(self, matcher):
+        self.assertEqual(matcher.search("The Page Was NOT FOUND here"), "not found")
+        self.assertEqual(matcher.search("status 404 error"), " 404 ")
+        self.assertIsNone(matcher.search("all good"))
+        self.assertIsNone(matcher.search(""))
+        self.assertTrue(matcher.matches("cdn.example.com/Access Denied"))
+
+    def test_alternation(self):
+        self.check_matcher(SubstringMatcher(["not found", " 404 ", "access denied"], use_automaton=False))
+
+    @unittest.skipUnless(patterns.ahocorasick, "pyahocorasick is not installed")
+    def test_automaton(self):
+        self.check_matcher(SubstringMatcher(["not found", " 404 ", "access denied"]))
+
+    def check_longest(self, matcher):
+        self.assertEqual(matcher.search("page not found"), "page not found")
+        self.assertEqual(matcher.search("the page was not found"), "page")
+        self.assertTrue(matcher.matches("PAGE"))
+        self.assertFalse(matcher.matches("nothing here"))
+
+    def test_longest_substring_is_reported(self):
+        self.check_longest(SubstringMatcher(["page", "page not found"], use_automaton=False))
+
+    @unittest.skipUnless(patterns.ahocorasick, "pyahocorasick is not installed")
+    def test_automaton_reports_longest_substring(self):
+        self.check_longest(SubstringMatcher(["page", "page not found"]))
+
+    def test_has_error_matches_substring_scan(self):
+        texts = ["", "Fine page", "Oops: Internal Server Error", "we got a 403 today", "GATEWAY TIMEOUT"]
+        for text in texts:
+            expected = not text or any(error.lower() in text.lower() for error in HtmlTools.error_strings)
+            self.assertEqual(HtmlTools.has_error(text), expected, text)
+
+    def test_compile_any(self):
+        pattern = patterns.compile_any([r'^\s*assistant\s*$', r'the search is complete'], patterns.re.M | patterns.re.I)
+        self.assertEqual(pattern.sub('', "Assistant\nThe search is complete. ok").strip(), ". ok")
+
+
+if __name__ == '__main__':
+    unittest.main()
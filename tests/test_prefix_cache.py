@@ -0,0 +1,44 @@
+import unittest
+
+from systems.prefix_cache import PrefixCache
+
+
+class TestPrefixCache(unittest.TestCase):
+
+    def test_shared_prefix_between_prompts_with_same_key(self):
+        cache = PrefixCache(min_prefix_tokens=3)
+
+        self.assertEqual(cache.shared_prefix("explore/host", [1, 2, 3, 4, 5]), 0)
+        self.assertEqual(cache.shared_prefix("explore/host", [1, 2, 3, 4, 9, 9]), 4)
+        self.assertEqual(cache.shared_prefix("explore/judge", [1, 2, 3, 4, 9, 9]), 0)
+
+    def test_short_prefixes_are_not_worth_caching(self):
+        cache = PrefixCache(min_prefix_tokens=3)
+
+        cache.shared_prefix("key", [1, 2, 7])
+        self.assertEqual(cache.shared_prefix("key", [1, 2, 8]), 0)
+
+    def test_lookup_returns_longest_prefix(self):
+        cache = PrefixCache()
+        cache.store([1, 2], "short")
+        cache.store([1, 2, 3, 4], "long")
+
+        self.assertEqual(cache.lookup([1, 2, 3, 4, 5]), (4, "long"))
+        self.assertEqual(cache.lookup([1, 2, 9]), (2, "short"))
+        # a prompt that is entirely cached still needs one token for the model to process
+        self.assertEqual(cache.lookup([1, 2, 3, 4]), (2, "short"))
+        self.assertEqual(cache.lookup([5]), (0, None))
+
+    def test_least_recently_used_prefix_is_evicted(self):
+        cache = PrefixCache(max_entries=2)
+        cache.store([1], "one")
+        cache.store([2], "two")
+        cache.lookup([1, 0])
+        cache.store([3], "three")
+
+        self.assertEqual(cache.lookup([2, 0]), (0, None))
+        self.assertEqual(cache.lookup([1, 0]), (1, "one"))
+
+
+if __name__ == '__main__':
+    unittest.main()
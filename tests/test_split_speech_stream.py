@@ -0,0 +1,29 @@
+import unittest
+
+from utils.text_tools import TextTools
+
+
+class TestSplitSpeechStream(unittest.TestCase):
+
+    def test_first_sentence_is_yielded_before_stream_ends(self):
+        def chunks():
+            yield "Hello there, this is "
+            yield "the radio show. It is"
+            raise AssertionError("the first sentence should be spoken before more text is read")
+
+        pieces = TextTools.split_speech_stream(chunks(), max_length=80)
+        self.assertEqual(next(pieces), "Hello there, this is the radio show.")
+
+    def test_pieces_respect_max_length(self):
+        text = ("We will talk about many things, some of them fascinating and some of them not so much "
+                "at all really. Then we play a song.")
+        chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+
+        pieces = list(TextTools.split_speech_stream(chunks, max_length=40))
+
+        self.assertEqual(" ".join(pieces), text)
+        self.assertTrue(all(len(piece) <= 40 for piece in pieces[:-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
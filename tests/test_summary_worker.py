@@ -0,0 +1,160 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from systems.summary_worker import SummaryWorker
+
+
+class FakePage:
+    def __init__(self, url, body="page body", summary=None):
+        self.url = url
+        self.body = body
+        self.summary = summary
+
+
+class FakeApp:
+    def db(self):
+        return None
+
+
+class SlowSummarizer:
+    """Summarizes pages in the order they arrive, the first one waits until release is set."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.lock = threading.Lock()
+        self.summarized = []
+
+    def summarize(self, page):
+        self.started.set()
+        self.release.wait(5)
+        with self.lock:
+            self.summarized.append(page.url)
+        page.summary = f"summary of {page.url}"
+        return page.summary
+
+
+class TestSummaryWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.worker = SummaryWorker(FakeApp(), idle_interval=60)
+        self.unsummarized = []
+        self.excluded = []
+        self.worker.get_unsummarized_pages = self.get_unsummarized_pages
+
+    def get_unsummarized_pages(self, session_id, max_results, exclude_urls=()):
+        self.excluded.append(list(exclude_urls))
+        return [page for page in self.unsummarized if page.url not in exclude_urls][:max_results]
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def test_same_page_is_summarized_once(self):
+        summarizer = SlowSummarizer()
+        self.worker.register(1, summarizer.summarize)
+
+        first = self.worker.submit(1, FakePage("https://example.com/a"))
+        second = self.worker.submit(1, FakePage("https://example.com/a"))
+        summarizer.release.set()
+
+        self.assertIs(first, second)
+        self.assertEqual(first.result(5), "summary of https://example.com/a")
+        self.assertEqual(summarizer.summarized, ["https://example.com/a"])
+        self.assertEqual(self.worker.get_stats()["deduped"], 1)
+
+    def test_user_page_goes_first(self):
+        summarizer = SlowSummarizer()
+        self.worker.register(1, summarizer.summarize)
+
+        busy = self.worker.submit(1, FakePage("https://example.com/busy"))
+        summarizer.started.wait(5)
+
+        futures = [
+            self.worker.submit(1, FakePage("https://example.com/a")),
+            self.worker.submit(1, FakePage("https://example.com/b")),
+            self.worker.submit(1, FakePage("https://example.com/user"), SummaryWorker.USER_PAGE),
+        ]
+        self.assertEqual(self.worker.get_stats()["queued"], 3)
+        summarizer.release.set()
+
+        for future in [busy] + futures:
+            future.result(5)
+        self.assertEqual(summarizer.summarized, ["https://example.com/busy", "https://example.com/user",
+                                                 "https://example.com/a", "https://example.com/b"])
+
+    def test_queued_page_moves_up_when_the_user_opens_it(self):
+        summarizer = SlowSummarizer()
+        self.worker.register(1, summarizer.summarize)
+
+        self.worker.submit(1, FakePage("https://example.com/busy"))
+        summarizer.started.wait(5)
+        first = self.worker.submit(1, FakePage("https://example.com/a"))
+        second = self.worker.submit(1, FakePage("https://example.com/b"))
+        self.worker.submit(1, FakePage("https://example.com/b"), SummaryWorker.USER_PAGE)
+        summarizer.release.set()
+
+        first.result(5)
+        second.result(5)
+        self.assertEqual(summarizer.summarized[1:], ["https://example.com/b", "https://example.com/a"])
+
+    def test_idle_worker_backfills_unsummarized_pages(self):
+        self.unsummarized = [FakePage("https://example.com/old"), FakePage("https://example.com/empty", body="")]
+        summarized = []
+
+        def summarize(page):
+            summarized.append(page.url)
+            self.unsummarized.remove(page)
+            return "summary"
+
+        self.worker.register(1, summarize)
+
+        deadline = time.monotonic() + 5
+        while not self.worker.get_stats()["backfilled"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(summarized, ["https://example.com/old"])
+        self.assertEqual(self.worker.get_stats()["backfilled"], 1)
+
+    def test_failed_page_is_excluded_from_the_backfill_query(self):
+        self.unsummarized = [FakePage("https://example.com/failing")]
+        attempts = []
+
+        def summarize(page):
+            attempts.append(page.url)
+            return ""
+
+        self.worker.register(1, summarize)
+
+        deadline = time.monotonic() + 5
+        while not self.worker.get_stats()["skipped"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.worker.backfill()
+
+        self.assertEqual(attempts, ["https://example.com/failing"])
+        self.assertEqual(self.excluded[-1], ["https://example.com/failing"])
+
+    def test_skipped_pages_are_retried_and_bounded(self):
+        worker = SummaryWorker(FakeApp(), skip_interval=60, max_skipped=2)
+        with patch("systems.summary_worker.time.monotonic", return_value=100.0):
+            for url in ["https://example.com/a", "https://example.com/b", "https://example.com/c"]:
+                worker.skip((1, url))
+            worker.skip((2, "https://example.com/d"))
+
+            self.assertEqual(len(worker.skipped), 2)
+            self.assertEqual(worker.get_skipped_urls(1), ["https://example.com/c"])
+            self.assertEqual(worker.get_skipped_urls(2), ["https://example.com/d"])
+
+        with patch("systems.summary_worker.time.monotonic", return_value=161.0):
+            self.assertEqual(worker.get_skipped_urls(1), [])
+            self.assertEqual(worker.get_stats()["skipped"], 0)
+
+    def test_unregistered_session_is_refused(self):
+        self.worker.start()
+        future = self.worker.submit(2, FakePage("https://example.com/a"))
+        self.assertIsInstance(future.exception(1), RuntimeError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import threading
+import unittest
+
+# a small chat model, e.g. HuggingFaceTB/SmolLM2-135M-Instruct, is enough to run these on a CPU
+TEST_MODEL = os.environ.get("LLM_TEST_MODEL")
+
+# long enough to be a prefix worth caching
+RULES = ("this is a variety show where we search the internet, open pages and then entertain the audience with "
+         "the things we find.\n\n") * 10
+
+
+@unittest.skipUnless(TEST_MODEL, "set LLM_TEST_MODEL to a small chat model to run text generation tests")
+class TestTextGenerator(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from systems.text_generator import TextGenerator
+
+        cls.generator = TextGenerator(model_path=TEST_MODEL, max_tokens=16, batch_window=0.5)
+        cls.generator.load_model()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.generator.stop()
+
+    def test_concurrent_prompts_are_batched(self):
+        results = [None] * 3
+
+        def generate(index):
+            results[index] = self.generator.generate_response(prompt="answer briefly", input=f"count to {index}")
+
+        threads = [threading.Thread(target=generate, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(results))
+        self.assertIn("3", self.generator.get_stats()["batch_sizes"])
+
+    def test_cached_prefix_gives_the_same_output(self):
+        from systems.batch_scheduler import GenerationRequest
+
+        self.generator.generation_kwargs = {"do_sample": False}
+        try:
+            hits = self.generator.prefix_cache.get_stats()["hits"]
+
+            # the second prompt with the key stores the shared prefix, the third resumes from it
+            cached = [self.generator.generate_response(prompt=RULES, input="what is next on the show?",
+                                                       cache_key="test/host")
+                      for _ in range(3)]
+
+            records = self.generator.build_input_records(RULES, "what is next on the show?")
+            uncached = self.generator.run_batch([GenerationRequest(records, self.generator.max_tokens)])[0]
+        finally:
+            self.generator.generation_kwargs = {}
+
+        self.assertGreater(self.generator.prefix_cache.get_stats()["hits"], hits)
+        self.assertEqual(cached, [uncached.strip()] * 3)
+
+    def test_stream_waits_for_the_model_but_not_the_cuda_lock(self):
+        chunks = []
+        done = threading.Event()
+
+        def read():
+            for chunk in self.generator.generate_stream(prompt="answer briefly", input="count to 3", exclusive=False):
+                chunks.append(chunk)
+            done.set()
+
+        # a batch is generating, speech synthesis holds the cuda lock
+        with self.generator.generation_lock, self.generator.cuda_lock:
+            threading.Thread(target=read, daemon=True).start()
+            self.assertFalse(done.wait(0.5))
+            self.assertEqual(chunks, [])
+
+        # the stream runs once the batch is done, whether or not speech has the cuda lock
+        with self.generator.cuda_lock:
+            self.assertTrue(done.wait(60))
+        self.assertTrue("".join(chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+import threading
+import time
+import unittest
+
+from systems.event_bus import EventBus
+from systems.system_base import SystemBase
+from systems.transcript_player import TranscriptPlayer
+
+
+class FakePrepared:
+    def __init__(self, text):
+        self.text = text
+        self.bytes = 100
+
+
+class FakeSpeech:
+    """Takes synth_time to prepare a transcript and play_time to play it."""
+
+    def __init__(self, synth_time=0.05, play_time=0.1):
+        self.synth_time = synth_time
+        self.play_time = play_time
+        self.prepared = []
+        self.played = []
+
+    def start(self):
+        pass
+
+    def clear(self):
+        pass
+
+    def queued_audio_seconds(self):
+        return 0.0
+
+    def prepare(self, voice, text, max_bytes=None):
+        time.sleep(self.synth_time)
+        self.prepared.append(text)
+        return FakePrepared(text)
+
+    def voice_say_prepared(self, prepared, callback=None, started=None):
+        def play():
+            started()
+            self.played.append(prepared.text)
+            time.sleep(self.play_time)
+            callback()
+
+        threading.Thread(target=play).start()
+
+
+class FailingSpeech(FakeSpeech):
+    """Can't synthesize ahead, e.g. the voice didn't load, so transcripts are spoken when they play."""
+
+    def prepare(self, voice, text, max_bytes=None):
+        raise FileNotFoundError(f"Voice '{voice}' not found in the database or file system.")
+
+    def voice_say_with_callback(self, voice, text, callback=None):
+        self.played.append(text)
+        callback()
+
+
+class FakeBrowser:
+    def show(self, url):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self, insert_id=None):
+        self.insert_id = insert_id
+
+    def execute_query(self, query, params=None, return_last_insert_id=False):
+        return self.insert_id
+
+    def fetch_results(self, query, params=None, binary=False):
+        return []
+
+
+class FakeAgent:
+    voice = "host"
+
+
+class FakeTranscript:
+    def __init__(self, id, session_id, content):
+        self.id = id
+        self.session_id = session_id
+        self.agent = "host"
+        self.url = f"https://example.com/{id}"
+        self.content = content
+
+
+class FakeApp:
+    def __init__(self, speech):
+        self.instance = self
+        self.speech_system = speech
+        self.event_bus = EventBus()
+
+    def events(self):
+        return self.event_bus
+
+    def speech(self):
+        return self.speech_system
+
+    def browser(self):
+        return FakeBrowser()
+
+    def db(self):
+        return FakeDatabase()
+
+
+class TestTranscriptPlayer(unittest.TestCase):
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_next_transcripts_are_prepared_while_one_plays(self):
+        speech = FakeSpeech()
+        player = TranscriptPlayer(FakeApp(speech), check_interval=0.05, lookahead_depth=2)
+        try:
+            for i in range(4):
+                player.show_and_say(f"https://example.com/{i}", "host", f"line {i} https://example.com *waves*")
+            self.wait_for(lambda: len(speech.played) == 4 and player.segment_silence.count == 3)
+        finally:
+            player.stop()
+
+        self.assertEqual([text.strip() for text in speech.played], [f"line {i}" for i in range(4)])
+
+        # every handoff after the first found the next transcript already synthesized
+        silence = player.get_stats()["segment_silence"]
+        self.assertEqual(silence["count"], 3)
+        self.assertLess(silence["max"], speech.synth_time)
+
+    def test_transcripts_that_failed_to_prepare_are_still_played(self):
+        speech = FailingSpeech()
+        player = TranscriptPlayer(FakeApp(speech), check_interval=0.05, lookahead_depth=2)
+        try:
+            for i in range(2):
+                player.show_and_say(f"https://example.com/{i}", "host", f"line {i}")
+            self.wait_for(lambda: len(speech.played) == 2)
+        finally:
+            player.stop()
+
+        self.assertEqual([text.strip() for text in speech.played], ["line 0", "line 1"])
+        self.assertEqual(player.get_stats()["prepare_failures"], 2)
+
+    def test_lookahead_is_bounded(self):
+        speech = FakeSpeech(synth_time=0.0, play_time=0.5)
+        player = TranscriptPlayer(FakeApp(speech), check_interval=0.05, lookahead_depth=2)
+        try:
+            for i in range(6):
+                player.show_and_say(f"https://example.com/{i}", "host", f"line {i}")
+            self.wait_for(lambda: len(speech.prepared) >= 4, timeout=0.3)
+
+            # one playing, two ready and one taken from the queue once there is room
+            self.assertLessEqual(len(speech.prepared), 4)
+            self.assertLessEqual(player.get_stats()["ready"], 2)
+        finally:
+            player.clear()
+            player.stop()
+
+    def test_buffer_estimates_airtime_per_session(self):
+        speech = FakeSpeech(synth_time=0.0, play_time=0.5)
+        player = TranscriptPlayer(FakeApp(speech), check_interval=0.05, lookahead_depth=1)
+        player.words_per_second = 2
+        try:
+            player.show_and_say("https://example.com/1", "host", "one two three four", session_id=1)
+            player.show_and_say("https://example.com/2", "host", "one two", session_id=2)
+            player.show_and_say("https://example.com/3", "host", "one two three four five six", session_id=1)
+            # one speaking, one ready and one waiting for room
+            self.wait_for(lambda: player.current_show and len(player.ready) == 1)
+
+            buffer = player.get_buffer()
+            session = player.get_buffer(1)
+        finally:
+            player.clear()
+            player.stop()
+
+        # the transcript being spoken counts for what it has left, at most its full length
+        self.assertEqual(buffer["transcripts"], 3)
+        self.assertLessEqual(buffer["seconds"], 6.0)
+        self.assertGreater(buffer["seconds"], 4.0)
+        self.assertEqual(session["transcripts"], 2)
+        self.assertGreater(session["seconds"], 3.0)
+
+    def test_published_transcripts_are_played_without_polling(self):
+        speech = FakeSpeech(synth_time=0.0, play_time=0.0)
+        app = FakeApp(speech)
+        player = TranscriptPlayer(app, check_interval=60)
+        player.get_agent = lambda name: FakeAgent()
+        player.session_id = "1"
+        player.start()
+        try:
+            app.events().publish("transcript", FakeTranscript(1, 1, "first"))
+            app.events().publish("transcript", FakeTranscript(2, 2, "other session"))
+            app.events().publish("transcript", FakeTranscript(1, 1, "first again"))
+            app.events().publish("transcript", FakeTranscript(3, 1, "second"))
+            self.wait_for(lambda: len(speech.played) == 2)
+        finally:
+            player.stop()
+
+        self.assertEqual(speech.played, ["first", "second"])
+        stats = player.get_stats()
+        self.assertEqual(stats["polls"], 0)
+        self.assertLess(stats["delivery_latency"]["max"], 1)
+
+    def test_only_saved_transcripts_are_published(self):
+        app = FakeApp(FakeSpeech())
+        subscription = app.events().subscribe("transcript")
+        try:
+            # the insert failed, there is no id to play it by
+            app.db = lambda: FakeDatabase(insert_id=None)
+            SystemBase(app).add_session_transcript(1, "https://example.com/1", "host", "lost")
+            self.assertIsNone(subscription.get(timeout=0.05))
+
+            app.db = lambda: FakeDatabase(insert_id=7)
+            SystemBase(app).add_session_transcript(1, "https://example.com/2", "host", "saved")
+            self.assertEqual(subscription.get(timeout=1).data.id, 7)
+        finally:
+            subscription.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from systems.turn_context import TurnContext
+
+
+class FakeSession:
+    id = 1
+    game = "explore"
+
+
+class FakeGameMoves:
+    max_settings = 25
+
+    def __init__(self):
+        self.session = FakeSession()
+        self.settings_loads = 0
+        self.agent_loads = 0
+
+    def get_session_settings_limited(self, session_id, max_settings):
+        self.settings_loads += 1
+        return {"topic": f"news {self.settings_loads}"}
+
+    def get_agent(self, agent_name):
+        self.agent_loads += 1
+        return agent_name
+
+
+class TestTurnContext(unittest.TestCase):
+
+    def test_placeholder_loaded_once_per_turn(self):
+        moves = FakeGameMoves()
+        context = TurnContext(moves)
+
+        first = context.get("%SETTINGS%")
+        second = context.get("%SETTINGS%")
+
+        self.assertEqual(first, second)
+        self.assertEqual(moves.settings_loads, 1)
+        self.assertEqual(context.get_stats()["cache_hits"], 1)
+
+    def test_invalidate_reloads_placeholder(self):
+        moves = FakeGameMoves()
+        context = TurnContext(moves)
+
+        context.get("%SETTINGS%")
+        context.invalidate("%SETTINGS%")
+
+        self.assertIn("news 2", context.get("%SETTINGS%"))
+
+    def test_agents_are_cached(self):
+        moves = FakeGameMoves()
+        context = TurnContext(moves)
+
+        context.get_agent("judge")
+        context.get_agent("judge")
+
+        self.assertEqual(moves.agent_loads, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
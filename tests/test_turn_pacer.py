@@ -0,0 +1,136 @@
+import threading
+import time
+import unittest
+
+from systems.turn_pacer import TurnPacer
+
+
+class FakeSession:
+    def __init__(self, id, target_buffer=None):
+        self.id = id
+        self.target_buffer = target_buffer
+
+
+class FakePlayer:
+    def __init__(self, seconds=0.0):
+        self.running = True
+        self.session_id = None
+        self.seconds = seconds
+
+    def get_buffer(self, session_id=None):
+        return {"seconds": self.seconds, "transcripts": int(self.seconds // 10)}
+
+
+class FakeSummaries:
+    def __init__(self):
+        self.pending = 0
+
+    def queued(self, session_id):
+        return self.pending
+
+
+class FakeApp:
+    def __init__(self, player=None):
+        self.transcript_player = player
+        self.summary_worker = FakeSummaries()
+
+
+class TestTurnPacer(unittest.TestCase):
+
+    def make_pacer(self, seconds=0.0, **kwargs):
+        self.player = FakePlayer(seconds)
+        self.app = FakeApp(self.player)
+        kwargs.setdefault("check_interval", 0.01)
+        kwargs.setdefault("sample_interval", 0)
+        return TurnPacer(self.app, **kwargs)
+
+    def pace_in_thread(self, pacer, session, stopping):
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(waited=pacer.pace(session, stopping)))
+        thread.start()
+        return thread, result
+
+    def test_empty_buffer_doesnt_wait(self):
+        pacer = self.make_pacer(0.0, target_buffer=60, max_delay=10)
+
+        self.assertLess(pacer.pace(FakeSession(1), threading.Event()), 0.05)
+
+    def test_delay_grows_with_the_buffer(self):
+        pacer = self.make_pacer(30.0, target_buffer=60, max_delay=0.2)
+
+        waited = pacer.pace(FakeSession(1), threading.Event())
+
+        # half full waits half of max_delay
+        self.assertGreaterEqual(waited, 0.09)
+        self.assertLess(waited, 0.2)
+
+    def test_full_buffer_pauses_until_it_drains(self):
+        pacer = self.make_pacer(70.0, target_buffer=60, resume_fraction=0.5, max_delay=0)
+        stopping = threading.Event()
+        thread, result = self.pace_in_thread(pacer, FakeSession(1), stopping)
+        try:
+            time.sleep(0.05)
+            # below the target but not yet drained to the resume level
+            self.player.seconds = 45.0
+            time.sleep(0.05)
+            self.assertTrue(thread.is_alive())
+            self.assertTrue(pacer.get_session_stats(1)["paused"])
+
+            self.player.seconds = 20.0
+            thread.join(1)
+            self.assertFalse(thread.is_alive())
+        finally:
+            stopping.set()
+            thread.join()
+
+        stats = pacer.get_session_stats(1)
+        self.assertEqual(stats["pauses"], 1)
+        self.assertFalse(stats["paused"])
+        self.assertGreaterEqual(result["waited"], 0.1)
+        self.assertEqual(stats["level"]["seconds"], 20.0)
+        self.assertEqual([sample["seconds"] for sample in stats["history"]][0], 70.0)
+
+    def test_pending_summaries_pause(self):
+        pacer = self.make_pacer(0.0, target_buffer=60, max_pending_summaries=2)
+        self.app.summary_worker.pending = 3
+        stopping = threading.Event()
+        thread, result = self.pace_in_thread(pacer, FakeSession(1), stopping)
+        try:
+            time.sleep(0.05)
+            self.assertTrue(thread.is_alive())
+
+            self.app.summary_worker.pending = 1
+            thread.join(1)
+            self.assertFalse(thread.is_alive())
+        finally:
+            stopping.set()
+            thread.join()
+
+    def test_session_target_overrides_the_default(self):
+        pacer = self.make_pacer(70.0, target_buffer=60, max_delay=0)
+
+        # pacing turned off for the session
+        self.assertLess(pacer.pace(FakeSession(1, target_buffer=0), threading.Event()), 0.05)
+        # a bigger buffer for the session
+        self.assertLess(pacer.pace(FakeSession(2, target_buffer=120), threading.Event()), 0.05)
+        self.assertEqual(pacer.get_session_stats(2)["target"], 120)
+
+    def test_sessions_off_air_are_not_paced(self):
+        pacer = self.make_pacer(70.0, target_buffer=60, max_delay=0)
+        self.player.session_id = "2"
+
+        self.assertLess(pacer.pace(FakeSession(1), threading.Event()), 0.05)
+
+    def test_stopping_ends_the_wait(self):
+        pacer = self.make_pacer(70.0, target_buffer=60)
+        stopping = threading.Event()
+        thread, result = self.pace_in_thread(pacer, FakeSession(1), stopping)
+
+        stopping.set()
+        thread.join(1)
+
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from systems.text_to_speach import TextToSpeach
+from systems.voice_latent_cache import VoiceLatentCache
+
+HAS_TORCH = importlib.util.find_spec("torch") is not None
+
+
+class TestVoiceLatentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = VoiceLatentCache(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_file_path_depends_on_sample_hash(self):
+        old_path = self.cache.file_path("host", VoiceLatentCache.hash_data(b"old sample"))
+        new_path = self.cache.file_path("host", VoiceLatentCache.hash_data(b"new sample"))
+
+        self.assertNotEqual(old_path, new_path)
+        self.assertEqual(self.cache.file_path("../host", "ab" * 32),
+                         os.path.join(self.tmp_dir.name, "___host." + "ab" * 8 + ".pt"))
+
+    def test_remove_only_touches_the_voice(self):
+        for name in ["host.1111.pt", "host.2222.pt", "host-2.3333.pt"]:
+            open(os.path.join(self.tmp_dir.name, name), "w").close()
+
+        self.cache.remove("host", keep=os.path.join(self.tmp_dir.name, "host.2222.pt"))
+
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["host-2.3333.pt", "host.2222.pt"])
+
+    @unittest.skipUnless(HAS_TORCH, "torch is not installed")
+    def test_store_and_load_replaces_stale_latents(self):
+        import torch
+
+        old_hash = VoiceLatentCache.hash_data(b"old sample")
+        new_hash = VoiceLatentCache.hash_data(b"new sample")
+        self.cache.store("host", old_hash, torch.zeros(1, 32, 1024), torch.zeros(1, 512, 1))
+        self.cache.store("host", new_hash, torch.ones(1, 32, 1024), torch.ones(1, 512, 1))
+
+        self.assertIsNone(self.cache.load("host", old_hash))
+        gpt_cond_latent, speaker_embedding = self.cache.load("host", new_hash)
+        self.assertTrue(torch.equal(gpt_cond_latent, torch.ones(1, 32, 1024)))
+        self.assertEqual(len(os.listdir(self.tmp_dir.name)), 1)
+
+
+class FakeVoice:
+    hashes = 0
+
+    def get_data(self):
+        return b"sample"
+
+    def get_data_hash(self):
+        FakeVoice.hashes += 1
+        return VoiceLatentCache.hash_data(b"sample")
+
+
+class FakeLatentCache:
+    def load(self, voice_name, data_hash, device=None):
+        return None
+
+    def store(self, voice_name, data_hash, gpt_cond_latent, speaker_embedding):
+        pass
+
+
+class FakeTtsModel:
+    def __init__(self):
+        self.paths = []
+
+    def parameters(self):
+        return iter([FakeParameter()])
+
+    def get_conditioning_latents(self, audio_path):
+        self.paths.append(audio_path)
+        with open(audio_path, "rb") as f:
+            data = f.read()
+        time.sleep(0.05)  # long enough for the other threads to catch up
+        return data, len(data)
+
+
+class FakeParameter:
+    device = "cpu"
+
+
+class TestLoadVoiceFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.tempdir
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.speech = TextToSpeach(None, tmp_path=self.tmp_dir.name, audio_sink=object(), audio_cache_max_bytes=0)
+        FakeVoice.hashes = 0
+        self.speech.get_voice = lambda name: FakeVoice()
+        self.speech.voice_latent_cache = FakeLatentCache()
+        self.speech.tts_model = FakeTtsModel()
+
+    def tearDown(self):
+        tempfile.tempdir = self.tempdir
+        self.tmp_dir.cleanup()
+
+    def test_concurrent_loads_compute_once(self):
+        results = []
+        errors = []
+
+        def load():
+            try:
+                results.append(self.speech.load_voice_file("host"))
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=load) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [(b"sample", 6)] * 4)
+        self.assertEqual(len(self.speech.tts_model.paths), 1)
+        self.assertEqual(self.speech.voice_loads["computed"], 1)
+        # the temp file is removed and was never the shared <voice>.wav
+        self.assertNotEqual(os.path.basename(self.speech.tts_model.paths[0]), "host.wav")
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_sample_is_hashed_only_when_loaded(self):
+        self.speech.load_voice_file("host")
+        for _ in range(3):
+            self.speech.load_voice_file("host")
+        self.assertEqual(FakeVoice.hashes, 1)
+        self.assertEqual(self.speech.voice_loads["memory"], 3)
+
+        # the sample was saved again
+        self.speech.forget_voice("host")
+        self.speech.load_voice_file("host")
+        self.assertEqual(FakeVoice.hashes, 2)
+
+    def test_changed_sample_file_is_reloaded(self):
+        voice_path = os.path.join(self.tmp_dir.name, "host.wav")
+        with open(voice_path, "wb") as f:
+            f.write(b"sample")
+        self.assertEqual(self.speech.load_voice_file("host"), (b"sample", 6))
+        self.assertEqual(self.speech.load_voice_file("host"), (b"sample", 6))
+        self.assertEqual(len(self.speech.tts_model.paths), 1)
+
+        with open(voice_path, "wb") as f:
+            f.write(b"a new sample")
+        self.assertEqual(self.speech.load_voice_file("host"), (b"a new sample", 12))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,33 @@
-import re
+import importlib.util
 
 from bs4 import BeautifulSoup, Comment
 
+from utils import patterns
+from utils.patterns import SubstringMatcher
+
+
+class ExtractedPage:
+    def __init__(self, title, body, links):
+        self.title = title
+        self.body = body
+        self.links = links
+
 
 class HtmlTools:
+    # lxml parses several times faster than the standard library parser, use it when it is installed
+    parser = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+    unwanted_tags = ['meta', 'style', 'script', 'header', 'footer', 'nav', 'aside', 'form', 'noscript',
+                     'iframe', 'object', 'embed', 'video', 'audio']
+
+    unwanted_classes = [
+        'ad', 'ads', 'sponsored', 'promo', 'nav', 'mobile-hide', 'navigation',
+        'cookie-banner', 'cookie-consent', 'cookie-notice', 'cookie-policy',
+        'topbar', 'hidden'
+    ]
+
+    unwanted_ids = ['left-sidebar', 'navigation', 'side-categories', 'site-nav']
+
     error_strings = [
         "page not found",
         "page cannot be found",
@@ -26,19 +50,15 @@ class HtmlTools:
         "requested was not found"
     ]
 
-    url_pattern = r"\bhttps?://[^\s<>\",;:(){}[\]']+"
+    error_matcher = SubstringMatcher(error_strings)
 
-    strip_patterns = [
-        url_pattern,
-        r'\.{3,}',
-        r'\bstep'
-    ]
+    url_pattern = patterns.URL_PATTERN
 
     @staticmethod
     def is_url(text):
         url = ""
         try:
-            for match in re.finditer(HtmlTools.url_pattern, str(text), flags=re.IGNORECASE):
+            for match in patterns.URL.finditer(str(text)):
                 url = match.group(0)  # Get the first matched URL
         except Exception as ex:
             print(f"is_url({url}) exception {ex}")
@@ -49,37 +69,38 @@ class HtmlTools:
         if not text:
             return True
 
-        return any(substring.lower() in text.lower() for substring in HtmlTools.error_strings)
+        return HtmlTools.error_matcher.matches(text)
 
     @staticmethod
     def strip_string(text):
-        for pattern in HtmlTools.strip_patterns:
-            text = re.sub(pattern, '', text, flags=re.I)
+        for pattern in patterns.STRIP:
+            text = pattern.sub('', text)
         return HtmlTools.normalize_whitespace(text)
 
     @staticmethod
     def normalize_whitespace(text):
-        return re.sub(r'\s+', ' ', text).strip()
+        return patterns.WHITESPACE.sub(' ', text).strip()
 
     @staticmethod
-    def clean_soup(html_source):
-        soup = BeautifulSoup(html_source, "html.parser")
+    def clean_soup(html_source, parser=None):
+        return HtmlTools.clean(HtmlTools.parse(html_source, parser))
 
+    @staticmethod
+    def parse(html_source, parser=None):
+        return BeautifulSoup(html_source, parser or HtmlTools.parser)
+
+    @staticmethod
+    def clean(soup):
         try:
             # Decompose unwanted elements
-            for data in soup(['meta', 'style', 'script', 'header', 'footer', 'nav', 'aside', 'form', 'noscript',
-                              'iframe', 'object', 'embed', 'video', 'audio', 'meta']):
+            for data in soup(HtmlTools.unwanted_tags):
                 data.decompose()
         except Exception as ex:
             print(f"clean_soup unwanted elements exception {ex}")
 
         try:
             # Decompose elements by class
-            for data in soup.find_all(class_=[
-                'ad', 'ads', 'sponsored', 'promo', 'nav', 'mobile-hide', 'navigation',
-                'cookie-banner', 'cookie-consent', 'cookie-notice', 'cookie-policy',
-                'topbar', 'hidden'
-            ]):
+            for data in soup.find_all(class_=HtmlTools.unwanted_classes):
                 data.decompose()
         except Exception as ex:
             print(f"clean_soup unwanted classes exception {ex}")
@@ -88,23 +109,25 @@ class HtmlTools:
             for data in soup.find_all('div', attrs={'role': 'navigation'}):
                 data.decompose()
             # Remove cookie consent banners
-            for data in soup.find_all(id=['left-sidebar', 'navigation', 'side-categories', 'site-nav']):
+            for data in soup.find_all(id=HtmlTools.unwanted_ids):
                 data.decompose()
         except Exception as ex:
             print(f"clean_soup unwanted navigation exception {ex}")
 
         try:
             # Remove comments
-            for comment in soup.find_all(text=lambda text: isinstance(text, Comment)):
+            for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
                 comment.extract()
-            # Remove hidden elements
-            for element in soup.find_all(style=lambda value: value and 'display:none' in value):
-                element.decompose()
-            # Remove inline styles
+            # Remove hidden elements, inline styles and empty tags in one walk, parents come before their children
             for tag in soup.find_all(True):
-                del tag['style']
-            # Remove empty tags
-            for tag in soup.find_all():
+                if tag.decomposed:
+                    continue
+                style = tag.get('style')
+                if style:
+                    if 'display:none' in style:
+                        tag.decompose()
+                        continue
+                    del tag['style']
                 if not tag.contents or not tag.get_text(strip=True):
                     tag.decompose()
         except Exception as ex:
@@ -112,10 +135,7 @@ class HtmlTools:
 
         try:
             # Remove copyright notices and legal disclaimers
-            for data in soup.find_all(
-                    text=lambda
-                            t: 'copyright' in t.lower() or '©' in t or 'cookies' in t.lower() or 'website' in t.lower()
-            ):
+            for data in soup.find_all(string=HtmlTools.is_legal_text):
                 try:
                     parent = data.find_parent()
                     if parent:
@@ -129,6 +149,26 @@ class HtmlTools:
 
         return soup
 
+    @staticmethod
+    def is_legal_text(text):
+        lower = text.lower()
+        return 'copyright' in lower or '©' in text or 'cookies' in lower or 'website' in lower
+
+    @staticmethod
+    def extract(html_source, parser=None):
+        """Parse and clean html_source once and return its title, cleaned text and links."""
+        soup = HtmlTools.parse(html_source, parser)
+
+        # the title is read before cleaning, which can remove it
+        title = ""
+        if soup.title and soup.title.string:
+            title = HtmlTools.strip_string(soup.title.string)
+
+        HtmlTools.clean(soup)
+
+        body = HtmlTools.strip_string(soup.get_text(separator=' ', strip=True))
+        return ExtractedPage(title, body, HtmlTools.soup_links(soup))
+
     @staticmethod
     def get_page_content(html_source):
         soup = HtmlTools.clean_soup(html_source)
@@ -137,10 +177,19 @@ class HtmlTools:
         # Normalize whitespace
         return HtmlTools.normalize_whitespace(text)
 
+    @staticmethod
+    def get_title(html_source):
+        soup = HtmlTools.parse(html_source)
+        if soup.title and soup.title.string:
+            return HtmlTools.strip_string(soup.title.string)
+        return ""
+
     @staticmethod
     def get_page_links(html_source):
-        soup = HtmlTools.clean_soup(html_source)
+        return HtmlTools.soup_links(HtmlTools.clean_soup(html_source))
 
+    @staticmethod
+    def soup_links(soup):
         links = []
 
         for data in soup(['a']):
@@ -0,0 +1,88 @@
+import re
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Patterns used on every page, turn and proxied request, compiled once instead of on each call
+
+URL_PATTERN = r"\bhttps?://[^\s<>\",;:(){}[\]']+"
+
+URL = re.compile(URL_PATTERN, re.IGNORECASE)
+WHITESPACE = re.compile(r'\s+')
+
+# removed from page titles and bodies, in this order
+STRIP = [
+    URL,
+    re.compile(r'\.{3,}'),
+    re.compile(r'\bstep', re.IGNORECASE)
+]
+
+# *waves* style chat actions
+ACTION = re.compile(r'\*\s*[^*]+\s*\*')
+
+# set/search/get/open commands with either one or two values
+COMMAND = re.compile(
+    r'(?P<command>set|search|get|open)\s*(?:\(\s*"(?P<payload>[^"]+)"(?:\s*,\s*"(?P<value>[^"]+)")?\s*\)'
+    r'|:\s*"(?P<colon_payload>[^"]+)"|\s+"(?P<no_paren_payload>[^"]+)")',
+    re.IGNORECASE
+)
+QUOTES = re.compile(r'[\"*\']')
+
+SENTENCE_END = re.compile(r'[.!?;:]["\')\]]*\s')
+ACRONYM = re.compile(r'\b[A-Z]{2,4}\b')
+
+UNSPEAKABLE = re.compile(r'[^a-zA-Z0-9 \'%;:,.-=]')
+SPACE_COMMA = re.compile(r' ,')
+TRAILING_COMMA = re.compile(r',$')
+
+
+def compile_any(patterns, flags=0):
+    """One pattern that matches any of patterns."""
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), flags)
+
+
+class SubstringMatcher:
+    """
+    Finds which of a list of substrings occur in a text, ignoring case. The text is lowercased once and
+    scanned with an Aho-Corasick automaton when pyahocorasick is installed, otherwise with one `in` check per
+    substring, which is faster than a regex alternation for short lists.
+    """
+
+    def __init__(self, substrings, use_automaton=True):
+        # longest first so a substring that contains another one is reported
+        self.substrings = sorted({substring.lower() for substring in substrings if substring}, key=len, reverse=True)
+        self.automaton = None
+
+        if ahocorasick and use_automaton:
+            self.automaton = ahocorasick.Automaton()
+            for substring in self.substrings:
+                self.automaton.add_word(substring, substring)
+            self.automaton.make_automaton()
+
+    def search(self, text):
+        """Return the longest substring found in text, or None."""
+        if not text or not self.substrings:
+            return None
+
+        text = text.lower()
+        if self.automaton:
+            # the automaton reports matches in the order they end, not by length
+            found = [substring for _, substring in self.automaton.iter(text)]
+            return max(found, key=len) if found else None
+
+        for substring in self.substrings:
+            if substring in text:
+                return substring
+        return None
+
+    def matches(self, text):
+        """Whether any substring occurs in text, stops at the first one found."""
+        if not text or not self.substrings:
+            return False
+
+        text = text.lower()
+        if self.automaton:
+            return any(True for _ in self.automaton.iter(text))
+        return any(substring in text for substring in self.substrings)
@@ -0,0 +1,112 @@
+import importlib
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+
+class TimingStats:
+    """Thread safe running statistics for durations measured in seconds."""
+
+    def __init__(self, max_samples=1000):
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, percent):
+        with self.lock:
+            samples = sorted(self.samples)
+
+        if not samples:
+            return 0.0
+
+        index = min(len(samples) - 1, int(round(percent / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def to_dict(self):
+        with self.lock:
+            count = self.count
+            total = self.total
+            maximum = self.max
+
+        return {
+            "count": count,
+            "avg": round(total / count, 4) if count else 0.0,
+            "p50": round(self.percentile(50), 4),
+            "p95": round(self.percentile(95), 4),
+            "max": round(maximum, 4)
+        }
+
+
+class Histogram:
+    """Thread safe counter of discrete values, e.g. batch sizes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def add(self, value):
+        with self.lock:
+            self.counts[value] += 1
+
+    def to_dict(self):
+        with self.lock:
+            return {str(key): self.counts[key] for key in sorted(self.counts)}
+
+
+class StartupTimer:
+    """Records how long startup took: importing each module, creating each subsystem and loading each model."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.timings = {"imports": {}, "systems": {}, "models": {}}  # kind -> name -> seconds
+        self.ready = {}  # system or model -> seconds after startup it was ready
+
+    def record(self, kind, name, seconds):
+        with self.lock:
+            self.timings[kind][name] = round(seconds, 3)
+            if kind != "imports":
+                self.ready[name] = round(time.monotonic() - self.started, 3)
+
+    def import_module(self, name):
+        """Import a module, timing it if this is the first import. The time includes the modules it imports."""
+        if name in sys.modules:
+            return sys.modules[name]
+
+        start = time.monotonic()
+        module = importlib.import_module(name)
+        self.record("imports", name, time.monotonic() - start)
+        return module
+
+    def time(self, kind, name, load):
+        start = time.monotonic()
+        result = load()
+        self.record(kind, name, time.monotonic() - start)
+        return result
+
+    def to_dict(self):
+        with self.lock:
+            stats = {kind: dict(timings) for kind, timings in self.timings.items()}
+            stats["ready"] = dict(self.ready)
+        return stats
+
+    def report(self):
+        stats = self.to_dict()
+        lines = ["startup timing:"]
+        for kind in ("imports", "systems", "models"):
+            for name, seconds in sorted(stats[kind].items(), key=lambda item: -item[1]):
+                lines.append(f"  {kind[:-1]:6} {name:35} {seconds:8.3f}s")
+        for name, seconds in sorted(stats["ready"].items(), key=lambda item: item[1]):
+            lines.append(f"  ready  {name:35} {seconds:8.3f}s after startup")
+        return "\n".join(lines)
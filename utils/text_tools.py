@@ -1,7 +1,8 @@
-import re
 import math
 from collections import Counter
 
+from utils import patterns
+
 
 class TextTools:
     @staticmethod
@@ -48,12 +49,36 @@ class TextTools:
         return pieces
 
     @staticmethod
-    def separate_acronyms(text):
-        # Regular expression to find acronyms (2 to 5 capital letters)
-        acronym_pattern = r'\b[A-Z]{2,4}\b'
+    def split_speech_stream(text_chunks, max_length=64):
+        """
+        Splits streamed text into speech pieces like split_speech, yielding each piece as soon as the
+        sentence it belongs to is complete instead of waiting for the whole text.
+        """
+        buffer = ""
+        for chunk in text_chunks:
+            buffer += chunk
+
+            # find the end of the last complete sentence in the buffer
+            sentence_end = -1
+            for match in patterns.SENTENCE_END.finditer(buffer):
+                sentence_end = match.end()
 
-        # Replace each acronym with dashed version
-        return re.sub(acronym_pattern, lambda match: '-'.join(match.group()), text)
+            if sentence_end == -1 and len(buffer) > max_length * 2:
+                # no sentence end in sight, speak what we have up to the last word
+                sentence_end = buffer.rfind(' ') + 1
+
+            if sentence_end > 0:
+                for piece in TextTools.split_speech(buffer[:sentence_end], max_length=max_length):
+                    yield piece
+                buffer = buffer[sentence_end:]
+
+        for piece in TextTools.split_speech(buffer, max_length=max_length):
+            yield piece
+
+    @staticmethod
+    def separate_acronyms(text):
+        # Replace each acronym (2 to 4 capital letters) with dashed version
+        return patterns.ACRONYM.sub(lambda match: '-'.join(match.group()), text)
 
     @staticmethod
     def calculate_entropy(text):